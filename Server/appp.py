@@ -1,14 +1,41 @@
 import sqlite3
 import os
-import requests  # [필수] 네이버 API 및 외부 통신용
-from flask import Flask, jsonify, request, send_from_directory, render_template
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+import threading
+import hashlib
+import json
+import time
+import zlib
+import base64
+import random
+from concurrent.futures import ThreadPoolExecutor
+import http_client  # [필수] 네이버 API 및 외부 통신용 (타임아웃/재시도/차단기)
+from flask import Flask, Blueprint, Response, jsonify, request, render_template
 from mock_factory import factory_bp
-
-app = Flask(__name__)
-
-DATABASE_FILE = 'mydatabase.db'
+from naver_shop import shop_bp
+from events import events_bp
+import events
+from command_queue import queue_bp
+from dispatcher import dispatcher_bp
+import dispatcher
+from occupancy import occupancy_bp
+from slot_index import slot_index_bp
+import slot_index
+from stats import stats_bp
+import upload_store
+import passwords
+import sessions
+import migrations
+import metrics
+from snapshots import snapshots_bp
+from camera_relay import camera_bp
+from catalog import catalog_bp
+from search import search_bp
+import search
+from planner import planner_bp
+from inference import inference_bp
+from db import get_db_connection
+from cache import TTLCache
+import db
 
 # =========================================================
 # ▼ [설정] 네이버 API 키 & 업로드 폴더
@@ -17,110 +44,251 @@ NAVER_CLIENT_ID = "ZuNmfh2elsZgAtX166p3"
 NAVER_CLIENT_SECRET = "TczU_CH5Jy"
 
 UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+upload_store.ROOT = UPLOAD_FOLDER
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_FILE)
-    conn.row_factory = sqlite3.Row
-    return conn
+# 이 파일의 라우트 (앱은 create_app() 에서 만듭니다)
+main_bp = Blueprint('main', __name__)
 
 # =========================================================
-# ▼ [초기화] DB 테이블 및 기초 데이터 생성
+# ▼ [앱 팩토리] 임포트만으로는 DB/파일을 건드리지 않음
 # =========================================================
-def init_tables():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 1. users
-    cursor.execute('''CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, password TEXT NOT NULL, name TEXT, nickname TEXT, role TEXT, email TEXT, phone TEXT, birthdate TEXT, profile_image TEXT)''')
-    # 2. products
-    cursor.execute('''CREATE TABLE IF NOT EXISTS products (item_code TEXT PRIMARY KEY, product_name TEXT, brand TEXT, category TEXT, color TEXT, size TEXT, stock INTEGER)''')
-    # 3. orders
-    cursor.execute('''CREATE TABLE IF NOT EXISTS orders (id INTEGER PRIMARY KEY AUTOINCREMENT, company TEXT, item_name TEXT, quantity INTEGER, order_date TEXT, due_date TEXT, status TEXT DEFAULT '대기중', contact TEXT, price INTEGER, note TEXT)''')
-    # 4. slots
-    cursor.execute('''CREATE TABLE IF NOT EXISTS slots (slot_id TEXT PRIMARY KEY, x INTEGER, y INTEGER, w INTEGER, h INTEGER, is_active INTEGER)''')
-    
-    conn.commit()
-    conn.close()
-
-def insert_initial_products():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT count(*) FROM products")
-    if cursor.fetchone()[0] == 0:
-        print("📦 초기 제품 데이터 추가 중...")
-        products_data = [
-            ('BP-01-01-01', '빈폴 베이직 티셔츠', 'BeanPole', 'TOP', 'Black', 'XS', 10),
-            ('BP-01-02-02', '빈폴 로고 피케 셔츠', 'BeanPole', 'TOP', 'White', 'S', 15),
-            ('BP-02-03-04', '빈폴 컴포트 치노 팬츠', 'BeanPole', 'BOTTOM', 'Gray', 'L', 8),
-            ('UB-01-04-05', '엄브로 팀 트레이닝 탑', 'Umbro', 'TOP', 'Red', 'XL', 12),
-            ('UB-02-05-03', '엄브로 우븐 조거 팬츠', 'Umbro', 'BOTTOM', 'Blue', 'M', 20),
-            ('UB-03-01-03', '엄브로 벤치 롱 코트', 'Umbro', 'OUTER', 'Black', 'M', 7),
-            ('UB-03-02-06', '엄브로 아노락 자켓', 'Umbro', 'OUTER', 'White', 'Free', 5),
-            ('PM-01-03-02', '퓨마 T7 트랙 재킷', 'Puma', 'TOP', 'Gray', 'S', 18),
-            ('PM-02-01-05', '퓨마 아이코닉 T7 팬츠', 'Puma', 'BOTTOM', 'Black', 'XL', 1),
-            ('DS-03-01-04', '데상트 스위스 스키팀 재킷', 'DESCENTE', 'OUTER', 'Black', 'L', 5)
-        ]
-        cursor.executemany("INSERT INTO products (item_code, product_name, brand, category, color, size, stock) VALUES (?, ?, ?, ?, ?, ?, ?)", products_data)
-        conn.commit()
-    conn.close()
-
-init_tables()
-insert_initial_products()
-app.register_blueprint(factory_bp, url_prefix='/factory')
+# 실행:  python appp.py   또는   flask --app appp run
+# 스키마는 migrations.py 가 버전별로 관리합니다. (최신이면 SELECT 한 번)
+def create_app(database=None, start_dispatcher=None):
+    """start_dispatcher: 라인 작업 큐(factory_commands)를 장치로 보내는 디스패처를 바로 시작할지.
+    None 이면 DISPATCHER_AUTOSTART=1 일 때만 (벤치마크처럼 appp.app 만 쓰는 코드는 장치로 보내지 않게)
+    """
+    if database:
+        db.DATABASE_FILE = database
+    app = Flask(__name__)
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    db.init_app(app)
+    metrics.init_app(app)   # 다른 훅보다 먼저 (401 등으로 끝난 요청도 기록)
+    app.before_request(sessions.load)
+
+    applied = migrations.migrate(db.get_db_connection())
+    if applied:
+        print(f"🛠️ DB 스키마 {applied[0][0]}~{applied[-1][0]}번 적용 ({db.DATABASE_FILE})")
+    for fts in search.check(db.get_db_connection()):
+        print(f"🛠️ 검색 색인 {fts} 의 rowid 가 원본과 달라 다시 만들었습니다.")
+
+    app.register_blueprint(main_bp)
+    app.register_blueprint(factory_bp, url_prefix='/factory')
+    app.register_blueprint(shop_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(queue_bp)
+    app.register_blueprint(dispatcher_bp)
+    app.register_blueprint(occupancy_bp)
+    app.register_blueprint(slot_index_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(snapshots_bp)
+    app.register_blueprint(camera_bp)
+    app.register_blueprint(catalog_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(planner_bp)
+    app.register_blueprint(inference_bp)
+
+    if start_dispatcher is None:
+        start_dispatcher = os.environ.get('DISPATCHER_AUTOSTART') == '1'
+    if start_dispatcher:
+        dispatcher.start_dispatcher()   # 승인된 주문의 라인 작업을 서버가 뜨자마자 pump
+    return app
+
+_app = None
+_app_lock = threading.Lock()
+
+def __getattr__(name):
+    # 예전처럼 appp.app 을 쓰는 코드(벤치마크, flask --app appp)는 처음 접근할 때 앱을 만듦
+    global _app
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if _app is None:
+            _app = create_app()
+        return _app
 
 # =========================================================
 # ▼ [웹페이지] HTML 렌더링 (View)
 # =========================================================
-@app.route('/')
+@main_bp.route('/')
 def home():
     return render_template('factory_index.html')
 
-@app.route('/login')
+@main_bp.route('/login')
 def login_page():
     return render_template('login.html')
 
-@app.route('/register')
+@main_bp.route('/register')
 def register_page():
     return render_template('register.html')
 
-@app.route('/cart')
+@main_bp.route('/cart')
 def cart_page():
     return render_template('cart.html')
 
-@app.route('/order_history')
+@main_bp.route('/order_history')
 def order_history_page():
     return render_template('order_history.html')
 
-@app.route('/uploads/<filename>')
+# 업로드 파일 (?size=64|256 썸네일, ETag/Range/장기 캐시)
+@main_bp.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return upload_store.serve(filename)
 
 # =========================================================
 # ▼ [기능] 네이버 API (검색, 캡차)
 # =========================================================
-@app.route('/api/naver/search', methods=['GET'])
+NAVER_SHOP_URL = "https://openapi.naver.com/v1/search/shop.json"
+NAVER_CAPTCHA_URL = "https://openapi.naver.com/v1/captcha/nkey"
+NAVER_SORTS = ("sim", "date", "asc", "dsc")
+
+# 브랜드 페이지 한 번에 2~4건씩 같은 검색이 몰리므로 결과를 캐시합니다.
+naver_search_cache = TTLCache(maxsize=512, ttl=300, stale_ttl=1800)
+
+def _naver_search_key(query, start, display, sort):
+    # 공백/대소문자만 다른 검색어는 같은 키로 취급
+    query = " ".join(query.split()).lower()
+    start = min(max(start, 1), 1000)
+    display = min(max(display, 1), 100)
+    sort = sort if sort in NAVER_SORTS else "sim"
+    return (query, start, display, sort)
+
+def _fetch_naver_search(key):
+    query, start, display, sort = key
+    headers = { "X-Naver-Client-Id": NAVER_CLIENT_ID, "X-Naver-Client-Secret": NAVER_CLIENT_SECRET }
+    params = { "query": query, "display": display, "start": start, "sort": sort }
+    res = http_client.get("naver_search", NAVER_SHOP_URL, headers=headers, params=params)
+    if res.status_code != 200:
+        raise RuntimeError(f"Naver API Error {res.status_code}")  # 실패 응답은 캐시하지 않음
+    return res.json()['items']
+
+@main_bp.route('/api/naver/search', methods=['GET'])
 def search_naver_shopping():
     query = request.args.get('query')
     if not query: return jsonify([])
-    
-    url = "https://openapi.naver.com/v1/search/shop.json"
-    headers = { "X-Naver-Client-Id": NAVER_CLIENT_ID, "X-Naver-Client-Secret": NAVER_CLIENT_SECRET }
-    params = { "query": query, "display": 20, "start": 1, "sort": "sim" }
-    
+
+    key = _naver_search_key(query,
+                            request.args.get('start', 1, type=int),
+                            request.args.get('display', 20, type=int),
+                            request.args.get('sort', 'sim'))
     try:
-        res = requests.get(url, headers=headers, params=params)
-        return jsonify(res.json()['items']) if res.status_code == 200 else jsonify([])
-    except:
+        return jsonify(naver_search_cache.get_or_load(key, lambda: _fetch_naver_search(key)))
+    except Exception:
         return jsonify([])
 
-@app.route('/api/captcha/key', methods=['GET'])
+# ---------------------------------------------------------
+# 브랜드 카탈로그: 브라우저가 2~4번 나눠 부르던 검색을 서버에서 동시에 모아 한 페이지씩
+#   GET /api/catalog/brand?brand=빈폴&category=All[&page=1][&page_size=12][&seed=123]
+#   GET /api/catalog/brand?cursor=<next_cursor>
+#   - category=All      : 상의/하의/아우터/신발 4개 검색을 합침
+#   - 그 외 (상의 등)   : "브랜드 카테고리" 검색 1~100, 101~200위를 합침 (category= 비우면 브랜드만)
+#   - productId 로 중복 제거 → seed 로 섞기 (같은 seed 면 페이지를 넘겨도 순서가 같음)
+#   - 합친 목록은 (브랜드, 카테고리) 별로 캐시. 일부 검색만 실패하면 있는 것만 돌려주고 캐시하지 않음
+# ---------------------------------------------------------
+CATALOG_CATEGORIES = ("상의", "하의", "아우터", "신발")
+CATALOG_DISPLAY = 100            # 검색 1건당 받는 개수 (네이버 최대)
+CATALOG_PAGE_MAX = 100
+catalog_cache = TTLCache(maxsize=128, ttl=300, stale_ttl=1800)
+_catalog_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="naver-fanout")
+
+class _PartialCatalog(Exception):
+    def __init__(self, items, failed):
+        super().__init__(f"{failed}개 검색 실패")
+        self.items = items
+
+def _catalog_queries(brand, category):
+    if category == "all":
+        return [_naver_search_key(f"{brand} {cat}", 1, CATALOG_DISPLAY, "sim") for cat in CATALOG_CATEGORIES]
+    query = f"{brand} {category}".strip()
+    return [_naver_search_key(query, start, CATALOG_DISPLAY, "sim") for start in (1, 1 + CATALOG_DISPLAY)]
+
+def _load_catalog(key):
+    keys = _catalog_queries(*key)
+    t0 = time.perf_counter()
+    futures = [_catalog_pool.submit(naver_search_cache.get_or_load, k, lambda k=k: _fetch_naver_search(k)) for k in keys]
+    items, seen, failed = [], set(), 0
+    for future in futures:          # 검색 순서대로 합쳐 중복 시 앞의 것이 남도록
+        try:
+            results = future.result()
+        except Exception:
+            failed += 1
+            continue
+        for item in results:
+            pid = item.get("productId") or item.get("link")
+            if pid not in seen:
+                seen.add(pid)
+                items.append(item)
+    http_client.add_upstream_time(time.perf_counter() - t0)
+    if failed == len(keys):
+        raise RuntimeError("네이버 검색 실패")
+    if failed:
+        raise _PartialCatalog(items, failed)
+    return items
+
+def _encode_cursor(brand, category, seed, offset, page_size):
+    raw = json.dumps([brand, category, seed, offset, page_size], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    brand, category, seed, offset, page_size = json.loads(raw)
+    return str(brand), str(category), int(seed), max(int(offset), 0), int(page_size)
+
+@main_bp.route('/api/catalog/brand', methods=['GET'])
+def brand_catalog():
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            brand, category, seed, offset, page_size = _decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({"success": False, "message": "잘못된 cursor 입니다."}), 400
+    else:
+        brand = " ".join(request.args.get('brand', '').split())
+        category = request.args.get('category', 'All').strip()
+        page_size = request.args.get('page_size', 12, type=int)
+        offset = (max(request.args.get('page', 1, type=int), 1) - 1) * min(max(page_size, 1), CATALOG_PAGE_MAX)
+        seed = request.args.get('seed', type=int)
+        if seed is None:
+            seed = zlib.crc32(f"{brand}|{category}".encode())
+    if not brand:
+        return jsonify({"success": False, "message": "brand 가 필요합니다."}), 400
+    page_size = min(max(page_size, 1), CATALOG_PAGE_MAX)
+    key = (brand.lower(), category.lower())
+
+    partial = False
+    try:
+        items = catalog_cache.get_or_load(key, lambda: _load_catalog(key))
+    except _PartialCatalog as e:
+        items, partial = e.items, True
+    except Exception:
+        return jsonify({"success": False, "message": "상품을 불러오지 못했습니다."}), 503
+
+    order = list(range(len(items)))
+    random.Random(seed).shuffle(order)
+    page = [items[i] for i in order[offset:offset + page_size]]
+    next_offset = offset + page_size
+    return jsonify({
+        "success": True, "items": page, "total": len(items), "seed": seed,
+        "page": offset // page_size + 1, "page_size": page_size,
+        "total_pages": (len(items) + page_size - 1) // page_size,
+        "next_cursor": _encode_cursor(brand, category, seed, next_offset, page_size) if next_offset < len(items) else None,
+        "partial": partial,
+    })
+
+@main_bp.route('/api/naver/cache_stats', methods=['GET'])
+def naver_cache_stats():
+    return jsonify(dict(naver_search_cache.stats(), catalog=catalog_cache.stats()))
+
+@main_bp.route('/api/upstream/stats', methods=['GET'])
+def upstream_stats():
+    return jsonify(http_client.stats())
+
+@main_bp.route('/api/captcha/key', methods=['GET'])
 def get_captcha_key():
     try:
-        url = "https://openapi.naver.com/v1/captcha/nkey?code=0"
         headers = { "X-Naver-Client-Id": NAVER_CLIENT_ID, "X-Naver-Client-Secret": NAVER_CLIENT_SECRET }
-        res = requests.get(url, headers=headers).json()
+        res = http_client.get("naver_captcha", NAVER_CAPTCHA_URL, headers=headers, params={"code": 0}).json()
         key = res.get('key')
         image_url = f"https://openapi.naver.com/v1/captcha/ncaptcha.bin?key={key}"
         return jsonify({"key": key, "image_url": image_url})
@@ -130,15 +298,14 @@ def get_captcha_key():
 # =========================================================
 # ▼ [기능] 인증 (회원가입, 로그인, 정보수정)
 # =========================================================
-@app.route('/api/check_id', methods=['GET'])
+@main_bp.route('/api/check_id', methods=['GET'])
 def check_id():
     user_id = request.args.get('id')
     conn = get_db_connection()
     user = conn.execute("SELECT id FROM users WHERE id = ?", (user_id,)).fetchone()
-    conn.close()
     return jsonify({"message": "이미 존재하는 아이디입니다."}) if user else jsonify({"message": "사용 가능한 아이디입니다."}), 200
 
-@app.route('/api/register', methods=['POST'])
+@main_bp.route('/api/register', methods=['POST'])
 def register():
     data = request.get_json()
     
@@ -146,9 +313,12 @@ def register():
     if 'captcha_key' in data and data['captcha_key']:
         c_key = data.get('captcha_key')
         c_val = data.get('captcha_val')
-        verify_url = f"https://openapi.naver.com/v1/captcha/nkey?code=1&key={c_key}&value={c_val}"
         headers = { "X-Naver-Client-Id": NAVER_CLIENT_ID, "X-Naver-Client-Secret": NAVER_CLIENT_SECRET }
-        verify_res = requests.get(verify_url, headers=headers).json()
+        try:
+            verify_res = http_client.get("naver_captcha", NAVER_CAPTCHA_URL, headers=headers,
+                                         params={"code": 1, "key": c_key, "value": c_val}).json()
+        except Exception:
+            return jsonify({"message": "보안 문자 확인 서버에 연결할 수 없습니다. 잠시 후 다시 시도해주세요."}), 503
         if not verify_res.get('result'):
             return jsonify({"message": "보안 문자가 틀렸습니다."}), 400
 
@@ -157,76 +327,111 @@ def register():
     user_pw = data.get('pw')
     if not user_id or not user_pw: return jsonify({"message": "정보 누락"}), 400
 
-    hashed_pw = generate_password_hash(user_pw)
+    try:
+        hashed_pw = passwords.pool.hash(user_pw)
+    except passwords.Busy as e:
+        return jsonify({"message": str(e)}), 503
 
     try:
         conn = get_db_connection()
         conn.execute("INSERT INTO users (id, password, name, nickname, role, email, phone, birthdate) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
                      (user_id, hashed_pw, data.get('name',''), data.get('nickname',''), data.get('role','STAFF'), data.get('email',''), data.get('phone',''), data.get('birthdate','')))
         conn.commit()
-        conn.close()
         return jsonify({"message": "회원가입 성공"}), 201
     except sqlite3.IntegrityError:
         return jsonify({"message": "이미 존재하는 아이디입니다."}), 409
     except Exception as e:
         return jsonify({"message": f"오류: {e}"}), 500
 
-@app.route('/api/login', methods=['POST'])
+@main_bp.route('/api/login', methods=['POST'])
 def login():
     data = request.get_json()
-    conn = get_db_connection()
-    user = conn.execute("SELECT * FROM users WHERE id = ?", (data.get('id'),)).fetchone()
-    conn.close()
+    user_id, user_pw = data.get('id'), data.get('pw')
+    if not user_id or not user_pw: return jsonify({"message": "아이디 또는 비밀번호 오류"}), 401
+
+    # 아이디/IP 별 시도 제한 (해시 계산 전에 거름)
+    wait = passwords.throttle(user_id, request.remote_addr)
+    if wait:
+        return jsonify({"message": "로그인 시도가 너무 많습니다. 잠시 후 다시 시도해주세요."}), 429, {"Retry-After": str(int(wait) + 1)}
 
-    if user and check_password_hash(user['password'], data.get('pw')):
+    conn = get_db_connection()
+    user = conn.execute("SELECT password, name, nickname, role, email, phone, birthdate, profile_image FROM users WHERE id = ?",
+                        (user_id,)).fetchone()
+    if not user:
+        return jsonify({"message": "아이디 또는 비밀번호 오류"}), 401
+    try:
+        ok, new_hash = passwords.pool.verify(user['password'], user_pw)
+    except passwords.Busy as e:
+        return jsonify({"message": str(e)}), 503, {"Retry-After": "1"}
+
+    if ok:
+        if new_hash:
+            # 해시 방식이 바뀌었으면 새 해시로 교체 (그 사이 비밀번호가 바뀌었으면 건드리지 않음)
+            conn.execute("UPDATE users SET password=? WHERE id=? AND password=?", (new_hash, user_id, user['password']))
+            conn.commit()
+        sessions.profiles.put(user_id, user)
         profile_img = user['profile_image']
-        full_img_url = f"http://127.0.0.1:5000/uploads/{profile_img}" if profile_img else ""
+        full_img_url = f"http://127.0.0.1:5000/uploads/{profile_img}?size=256" if profile_img else ""
         
         user_info = {
             "name": user['name'], "nickname": user['nickname'], "role": user['role'],
             "email": user['email'], "phone": user['phone'], "birthdate": user['birthdate'],
             "profile_image": full_img_url
         }
-        return jsonify({"message": "로그인 성공", "userInfo": user_info}), 200
+        return jsonify({"message": "로그인 성공", "userInfo": user_info, "token": sessions.issue(user_id)}), 200
     return jsonify({"message": "아이디 또는 비밀번호 오류"}), 401
 
-@app.route('/api/user/update', methods=['POST'])
+@main_bp.route('/api/session/refresh', methods=['POST'])
+def refresh_session():
+    # 유효한 토큰이면 새 토큰 발급 (만료된 토큰은 before_request 에서 401) → 결제 창을 열기 전에 확인
+    user_id = sessions.current_user_id()
+    if not user_id:
+        return jsonify({"success": False, "message": "토큰이 필요합니다."}), 400
+    return jsonify({"success": True, "token": sessions.issue(user_id)})
+
+@main_bp.route('/api/user/update', methods=['POST'])
 def update_user_info():
     try:
         data = request.get_json()
-        user_id = data.get('id')
+        user_id = sessions.current_user_id(data.get('id'))
         conn = get_db_connection()
         
         sql = "UPDATE users SET name=?, nickname=?, email=?, phone=?, birthdate=? WHERE id=?"
         params = [data.get('name'), data.get('nickname'), data.get('email'), data.get('phone'), data.get('birthdate'), user_id]
         
         if data.get('new_password'):
-            hashed_pw = generate_password_hash(data.get('new_password'))
+            hashed_pw = passwords.pool.hash(data.get('new_password'))
             conn.execute("UPDATE users SET password=? WHERE id=?", (hashed_pw, user_id))
         
         conn.execute(sql, params)
         conn.commit()
-        conn.close()
+        sessions.profiles.invalidate(user_id)
         return jsonify({"success": True, "message": "수정되었습니다."})
+    except passwords.Busy as e:
+        return jsonify({"success": False, "message": str(e)}), 503
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-@app.route('/api/user/upload_image', methods=['POST'])
+@main_bp.route('/api/auth/stats', methods=['GET'])
+def auth_stats():
+    return jsonify({**passwords.pool.stats(), "profiles": sessions.profiles.stats()})
+
+@main_bp.route('/api/user/upload_image', methods=['POST'])
 def upload_image():
     try:
         file = request.files.get('file')
-        user_id = request.form.get('user_id')
+        user_id = sessions.current_user_id(request.form.get('user_id'))
         if not file or not user_id: return jsonify({"success": False}), 400
         
-        filename = secure_filename(file.filename)
-        save_name = f"{user_id}_{filename}"
-        file.save(os.path.join(app.config['UPLOAD_FOLDER'], save_name))
-        
+        # 내용 해시로 저장 (같은 이미지는 한 번만 저장, 참조 카운트는 트리거가 관리)
         conn = get_db_connection()
+        save_name = upload_store.put(conn, file.stream)
         conn.execute("UPDATE users SET profile_image=? WHERE id=?", (save_name, user_id))
         conn.commit()
-        conn.close()
+        sessions.profiles.invalidate(user_id)
         return jsonify({"success": True, "url": f"http://127.0.0.1:5000/uploads/{save_name}"})
+    except upload_store.UnsupportedImage as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -235,69 +440,143 @@ def upload_image():
 # =========================================================
 
 # 제품 목록 조회
-@app.route('/api/products', methods=['GET'])
+@main_bp.route('/api/products', methods=['GET'])
 def get_products():
     conn = get_db_connection()
     rows = conn.execute("SELECT * FROM products").fetchall()
-    conn.close()
     return jsonify([dict(row) for row in rows])
 
 # 재고 수정 (WinForms)
-@app.route('/api/product/update_stock', methods=['POST'])
+@main_bp.route('/api/product/update_stock', methods=['POST'])
 def update_stock():
     try:
         data = request.get_json()
         conn = get_db_connection()
+        if 'delta' in data:
+            # 상대값: 읽고-쓰기 사이에 다른 요청이 끼어도 값을 잃지 않음 (0 미만이면 거절)
+            row = conn.execute("UPDATE products SET stock = stock + ? WHERE item_code = ? AND stock + ? >= 0 RETURNING stock",
+                               (int(data['delta']), data['item_code'], int(data['delta']))).fetchone()
+            conn.commit()
+            if row is None:
+                return jsonify({"success": False, "message": "없는 품목이거나 재고가 부족합니다."}), 409
+            return jsonify({"success": True, "stock": row[0]})
         conn.execute("UPDATE products SET stock = ? WHERE item_code = ?", (data['new_stock'], data['item_code']))
         conn.commit()
-        conn.close()
         return jsonify({"success": True})
     except Exception as e: return jsonify({"success": False, "message": str(e)}), 500
 
 # 제품 추가 (WinForms)
-@app.route('/api/product/add', methods=['POST'])
+@main_bp.route('/api/product/add', methods=['POST'])
 def add_product():
     try:
         d = request.get_json()
+        # WinForms 는 product_name 을 보내지 않으므로 브랜드/분류/색상/사이즈로 만듭니다.
+        name = d.get('product_name') or " ".join(str(d[k]) for k in ('brand', 'category', 'color', 'size') if d.get(k))
         conn = get_db_connection()
         conn.execute("INSERT INTO products (item_code, product_name, brand, category, color, size, stock) VALUES (?,?,?,?,?,?,?)", 
-                     (d['item_code'], d['item_code'], d['brand'], d['category'], d['color'], d['size'], d.get('stock',0)))
+                     (d['item_code'], name, d['brand'], d['category'], d['color'], d['size'], d.get('stock',0)))
         conn.commit()
-        conn.close()
         return jsonify({"success": True})
+    except sqlite3.IntegrityError:
+        return jsonify({"success": False, "message": "이미 등록된 품목 코드입니다."}), 409
     except Exception as e: return jsonify({"success": False, "message": str(e)}), 500
 
 # 제품 삭제 (WinForms)
-@app.route('/api/product/delete', methods=['POST'])
+@main_bp.route('/api/product/delete', methods=['POST'])
 def delete_product():
     try:
         conn = get_db_connection()
         conn.execute("DELETE FROM products WHERE item_code = ?", (request.get_json()['item_code'],))
         conn.commit()
-        conn.close()
         return jsonify({"success": True})
     except Exception as e: return jsonify({"success": False, "message": str(e)}), 500
 
+# ---------------------------------------------------------
+# 주문 목록 공통 처리 (페이지네이션 / 변경분 / ETag)
+#   - 파라미터 없음         : 전체 목록 (기존과 동일한 배열)
+#   - limit[, after_id]     : id 내림차순 keyset 페이지. 다음 페이지는 X-Next-After-Id 헤더
+#   - updated_after=<시각>  : 그 이후 등록/수정된 주문 (updated_at 오름차순 배열)
+#   - since_version=<v>     : 변경 피드 version 이후 바뀐 주문 + 삭제된 id
+#                             {"version", "orders", "deleted", "reset"}
+#   - 모든 응답에 ETag / X-Orders-Version. If-None-Match 가 같으면 304
+# ---------------------------------------------------------
+ORDER_PAGE_MAX = 1000
+
+def _list_orders(contact=None):
+    conn = get_db_connection()
+    version = events.current_version(conn, 'orders')
+    etag = "orders-%d-%s" % (version, hashlib.md5(repr((contact, sorted(request.args.items()))).encode()).hexdigest()[:12])
+    if etag in request.if_none_match:
+        res = Response(status=304)
+    else:
+        res = _query_orders(conn, contact, version)
+    res.set_etag(etag)
+    res.headers['X-Orders-Version'] = str(version)
+    return res
+
+def _query_orders(conn, contact, version):
+    where, params = ("WHERE contact = ?", [contact]) if contact is not None else ("", [])
+    limit = request.args.get('limit', type=int)
+    limit = min(max(limit, 1), ORDER_PAGE_MAX) if limit else None
+
+    since = request.args.get('since_version', type=int)
+    if since is not None:
+        return _order_changes(conn, contact, since, version)
+
+    updated_after = request.args.get('updated_after')
+    if updated_after:
+        sql = f"SELECT * FROM orders {where} {'AND' if where else 'WHERE'} updated_at > ? ORDER BY updated_at LIMIT ?"
+        rows = conn.execute(sql, params + [updated_after, limit or -1]).fetchall()
+        return jsonify([dict(row) for row in rows])
+
+    after_id = request.args.get('after_id', type=int)
+    if after_id is not None:
+        where = f"{where} {'AND' if where else 'WHERE'} id < ?"
+        params.append(after_id)
+    rows = conn.execute(f"SELECT * FROM orders {where} ORDER BY id DESC LIMIT ?", params + [limit or -1]).fetchall()
+    res = jsonify([dict(row) for row in rows])
+    if limit and len(rows) == limit:
+        res.headers['X-Next-After-Id'] = str(rows[-1]['id'])
+    return res
+
+def _order_changes(conn, contact, since, version):
+    # since 이후 정리된 구간이 있으면 클라이언트가 전체를 다시 받아야 함
+    if since < events.oldest_version(conn) - 1 or since > version:
+        return jsonify({"version": version, "orders": [], "deleted": [], "reset": True})
+
+    sql = "SELECT DISTINCT row_key FROM change_log WHERE topic = 'orders' AND version > ? AND version <= ?"
+    params = [since, version]
+    if contact is not None:
+        sql += " AND json_extract(data, '$.contact') = ?"
+        params.append(contact)
+    ids = [int(r[0]) for r in conn.execute(sql, params)]
+
+    rows = []
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        rows += conn.execute(f"SELECT * FROM orders WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id DESC", chunk).fetchall()
+    alive = {row['id'] for row in rows if contact is None or row['contact'] == contact}
+    return jsonify({
+        "version": version,
+        "orders": [dict(row) for row in rows if row['id'] in alive],
+        "deleted": [i for i in ids if i not in alive],
+        "reset": False,
+    })
+
 # 주문 목록 조회 (WinForms - 전체 조회)
-@app.route('/api/orders', methods=['GET'])
+@main_bp.route('/api/orders', methods=['GET'])
 def get_orders():
-    conn = get_db_connection()
-    rows = conn.execute("SELECT * FROM orders ORDER BY id DESC").fetchall()
-    conn.close()
-    return jsonify([dict(row) for row in rows])
+    return _list_orders()
 
 # 내 주문 내역 조회 (Web - 로그인 사용자용)
-@app.route('/api/order/my_list', methods=['GET'])
+@main_bp.route('/api/order/my_list', methods=['GET'])
 def get_my_orders():
-    user_id = request.args.get('user_id')
+    user_id = sessions.current_user_id(request.args.get('user_id'))
     if not user_id: return jsonify([])
-    conn = get_db_connection()
-    rows = conn.execute("SELECT * FROM orders WHERE contact = ? ORDER BY id DESC", (user_id,)).fetchall()
-    conn.close()
-    return jsonify([dict(row) for row in rows])
+    return _list_orders(contact=user_id)
 
 # 주문 등록 (Web/WinForms 공용)
-@app.route('/api/order/add', methods=['POST'])
+@main_bp.route('/api/order/add', methods=['POST'])
 def add_order():
     try:
         d = request.get_json()
@@ -305,108 +584,203 @@ def add_order():
         conn.execute("INSERT INTO orders (company, item_name, quantity, order_date, due_date, status, contact, price, note) VALUES (?,?,?,?,?,?,?,?,?)",
                      (d['company'], d['item_name'], d.get('quantity',1), d.get('order_date',''), d.get('due_date',''), '대기중', d.get('contact',''), d.get('price',0), d.get('note','')))
         conn.commit()
-        conn.close()
         return jsonify({"success": True})
     except Exception as e: return jsonify({"success": False, "message": str(e)}), 500
 
 
 # =========================================================
-# [수정] 결제 완료 처리 (강력한 예외 처리 적용)
+# [수정] 결제 완료 처리 (하나의 트랜잭션으로 재고 예약 + 주문 일괄 등록)
 # =========================================================
-@app.route('/api/payment/complete', methods=['POST'])
+# - item_code 가 있는 품목은 products 재고를 조건부(stock >= 수량)로 차감합니다.
+#   한 품목이라도 부족하면 장바구니 전체를 거절하고 품목별 사유를 돌려줍니다.
+# - item_code 가 없는 품목(네이버 검색 상품 등)은 재고 없이 주문만 등록합니다.
+# - idempotency_key (또는 Idempotency-Key 헤더)가 같은 재요청은 처음 응답을 그대로 돌려줍니다.
+# - 이 API 는 포트원 결제가 끝난 뒤에 불리므로, cart.html 은 결제 창을 열기 전에 /api/payment/check 로
+#   재고를 먼저 확인합니다. 그 사이 재고가 바뀌어 거절되면 checkout_requests 에
+#   status='refund_required' (imp_uid, 금액 포함) 로 남기고 환불 안내를 돌려줍니다. (GET /api/payment/refunds)
+
+class CheckoutRejected(Exception):
+    def __init__(self, lines):
+        super().__init__("재고가 부족한 상품이 있습니다.")
+        self.lines = lines
+
+def _checkout_lines(items):
+    lines = []
+    for idx, item in enumerate(items):
+        # 품목명: product_name → name → item_name 순으로 확인
+        p_name = item.get('product_name') or item.get('name') or item.get('item_name')
+        lines.append({
+            "index": idx,
+            "item_code": item.get('item_code') or None,
+            "name": p_name,
+            "brand": item.get('brand'),
+            "qty": int(item.get('quantity', 1)),
+            "price": int(item.get('price', 0)),
+        })
+    return lines
+
+def _check_stock(conn, lines):
+    """재고를 확인만 합니다. 부족하면 CheckoutRejected, 괜찮으면 (품목 정보, 품목별 필요 수량)"""
+    # 1. 품목 코드를 한 번에 조회
+    codes = sorted({l['item_code'] for l in lines if l['item_code']})
+    products = {}
+    if codes:
+        rows = conn.execute(f"SELECT item_code, product_name, brand, stock FROM products WHERE item_code IN ({','.join('?' * len(codes))})", codes).fetchall()
+        products = {r['item_code']: r for r in rows}
+
+    # 2. 같은 품목이 여러 줄이면 합쳐서 재고 확인
+    need = {}
+    for l in lines:
+        if l['item_code']:
+            need[l['item_code']] = need.get(l['item_code'], 0) + l['qty']
+
+    rejected = []
+    for l in lines:
+        code = l['item_code']
+        if l['qty'] <= 0:
+            rejected.append({"index": l['index'], "item_code": code, "reason": "수량이 올바르지 않습니다."})
+        elif code and code not in products:
+            rejected.append({"index": l['index'], "item_code": code, "reason": "존재하지 않는 상품입니다."})
+        elif code and products[code]['stock'] < need[code]:
+            rejected.append({"index": l['index'], "item_code": code, "requested": need[code],
+                             "available": products[code]['stock'], "reason": "재고가 부족합니다."})
+    if rejected:
+        raise CheckoutRejected(rejected)
+    return products, need
+
+def _reserve_stock(conn, lines):
+    products, need = _check_stock(conn, lines)
+
+    # 3. 조건부 차감 (BEGIN IMMEDIATE 안이므로 위 확인 이후 재고가 바뀌지 않음)
+    cur = conn.executemany("UPDATE products SET stock = stock - ? WHERE item_code = ? AND stock >= ?",
+                           [(qty, code, qty) for code, qty in need.items()])
+    if cur.rowcount != len(need):
+        raise CheckoutRejected([{"item_code": code, "reason": "재고가 부족합니다."} for code in need])
+
+    for l in lines:
+        p = products.get(l['item_code'])
+        l['name'] = l['name'] or (p['product_name'] if p else None) or '상품명 없음'
+        l['brand'] = l['brand'] or (p['brand'] if p else None) or 'MobleStore'
+
+REFUND_MESSAGE = "재고가 부족해 주문을 만들지 못했습니다. 결제 금액은 환불됩니다."
+
+def _record_refund(conn, idem_key, user_id, imp_uid, amount, lines):
+    """결제는 됐지만 거절한 요청을 환불 대상으로 남기고 응답 본문을 돌려줍니다."""
+    result = {"success": False, "refund": True, "message": REFUND_MESSAGE, "lines": lines}
+    with db.immediate(conn):
+        conn.execute("""INSERT OR IGNORE INTO checkout_requests (idempotency_key, user_id, response, status, imp_uid, amount)
+                        VALUES (?, ?, ?, 'refund_required', ?, ?)""",
+                     (idem_key or f"refund-{imp_uid or time.time_ns()}", user_id,
+                      json.dumps(result, ensure_ascii=False), imp_uid, amount))
+    return result
+
+# 결제 창을 열기 전 재고 확인 (예약하지 않음)
+@main_bp.route('/api/payment/check', methods=['POST'])
+def check_payment():
+    items = (request.get_json(silent=True) or {}).get('items')
+    if not items:
+        return jsonify({"success": False, "message": "상품 정보가 없습니다."}), 400
+    try:
+        _check_stock(get_db_connection(), _checkout_lines(items))
+    except CheckoutRejected as e:
+        return jsonify({"success": False, "message": str(e), "lines": e.lines}), 409
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "상품 정보가 올바르지 않습니다."}), 400
+    return jsonify({"success": True})
+
+@main_bp.route('/api/payment/complete', methods=['POST'])
 def complete_payment():
     try:
         data = request.get_json()
-        print("결제 요청 데이터:", data) # (디버깅용) 터미널에 찍어봅니다.
 
-        user_id = data.get('user_id')
+        user_id = sessions.current_user_id(data.get('user_id'))
         items = data.get('items')
-        
+        idem_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
         if not items: 
             return jsonify({"success": False, "message": "상품 정보가 없습니다."}), 400
 
+        lines = _checkout_lines(items)
         conn = get_db_connection()
         
-        # 1. 연락처 조회 (없으면 아이디 사용)
-        user_row = conn.execute("SELECT phone FROM users WHERE id = ?", (user_id,)).fetchone()
-        user_contact = user_row['phone'] if user_row and user_row['phone'] else user_id
-
-        for item in items:
-            # 2. [핵심] 품목명 찾기 (가능한 모든 이름표를 다 확인합니다)
-            # product_name이 있으면 쓰고, 없으면 name, 그것도 없으면 item_name을 찾음
-            p_name = item.get('product_name') or item.get('name') or item.get('item_name') or '상품명 없음'
-
-            # 3. [핵심] 브랜드명 찾기 (없으면 MobleStore)
-            brand = item.get('brand') or 'MobleStore'
-
-            # 4. 수량과 가격 (숫자로 변환해서 안전하게 저장)
-            qty = int(item.get('quantity', 1))
-            price = int(item.get('price', 0))
-
-            conn.execute("""
+        # 1. 연락처 (프로필 캐시, 없으면 아이디 사용)
+        profile = sessions.profiles.get(conn, user_id) if user_id else None
+        user_contact = profile['phone'] if profile and profile['phone'] else user_id
+
+        with db.immediate(conn):
+            # 2. 이미 처리한 재요청이면 처음 응답 그대로
+            if idem_key:
+                done = conn.execute("SELECT response, status FROM checkout_requests WHERE idempotency_key = ?", (idem_key,)).fetchone()
+                if done:
+                    return jsonify(json.loads(done['response'])), 409 if done['status'] == 'refund_required' else 200
+
+            # 3. 재고 예약 → 주문 일괄 등록
+            _reserve_stock(conn, lines)
+            conn.executemany("""
                 INSERT INTO orders 
                 (company, item_name, quantity, price, contact, status, order_date) 
                 VALUES (?, ?, ?, ?, ?, '결제완료', datetime('now', 'localtime'))
-            """, (brand, p_name, qty, price, user_contact))
-            
-        conn.commit()
-        conn.close()
+            """, [(l['brand'], l['name'], l['qty'], l['price'], user_contact) for l in lines])
+
+            result = {"success": True, "message": "주문이 완료되었습니다.", "count": len(lines)}
+            if idem_key:
+                conn.execute("INSERT INTO checkout_requests (idempotency_key, user_id, response) VALUES (?, ?, ?)",
+                             (idem_key, user_id, json.dumps(result, ensure_ascii=False)))
         
-        return jsonify({"success": True, "message": "주문이 완료되었습니다."})
+        return jsonify(result)
 
+    except CheckoutRejected as e:
+        # 카드는 이미 결제됨 → 주문 대신 환불 대상으로 기록
+        return jsonify(_record_refund(conn, idem_key, user_id, data.get('imp_uid'), data.get('amount'), e.lines)), 409
     except Exception as e:
-        print("결제 처리 중 에러:", e) # 터미널에서 에러 내용을 볼 수 있습니다.
         return jsonify({"success": False, "message": str(e)}), 500
+
+# 환불이 필요한 결제 목록 (관리자 확인용)
+@main_bp.route('/api/payment/refunds', methods=['GET'])
+def list_refunds():
+    rows = get_db_connection().execute("""SELECT idempotency_key, user_id, imp_uid, amount, created_at FROM checkout_requests
+                                          WHERE status = 'refund_required' ORDER BY created_at""").fetchall()
+    return jsonify([dict(r) for r in rows])
     
 # 주문 상태 변경 (WinForms)
-@app.route('/api/order/update_status', methods=['POST'])
+@main_bp.route('/api/order/update_status', methods=['POST'])
 def update_order_status():
     d = request.get_json()
     conn = get_db_connection()
     conn.execute("UPDATE orders SET status = ? WHERE id = ?", (d.get('status'), d.get('id')))
     conn.commit()
-    conn.close()
     return jsonify({"success": True})
 
 # 슬롯 조회 (WinForms)
-@app.route('/api/slots', methods=['GET'])
+@main_bp.route('/api/slots', methods=['GET'])
 def get_slots():
     conn = get_db_connection()
     rows = conn.execute("SELECT * FROM slots").fetchall()
-    conn.close()
-    return jsonify([{"slot_id": r["slot_id"], "x": r["x"], "y": r["y"], "w": r["w"], "h": r["h"], "is_active": bool(r["is_active"])} for r in rows])
+    return jsonify([{"slot_id": r["slot_id"], "x": r["x"], "y": r["y"], "w": r["w"], "h": r["h"], "is_active": bool(r["is_active"]), "camera_id": r["camera_id"]} for r in rows])
 
 # 슬롯 저장 (WinForms)
-@app.route('/api/slots/save', methods=['POST'])
+@main_bp.route('/api/slots/save', methods=['POST'])
 def save_slot():
     try:
         d = request.get_json()
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cnt = cursor.execute("SELECT count(*) FROM slots WHERE slot_id = ?", (d['slot_id'],)).fetchone()[0]
-        active = 1 if d.get('is_active') else 0
-        if cnt > 0:
-            cursor.execute("UPDATE slots SET x=?, y=?, w=?, h=?, is_active=? WHERE slot_id=?", (d['x'], d['y'], d['w'], d['h'], active, d['slot_id']))
-        else:
-            cursor.execute("INSERT INTO slots (slot_id, x, y, w, h, is_active) VALUES (?,?,?,?,?,?)", (d['slot_id'], d['x'], d['y'], d['w'], d['h'], active))
+        conn.execute(slot_index.SLOT_UPSERT, slot_index.slot_row(d))
         conn.commit()
-        conn.close()
         return jsonify({'success': True})
     except Exception as e: return jsonify({'success': False, 'message': str(e)}), 500
 
 # 슬롯 삭제 (WinForms)
-@app.route('/api/slots/delete', methods=['POST'])
+@main_bp.route('/api/slots/delete', methods=['POST'])
 def delete_slot():
     try:
         conn = get_db_connection()
         conn.execute("DELETE FROM slots WHERE slot_id = ?", (request.get_json().get('slot_id'),))
         conn.commit()
-        conn.close()
         return jsonify({'success': True})
     except Exception as e: return jsonify({'success': False, 'message': str(e)}), 500
 
 # [수정됨] 주문 삭제 API
-@app.route('/api/order/delete', methods=['POST'])
+@main_bp.route('/api/order/delete', methods=['POST'])
 def delete_order():
     try:
         data = request.get_json()
@@ -419,7 +793,6 @@ def delete_order():
         conn.execute("DELETE FROM orders WHERE id = ?", (order_id,))
         
         conn.commit()
-        conn.close()
 
         return jsonify({'success': True, 'message': '삭제되었습니다.'})
 
@@ -427,4 +800,5 @@ def delete_order():
         return jsonify({'success': False, 'message': str(e)}), 500  
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # debug 리로더는 감시용 부모 프로세스와 실제 서버(WERKZEUG_RUN_MAIN=true) 두 개가 뜨므로 서버 쪽에서만 디스패처 시작
+    create_app(start_dispatcher=os.environ.get('WERKZEUG_RUN_MAIN') == 'true').run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
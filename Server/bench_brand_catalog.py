@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+from naver_stub import NaverStub
+
+# =========================================================
+# ▼ [벤치마크] 브랜드 페이지: 브라우저 병합 vs /api/catalog/brand
+# =========================================================
+# 사용법: python bench_brand_catalog.py [네이버 응답 지연 ms]   (기본: 80)
+# old : factory_index.html 예전 방식 — 검색 2~4건을 보내 전체 목록을 받고 브라우저에서 섞어 자름
+# new : /api/catalog/brand 한 번 — 서버가 검색을 동시에 보내 합치고 한 페이지(12개)만 돌려줌
+# 캐시 없는(cold) 첫 로드와 캐시된(warm) 로드의 지연 시간 / 요청 수 / 응답 크기를 비교하고,
+# seed 가 같으면 페이지를 넘겨도 중복·누락이 없는지 확인합니다.
+
+DELAY = (int(sys.argv[1]) if len(sys.argv) > 1 else 80) / 1000
+BRANDS = ["빈폴", "엄브로", "데상트", "퓨마"]
+CATEGORIES = ["상의", "하의", "아우터", "신발"]
+PAGE_SIZE = 12
+
+
+def old_urls(brand, category):
+    if category == "All":
+        return [f"/api/naver/search?query={brand} {cat}&display=100" for cat in CATEGORIES]
+    query = f"{brand} {category}"
+    return [f"/api/naver/search?query={query}&start=1&display=100", f"/api/naver/search?query={query}&start=101&display=100"]
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    stub = NaverStub(delay=DELAY).start()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'bench.db')
+        import appp
+        appp.NAVER_SHOP_URL = stub.url + "/v1/search/shop.json"
+        client = appp.app.test_client()
+        pages = [(b, c) for b in BRANDS for c in ["All"] + CATEGORIES]
+
+        def old_load(brand, category):
+            # 브라우저는 요청을 동시에 보냄
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                responses = list(pool.map(client.get, old_urls(brand, category)))
+            return len(responses), sum(len(r.get_data()) for r in responses)
+
+        def new_load(brand, category):
+            res = client.get(f"/api/catalog/brand?brand={brand}&category={category}&page_size={PAGE_SIZE}")
+            assert res.status_code == 200 and len(res.get_json()["items"]) == PAGE_SIZE
+            return 1, len(res.get_data())
+
+        rows = []
+        for name, load, caches in (("old", old_load, [appp.naver_search_cache]),
+                                   ("new", new_load, [appp.naver_search_cache, appp.catalog_cache])):
+            for cache in caches:
+                cache.clear()
+            for phase in ("cold", "warm"):
+                calls0 = stub.calls
+                t0 = time.perf_counter()
+                requests = size = 0
+                for b, c in pages:
+                    n, nbytes = load(b, c)
+                    requests += n
+                    size += nbytes
+                elapsed = time.perf_counter() - t0
+                rows.append((name, phase, elapsed / len(pages) * 1000, requests / len(pages),
+                             size / len(pages) / 1024, stub.calls - calls0))
+
+        print(f"{'mode':<5}{'phase':<6}{'ms/page':>9}{'req/page':>10}{'KB/page':>9}{'naver calls':>13}"
+              f"   ({len(pages)} brand/category pages, naver delay {DELAY * 1000:.0f} ms)")
+        for name, phase, ms, reqs, kb, calls in rows:
+            print(f"{name:<5}{phase:<6}{ms:>9.1f}{reqs:>10.1f}{kb:>9.1f}{calls:>13}")
+
+        # 같은 seed 로 페이지를 끝까지 넘기면 전체 목록이 중복 없이 한 번씩
+        seen, cursor, first = [], None, None
+        while True:
+            url = f"/api/catalog/brand?cursor={cursor}" if cursor else f"/api/catalog/brand?brand=빈폴&category=All&page_size={PAGE_SIZE}&seed=7"
+            data = client.get(url).get_json()
+            first = first or data
+            seen += [item["productId"] for item in data["items"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        again = client.get(f"/api/catalog/brand?brand=빈폴&category=All&page_size={PAGE_SIZE}&seed=7").get_json()
+        other = client.get(f"/api/catalog/brand?brand=빈폴&category=All&page_size={PAGE_SIZE}&seed=8").get_json()
+        assert len(seen) == len(set(seen)) == first["total"], "커서로 넘긴 페이지에 중복/누락이 있습니다."
+        assert again["items"] == first["items"] and other["items"] != first["items"]
+        print(f"\ncursor walk: {first['total_pages']} pages, {len(seen)} unique items, same seed → same order: OK")
+        print(f"catalog cache: {json.dumps(appp.catalog_cache.stats())}")
+    finally:
+        stub.stop()
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import logging
+import shutil
+import tempfile
+import threading
+import statistics
+import requests
+from werkzeug.serving import make_server
+
+import db
+import camera_relay
+from mjpeg_stub import MjpegStub, frame_seq
+
+# =========================================================
+# ▼ [벤치마크] MJPEG 중계: 업스트림 1개 → 시청자 N명
+# =========================================================
+# 사용법: python bench_camera_relay.py [빠른 시청자 수] [느린 시청자 수] [초]   (기본: 20 5 5)
+# 가짜 카메라(MjpegStub, 30fps)에 중계 서버를 붙이고 실제 HTTP 서버로 시청자를 붙입니다.
+#   - 카메라가 받은 연결 수가 1 인지
+#   - 빠른 시청자는 거의 모든 프레임을, 느린 시청자(?fps=5)는 중간 프레임을 건너뛰고 최신 프레임만 받는지
+#   - /camera/<id>/latest.jpg 지연 시간
+# 마지막으로 Content-Length 없는 스트림도 같은 프레임으로 파싱되는지 확인합니다.
+
+FAST = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+SLOW = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+FPS = 30
+
+
+def viewer(base, fps, stop, result):
+    seqs = []
+    with camera_relay.open_stream(f"{base}/camera/cam79/stream.mjpg" + (f"?fps={fps}" if fps else "")) as res:
+        for frame in camera_relay.iter_frames(res, camera_relay._boundary(res.getheader('Content-Type'))):
+            seqs.append(frame_seq(frame))
+            if stop.is_set():
+                break
+    result.append((fps, seqs))
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    cam = MjpegStub(fps=FPS).start()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'relay.db')
+        import appp
+        camera_relay.CAMERAS["cam79"] = cam.url + "/stream.mjpg"
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, appp.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        stop = threading.Event()
+        result = []
+        threads = [threading.Thread(target=viewer, args=(base, 5 if i >= FAST else 0, stop, result), daemon=True)
+                   for i in range(FAST + SLOW)]
+        for t in threads:
+            t.start()
+        time.sleep(SECONDS)
+
+        lat = []
+        for _ in range(100):
+            t0 = time.perf_counter()
+            res = requests.get(f"{base}/camera/cam79/latest.jpg", timeout=5)
+            lat.append((time.perf_counter() - t0) * 1000)
+            assert res.status_code == 200 and frame_seq(res.content) is not None
+        stop.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        fast = [len(s) for d, s in result if not d]
+        slow = [len(s) for d, s in result if d]
+        print(f"camera upstream connections: {cam.connections}  (viewers: {FAST + SLOW})")
+        print(f"camera frames sent: {cam.frames_sent} in ~{SECONDS:.0f}s")
+        print(f"fast viewers: median {statistics.median(fast)} frames, slow viewers: median {statistics.median(slow)} frames")
+        for d, s in result[:1] + [r for r in result if r[0]][:1]:
+            gaps = [b - a for a, b in zip(s, s[1:])]
+            print(f"  {'slow' if d else 'fast'} viewer seq gaps: max {max(gaps)}, all increasing: {all(g > 0 for g in gaps)}")
+        print(f"latest.jpg median {statistics.median(lat):.2f} ms")
+        print(f"relay stats: {camera_relay.get_feed('cam79').stats()}")
+        server.shutdown()
+
+        # Content-Length 없는 스트림 파싱
+        cam2 = MjpegStub(fps=100, content_length=False).start()
+        with camera_relay.open_stream(cam2.url + "/stream.mjpg") as res:
+            frames = []
+            for f in camera_relay.iter_frames(res, camera_relay._boundary(res.getheader('Content-Type'))):
+                frames.append(f)
+                if len(frames) == 20:
+                    break
+        assert [frame_seq(f) for f in frames] == list(range(20)) and all(f == cam2.frame(i) for i, f in enumerate(frames))
+        print("no Content-Length stream: 20 frames parsed byte-exact")
+        cam2.stop()
+    finally:
+        cam.stop()
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
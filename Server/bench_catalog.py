@@ -0,0 +1,148 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 상품 일괄 가져오기 / 재고 증감 / 내보내기
+# =========================================================
+# 사용법: python bench_catalog.py [SKU 수]   (기본: 100000)
+# 1) 한 줄씩 POST /api/product/add (WinForms 방식, 1000개만 재서 전체 시간 추정)
+# 2) POST /api/products/import 로 CSV, NDJSON 전체 (새로 넣기 / 같은 파일로 갱신)
+# 3) 잘못된 줄이 섞인 파일 → 오류 줄만 빠지고 나머지는 반영되는지
+# 4) 여러 스레드가 같은 품목에 delta 를 동시에 보내도 합계가 맞는지 (절대값 방식은 값을 잃음)
+# 5) GET /api/products/export 스트리밍 처리량
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+SINGLE = 1000
+THREADS = 8
+ADJUSTS = 200                 # 스레드당 요청 수
+BRANDS = ('Nike', 'Adidas', 'Puma', 'NewBalance', 'Converse')
+
+
+def sku(i):
+    return {"item_code": f"B{i:07d}", "product_name": f"벤치 상품 {i}", "brand": BRANDS[i % len(BRANDS)],
+            "category": "Shoes" if i % 2 else "Top", "color": ("Black", "White", "Red")[i % 3],
+            "size": str(240 + i % 8 * 5), "stock": i % 50}
+
+
+def as_csv(rows):
+    out = io.StringIO()
+    out.write("item_code,product_name,brand,category,color,size,stock\n")
+    for r in rows:
+        out.write(",".join(str(r[k]) for k in ("item_code", "product_name", "brand", "category", "color", "size", "stock")) + "\n")
+    return out.getvalue().encode('utf-8')
+
+
+def as_ndjson(rows):
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode('utf-8')
+
+
+def post_import(client, body, fmt):
+    t0 = time.perf_counter()
+    res = client.post(f'/api/products/import?format={fmt}', data=body, content_type='text/plain')
+    elapsed = time.perf_counter() - t0
+    assert res.status_code == 200, res.get_data(as_text=True)[:300]
+    return res.get_json(), elapsed
+
+
+def count(conn):
+    return conn.execute("SELECT count(*) FROM products WHERE item_code LIKE 'B%'").fetchone()[0]
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'catalog.db')
+        import appp
+        client = appp.create_app().test_client()
+        rows = [sku(i) for i in range(N)]
+        conn = db.connect()
+
+        # 1) 한 줄씩
+        t0 = time.perf_counter()
+        for r in rows[:SINGLE]:
+            assert client.post('/api/product/add', json=r).get_json()["success"]
+        single = time.perf_counter() - t0
+        print(f"/api/product/add x{SINGLE}: {single:.2f}s ({SINGLE / single:.0f} rows/s) "
+              f"→ {N} SKU 추정 {single / SINGLE * N:.1f}s")
+        conn.execute("DELETE FROM products WHERE item_code LIKE 'B%'")
+        conn.commit()
+
+        # 2) 일괄 가져오기
+        for fmt, body in (("csv", as_csv(rows)), ("ndjson", as_ndjson(rows))):
+            if fmt == "ndjson":
+                conn.execute("DELETE FROM products WHERE item_code LIKE 'B%'")
+                conn.commit()
+            report, elapsed = post_import(client, body, fmt)
+            assert report["applied"] == N and report["error_count"] == 0 and count(conn) == N
+            print(f"import {fmt:<6} new    {N} rows: {elapsed:.2f}s ({N / elapsed:,.0f} rows/s, {len(body) / 1e6:.1f} MB)")
+            report, elapsed = post_import(client, body, fmt)
+            assert report["applied"] == N
+            print(f"import {fmt:<6} update {N} rows: {elapsed:.2f}s ({N / elapsed:,.0f} rows/s)")
+
+        # 3) 잘못된 줄 섞기: 품목 코드 없음 / 재고 문자 / 새 품목인데 브랜드 없음
+        bad = [dict(r) for r in rows[:1000]]
+        bad[10]["item_code"] = ""
+        bad[20]["stock"] = "many"
+        report, _ = post_import(client, as_csv(bad) + b"BNEW0001,brandless,,,,,\n", "csv")
+        print(f"import with bad rows: applied {report['applied']}, errors {report['error_count']}: "
+              + "; ".join(f"line {e['line']}: {e['error']}" for e in report['errors']))
+        assert report["applied"] == 998 and report["error_count"] == 3
+
+        # 4) 동시 재고 증감
+        target = rows[0]["item_code"]
+        before = 10000              # 감소분이 0 아래로 내려가 거절되지 않도록
+        client.post('/api/product/update_stock', json={"item_code": target, "new_stock": before})
+
+        def worker(delta):
+            c = appp.app.test_client()
+            for _ in range(ADJUSTS):
+                assert c.post('/api/product/update_stock', json={"item_code": target, "delta": delta}).status_code == 200
+
+        deltas = [3 if i % 2 else -1 for i in range(THREADS)]
+        threads = [threading.Thread(target=worker, args=(d,)) for d in deltas]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        after = conn.execute("SELECT stock FROM products WHERE item_code = ?", (target,)).fetchone()[0]
+        expected = before + sum(deltas) * ADJUSTS
+        print(f"concurrent delta: {THREADS}x{ADJUSTS} requests in {elapsed:.2f}s, stock {before} → {after} "
+              f"(expected {expected}) {'OK' if after == expected else 'LOST UPDATES'}")
+        assert after == expected
+
+        adjust = [{"item_code": r["item_code"], "delta": -1} for r in rows[:N // 2]]
+        t0 = time.perf_counter()
+        report = client.post('/api/products/stock', json={"adjustments": adjust}).get_json()
+        elapsed = time.perf_counter() - t0
+        print(f"/api/products/stock {len(adjust)} rows: {elapsed:.2f}s, applied {report['applied']}, "
+              f"rejected {report['error_count']} (재고 0 인 품목)")
+
+        # 5) 내보내기
+        for fmt in ("csv", "ndjson"):
+            t0 = time.perf_counter()
+            res = client.get(f'/api/products/export?format={fmt}')
+            size = lines = 0
+            for chunk in res.response:
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+            res.close()
+            elapsed = time.perf_counter() - t0
+            print(f"export {fmt:<6}: {lines} lines, {size / 1e6:.1f} MB in {elapsed:.2f}s ({lines / elapsed:,.0f} rows/s)")
+        conn.close()
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
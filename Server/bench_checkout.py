@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+
+import db
+
+# =========================================================
+# ▼ [점검] 동시 결제 시 재고 초과 판매(oversell) 여부
+# =========================================================
+# 사용법: python bench_checkout.py [스레드 수]
+# 재고 1개인 PM-02-01-05 를 여러 스레드가 동시에 결제합니다.
+# 정확히 1건만 성공하고 재고는 0 이어야 합니다.
+# 이어서 같은 idempotency key 로 재전송해 주문이 중복 생성되지 않는지 확인합니다.
+
+N_THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+ITEM = 'PM-02-01-05'
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'checkout.db')
+        import appp
+        app = appp.app
+        conn = db.get_db_connection()
+        assert conn.execute("SELECT stock FROM products WHERE item_code = ?", (ITEM,)).fetchone()[0] == 1
+
+        barrier = threading.Barrier(N_THREADS)
+        results = []
+        lock = threading.Lock()
+
+        def buyer(i):
+            client = app.test_client()
+            barrier.wait()
+            res = client.post('/api/payment/complete', json={
+                "user_id": f"buyer{i}",
+                "items": [{"item_code": ITEM, "quantity": 1, "price": 49000},
+                          {"product_name": "네이버 상품", "brand": "Puma", "quantity": 1, "price": 1000}],
+            })
+            with lock:
+                results.append((res.status_code, res.get_json()))
+
+        threads = [threading.Thread(target=buyer, args=(i,)) for i in range(N_THREADS)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        ok = [r for r in results if r[0] == 200]
+        rejected = [r for r in results if r[0] == 409]
+        stock = conn.execute("SELECT stock FROM products WHERE item_code = ?", (ITEM,)).fetchone()[0]
+        orders = conn.execute("SELECT count(*) FROM orders WHERE status = '결제완료'").fetchone()[0]
+        conn.commit()
+        print(f"{N_THREADS} concurrent checkouts in {elapsed:.2f}s: success={len(ok)} rejected={len(rejected)} "
+              f"other={len(results) - len(ok) - len(rejected)}")
+        print(f"stock left={stock}, order lines={orders}")
+        if rejected:
+            print("reject reason:", rejected[0][1]['lines'])
+        assert len(ok) == 1 and len(rejected) == N_THREADS - 1 and stock == 0 and orders == 2
+
+        # 같은 idempotency key 재전송 → 처음 응답, 주문 추가 없음
+        client = app.test_client()
+        body = {"user_id": "retry", "idempotency_key": "ORD-1",
+                "items": [{"item_code": "BP-01-01-01", "quantity": 2, "price": 1000}]}
+        first = client.post('/api/payment/complete', json=body).get_json()
+        again = client.post('/api/payment/complete', json=body).get_json()
+        stock = conn.execute("SELECT stock FROM products WHERE item_code = 'BP-01-01-01'").fetchone()[0]
+        conn.commit()
+        print(f"idempotent retry: {first == again}, BP-01-01-01 stock={stock}")
+        assert first == again and stock == 8
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 요청마다 connect/close (기존) vs 풀 + WAL (현재)
+# =========================================================
+# 사용법: python bench_db.py [요청 수] [스레드 수]
+# 실제 mydatabase.db 는 건드리지 않고 임시 DB 에서 측정합니다.
+
+N_REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+N_THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+N_SEED_ORDERS = 500
+
+# 폴링(조회) 위주 + 일부 주문 등록 (WinForms 폴링 + 웹 결제 트래픽 흉내)
+MIX = ['/api/products', '/api/orders', '/api/products', '/api/orders', 'ADD']
+
+
+def seed(path):
+    db.DATABASE_FILE = path
+    import appp
+    app = appp.app  # 처음 접근할 때 앱 생성 + 마이그레이션(테이블/기초 데이터)
+    db.close_all()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")  # WAL 내용을 본 파일에 합쳐서 복사 가능하게
+    conn.executemany("INSERT INTO orders (company, item_name, quantity, status, contact, price) VALUES (?,?,?,?,?,?)",
+                     [('벤치', f'상품{i}', 1, '대기중', 'bench', 1000) for i in range(N_SEED_ORDERS)])
+    conn.commit()
+    conn.close()
+    return app
+
+
+def run(app, label):
+    counter = iter(range(N_REQUESTS))
+    lock = threading.Lock()
+    errors = [0]
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            path = MIX[i % len(MIX)]
+            if path == 'ADD':
+                res = client.post('/api/order/add', json={"company": "벤치", "item_name": "상품", "contact": "bench"})
+            else:
+                res = client.get(path)
+            if res.status_code != 200:
+                with lock:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(N_THREADS)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<28} {N_REQUESTS / elapsed:10.1f} req/s   ({elapsed:.2f}s, errors={errors[0]})")
+    return N_REQUESTS / elapsed
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        base = os.path.join(tmp, 'base.db')
+        app = seed(base)
+
+        legacy = os.path.join(tmp, 'legacy.db')
+        pooled = os.path.join(tmp, 'pooled.db')
+        shutil.copy(base, legacy)
+        shutil.copy(base, pooled)
+
+        # 1) 기존 방식: 풀 없음, 기본 저널(DELETE), PRAGMA 없음
+        pool_size, pragmas = db.POOL_SIZE, db.PRAGMAS
+        db.close_all()
+        db.DATABASE_FILE, db.POOL_SIZE, db.PRAGMAS = legacy, 0, []
+        before = run(app, "before (connect per request)")
+
+        # 2) 현재 방식: 풀 + WAL + PRAGMA
+        db.close_all()
+        db.DATABASE_FILE, db.POOL_SIZE, db.PRAGMAS = pooled, pool_size, pragmas
+        after = run(app, "after  (pooled + WAL)")
+
+        print(f"speedup: x{after / before:.2f}")
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
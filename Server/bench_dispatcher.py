@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+import db
+import command_queue
+import dispatcher
+from dispatcher import Dispatcher, LoopbackTransport
+
+# =========================================================
+# ▼ [벤치마크] 명령 디스패처 병합 효과 / 처리량 / 지연 시간
+# =========================================================
+# 사용법: python bench_dispatcher.py [주문 수] [제어 명령 수]
+# 실제 장치 대신 LoopbackTransport(응답 지연 20ms)를 사용합니다.
+#   1) 웹 주문을 command_queue 에 넣고 디스패처가 가져가 프레임으로 병합해 전송
+#   2) 아두이노카 수동 제어 명령(FORWARD/STOP/SPEED)을 연속으로 접수
+
+N_ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+N_CONTROLS = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+BRANDS = ["Descente", "Beanpole", "Umbro", "Puma"]
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'dispatch.db')
+        import appp
+        client = appp.app.test_client()
+        rnd = random.Random(1)
+
+        dispatcher.PUMP_INTERVAL = 0.05
+        transport = LoopbackTransport(latency=0.02)
+        d = Dispatcher(transport=transport, devices={
+            "car":  {"url": "", "rate": 20.0, "burst": 5, "window": 1},
+            "line": {"url": "", "rate": 5.0, "burst": 1, "window": 1},
+        }).start()
+
+        t0 = time.perf_counter()
+        for _ in range(N_ORDERS):
+            orders = [{"name": rnd.choice(BRANDS), "quantity": rnd.randint(1, 3)} for _ in range(rnd.randint(1, 3))]
+            res = client.post('/factory/api/process_order', json={"orders": orders, "user_id": "bench"})
+            assert res.status_code == 200
+        for _ in range(N_CONTROLS):
+            cmd = rnd.choice(["FORWARD", "STOP", "FORWARD", "STOP", "SPEED,150", "SPEED,200", "LEFT"])
+            d.submit("car", cmd)
+            time.sleep(0.001)
+
+        max_depth = 0
+        while d.depth() > 0 or sum(command_queue.counts(db.get_db_connection())["line"][s] for s in ("queued", "dispatched")):
+            max_depth = max(max_depth, d.depth())
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - t0
+        d.stop()
+
+        conn = db.get_db_connection()
+        counts = command_queue.counts(conn)["line"]
+        conn.commit()
+        sent = {dev: sum(1 for s in transport.sent if s[0] == dev) for dev in ("car", "line")}
+        print(f"orders={N_ORDERS} controls={N_CONTROLS} in {elapsed:.2f}s (max depth {max_depth})")
+        print(f"line : {N_ORDERS} orders -> {sent['line']} frames, queue={counts}")
+        print(f"car  : {N_CONTROLS} commands -> {sent['car']} sent")
+        for dev, st in d.stats().items():
+            lat = st["latency"]
+            mean = lat["sum"] / lat["count"] * 1000 if lat["count"] else 0
+            print(f"{dev:<5}: sent={st['sent']} failed={st['failed']} coalesced={st['coalesced']} mean latency={mean:.1f}ms")
+        assert counts["done"] == N_ORDERS
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import sys
+import time
+
+import http_client
+from naver_stub import NaverStub
+
+# =========================================================
+# ▼ [점검] 공용 HTTP 클라이언트: keep-alive / 타임아웃 / 차단기
+# =========================================================
+# 사용법: python bench_http_client.py [정상 호출 횟수]
+# 로컬 가짜 네이버 서버(naver_stub)를 상대로만 동작합니다.
+
+N_CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+
+def main():
+    healthy = NaverStub().start()
+    slow = NaverStub(delay=1.0).start()
+    try:
+        # 1) 정상 upstream: 연결 재사용 시 호출당 지연
+        url = healthy.url + "/v1/search/shop.json"
+        t0 = time.perf_counter()
+        for i in range(N_CALLS):
+            http_client.get("naver_search", url, params={"query": "빈폴", "start": 1, "display": 20})
+        elapsed = time.perf_counter() - t0
+        print(f"healthy : {N_CALLS} calls, {elapsed / N_CALLS * 1000:.2f} ms/call")
+
+        # 2) 느린 upstream: read 타임아웃 → 재시도 → 차단기 열림 → 즉시 실패
+        http_client.ENDPOINTS["slow"] = {"connect": 0.5, "read": 0.2, "retries": 1}
+        url = slow.url + "/v1/search/shop.json"
+        for i in range(http_client.BREAKER_THRESHOLD + 3):
+            t0 = time.perf_counter()
+            try:
+                http_client.get("slow", url, params={"query": "빈폴"})
+                result = "ok"
+            except http_client.CircuitOpenError:
+                result = "circuit open"
+            except Exception as e:
+                result = type(e).__name__
+            print(f"slow #{i + 1:<2}: {result:<14} {(time.perf_counter() - t0) * 1000:7.1f} ms")
+
+        st = http_client.stats()
+        print(f"slow    : breaker={st['slow']['breaker']} trips={st['slow']['breaker_trips']} "
+              f"rejected={st['slow']['rejected']} upstream calls={slow.calls}")
+        assert st['slow']['breaker'] == "open"
+        for name, s in st.items():
+            print(f"latency[{name}] : {s['latency']}")
+    finally:
+        healthy.stop()
+        slow.stop()
+
+
+if __name__ == '__main__':
+    main()
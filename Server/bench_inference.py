@@ -0,0 +1,134 @@
+import io
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import threading
+
+from PIL import Image, ImageDraw
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 서버 추론 파이프라인 (inference.py)
+# =========================================================
+# 사용법: python bench_inference.py [카메라 수] [카메라당 fps] [초]   (기본: 4 15 4)
+# 카메라마다 선반 사진(640x480, 일부 슬롯에 흰 상자)을 JPEG 으로 만들어 fps 에 맞춰 submit 합니다.
+# 검출기는 FakeDetector 에 호출당/이미지당 시간을 줘서 실제 모델처럼 배치가 클수록 이미지당 비용이 줄게 합니다.
+#   - max_batch 1 / 4 / 8, 디코딩 프로세스 풀 유무에 따른 fps, 평균 배치, 버린 프레임, 단계별 지연 시간
+#   - 끝난 뒤 occupancy.tracker 의 빈 슬롯이 그림과 같은지 확인
+#   - 검출기가 감당 못 하는 부하에서도 지연 시간이 늘지 않고 오래된 프레임을 버리는지
+
+CAMERAS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+FPS = float(sys.argv[2]) if len(sys.argv) > 2 else 15.0
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 4.0
+COLS, ROWS, CELL = 8, 6, 80      # 슬롯 격자 (FakeDetector grid=8, 입력 320 → 카메라 픽셀 80 칸과 맞춤)
+MODEL_COST = (0.015, 0.004)      # 검출기 호출당 / 이미지당 시간(초)
+
+
+def shelf_frame(occupied):
+    img = Image.new('RGB', (640, 480), (60, 120, 80))
+    draw = ImageDraw.Draw(img)
+    for c, r in occupied:
+        draw.rectangle([c * CELL + 8, r * CELL + 8, (c + 1) * CELL - 9, (r + 1) * CELL - 9], fill=(235, 235, 230))
+    out = io.BytesIO()
+    img.save(out, 'JPEG', quality=80)
+    return out.getvalue()
+
+
+def seed(conn, rng):
+    """카메라마다 슬롯 격자와 상자 위치 → {카메라: (JPEG, 빈 슬롯 목록)}"""
+    from occupancy import tracker
+    conn.execute("DELETE FROM slots")
+    scenes = {}
+    for k in range(CAMERAS):
+        cam = f"cam{k}"
+        cells = [(c, r) for c in range(COLS) for r in range(ROWS)]
+        occupied = set(rng.sample(cells, len(cells) // 3))
+        conn.executemany("INSERT INTO slots (slot_id, x, y, w, h, is_active, camera_id) VALUES (?, ?, ?, ?, ?, 1, ?)",
+                         [(f"{cam}-{c}-{r}", c * CELL, r * CELL, CELL, CELL, cam) for c, r in cells])
+        scenes[cam] = (shelf_frame(occupied), sorted(f"{cam}-{c}-{r}" for c, r in cells if (c, r) not in occupied))
+    conn.commit()
+    tracker.invalidate()   # 요청 밖에서 slots 를 바꿨으므로
+    return scenes
+
+
+def drive(pipeline, scenes, fps, seconds):
+    stop = threading.Event()
+
+    def camera(cam, jpeg):
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            pipeline.submit(cam, jpeg)
+            next_at += 1 / fps
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    threads = [threading.Thread(target=camera, args=(cam, jpeg)) for cam, (jpeg, _) in scenes.items()]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    time.sleep(0.3)   # 처리 중인 배치 마무리
+    return pipeline.stats()
+
+
+def row(label, st):
+    stage = lambda name, key: st["stages"][name][key] or 0.0
+    print(f"{label:<22}{st['received']:>6}{st['inferred']:>6}{st['dropped_stale'] + st['dropped_late']:>6}"
+          f"{st['inferred'] / SECONDS:>7.1f}{st['avg_batch'] or 0:>6.2f} |"
+          f"{stage('decode', 'p50_ms'):>7.1f}{stage('queue', 'p50_ms'):>7.1f}{stage('infer', 'p50_ms'):>7.1f}"
+          f"{stage('ingest', 'p50_ms'):>7.1f} |{stage('total', 'p50_ms'):>7.1f}{stage('total', 'p95_ms'):>7.1f}")
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'inference.db')
+        import appp
+        import inference
+        from occupancy import tracker
+        appp.app.test_client().get('/api/slots/empty')   # 마이그레이션
+        conn = db.connect()
+        scenes = seed(conn, random.Random(3))
+        print(f"{CAMERAS} cameras x {FPS:.0f} fps for {SECONDS:.0f}s, {COLS * ROWS} slots per camera, "
+              f"model {MODEL_COST[0] * 1000:.0f} ms/call + {MODEL_COST[1] * 1000:.0f} ms/image, "
+              f"{os.cpu_count()} CPU\n")
+        print(f"{'':<22}{'recv':>6}{'infer':>6}{'drop':>6}{'fps':>7}{'batch':>6} |"
+              f"{'decode':>7}{'queue':>7}{'infer':>7}{'ingest':>7} |{'p50':>7}{'p95':>7}  (ms)")
+
+        runs = [("batch 1, pool", dict(max_batch=1)),
+                ("batch 4, pool", dict(max_batch=4)),
+                ("batch 8, pool", dict(max_batch=8)),
+                ("batch 8, no pool", dict(max_batch=8, workers=0))]
+        for label, kwargs in runs:
+            detector = inference.FakeDetector(grid=8, batch_cost=MODEL_COST[0], image_cost=MODEL_COST[1])
+            pipeline = inference.InferencePipeline(detector, **kwargs).start()
+            try:
+                row(label, drive(pipeline, scenes, FPS, SECONDS))
+            finally:
+                pipeline.stop()
+
+        wrong = {cam: empty for cam, (_, empty) in scenes.items() if tracker.empty_slots(conn, cam) != empty}
+        print(f"\noccupancy matches the frames on {CAMERAS - len(wrong)}/{CAMERAS} cameras")
+        assert not wrong, f"빈 슬롯이 그림과 다릅니다: {sorted(wrong)}"
+
+        # 과부하: 검출기가 이미지당 40ms → 감당 가능한 fps 보다 많이 들어와도 지연 시간은 그대로, 남는 프레임은 버림
+        detector = inference.FakeDetector(grid=8, batch_cost=MODEL_COST[0], image_cost=0.04)
+        pipeline = inference.InferencePipeline(detector).start()
+        try:
+            print()
+            row("overload (40 ms/image)", drive(pipeline, scenes, FPS * 2, SECONDS))
+        finally:
+            pipeline.stop()
+        conn.close()
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
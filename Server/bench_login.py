@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import statistics
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 로그인 폭주 중 /api/products 지연 시간
+# =========================================================
+# 사용법: python bench_login.py [로그인 스레드 수] [초]   (기본: 16 5)
+# second.cs 화면에서 로그인이 몰리는 상황을 흉내 내면서 /api/products 를 계속 호출합니다.
+#   inline : 요청 스레드에서 해시 계산 (passwords.POOL_SIZE = 0, 기존 방식)
+#   pool   : 프로세스 풀 + 대기 상한
+# 끝으로 옛 방식(pbkdf2) 해시가 로그인 때 재해시되는지, 시도 제한(429)이 걸리는지 확인합니다.
+
+STORM = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+USERS = 20
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(app, passwords, pool):
+    stop = threading.Event()
+    codes = {}
+    lock = threading.Lock()
+
+    def login_storm(i):
+        client = app.test_client()
+        n = 0
+        while not stop.is_set():
+            res = client.post('/api/login', json={"id": f"user{(i + n) % USERS}", "pw": "pw1234"})
+            n += 1
+            with lock:
+                codes[res.status_code] = codes.get(res.status_code, 0) + 1
+
+    passwords.pool = pool
+    client = app.test_client()
+    quiet = []
+    for _ in range(200):
+        t0 = time.perf_counter()
+        client.get('/api/products')
+        quiet.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=login_storm, args=(i,), daemon=True) for i in range(STORM)]
+    for t in threads:
+        t.start()
+    busy = []
+    deadline = time.monotonic() + SECONDS
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        client.get('/api/products')
+        busy.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.01)
+    stop.set()
+    for t in threads:
+        t.join()
+    return quiet, busy, codes
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'login.db')
+        import appp
+        import passwords
+        app = appp.app
+        client = app.test_client()
+        for i in range(USERS):
+            assert client.post('/api/register', json={"id": f"user{i}", "pw": "pw1234", "name": f"직원{i}"}).status_code == 201
+
+        # 폭주 구간에서는 시도 제한을 끔 (test_client 는 모두 같은 IP)
+        limits = passwords.user_buckets, passwords.ip_buckets
+        passwords.user_buckets = passwords.ip_buckets = passwords.TokenBucket(10 ** 9, 10 ** 9)
+
+        print(f"{STORM} login threads for {SECONDS:.0f}s, CPUs: {os.cpu_count()}")
+        print(f"{'mode':<8}{'products p50':>14}{'p95':>9}{'p99':>9}{'  (quiet p50)':>14}   login results")
+        for name, pool in (("inline", passwords.HashPool(size=0)), ("pool", passwords.HashPool())):
+            quiet, busy, codes = run(app, passwords, pool)
+            print(f"{name:<8}{statistics.median(busy):>12.2f}ms{percentile(busy, 0.95):>7.2f}ms"
+                  f"{percentile(busy, 0.99):>7.2f}ms{statistics.median(quiet):>12.2f}ms   {dict(sorted(codes.items()))}")
+            pool.shutdown()
+
+        passwords.pool = passwords.HashPool()
+        passwords.user_buckets, passwords.ip_buckets = limits
+
+        # 옛 해시(pbkdf2) → 로그인 성공 시 METHOD 로 재해시
+        from werkzeug.security import generate_password_hash
+        conn = db.get_db_connection()
+        conn.execute("INSERT INTO users (id, password, name) VALUES ('legacy', ?, '옛 사용자')",
+                     (generate_password_hash("pw1234", method="pbkdf2:sha256:600000"),))
+        conn.commit()
+        assert client.post('/api/login', json={"id": "legacy", "pw": "pw1234"}).status_code == 200
+        stored = conn.execute("SELECT password FROM users WHERE id = 'legacy'").fetchone()[0]
+        assert not passwords.needs_rehash(stored)
+        assert client.post('/api/login', json={"id": "legacy", "pw": "pw1234"}).status_code == 200
+        print(f"\nlegacy pbkdf2 hash rehashed to {stored.split('$')[0]}")
+
+        # 같은 아이디로 계속 틀리면 429
+        results = [client.post('/api/login', json={"id": "user1", "pw": "wrong"}).status_code for _ in range(8)]
+        print(f"wrong password x8 on one id: {results}")
+        assert results[0] == 401 and results[-1] == 429
+        passwords.pool.shutdown()
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
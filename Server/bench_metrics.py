@@ -0,0 +1,91 @@
+import os
+import re
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 계측 오버헤드 + WinForms 폴링 엔드포인트별 비용
+# =========================================================
+# 사용법: python bench_metrics.py [반복 횟수]   (기본: 1000)
+# 1) 계측을 끈 앱 / 켠 앱에서 GET /api/products 중앙값을 비교합니다. (db.TIMING, metrics.init_app)
+# 2) WinForms 화면들이 주기적으로 부르는 엔드포인트를 섞어 호출한 뒤
+#    /metrics 에서 라우트별 총 시간 / DB 시간 / 응답 크기를 뽑아 비용 순으로 보여 줍니다.
+
+REPEAT = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+# WinForms(last_project/*.cs) 가 부르는 조회 엔드포인트 + 웹 주문 조회
+POLLING = ['/api/products', '/api/orders', '/api/slots', '/api/slots/empty', '/api/stats',
+           '/api/order/my_list?user_id=010-0001', '/factory/api/get_orders']
+N_ORDERS = 5000
+
+
+def median_us(client, url, n):
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        client.get(url)
+        times.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(times)
+
+
+def metric_sums(text, name):
+    out = {}
+    for m in re.finditer(rf'^{name}_sum{{method="GET",route="([^"]+)"}} (\S+)$', text, re.M):
+        out[m.group(1)] = float(m.group(2))
+    return out
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'metrics.db')
+        import appp
+        import metrics
+        with appp.create_app().app_context():
+            conn = db.get_db_connection()
+            conn.executemany("INSERT INTO orders (company, item_name, quantity, status, contact, price) VALUES (?,?,?,?,?,?)",
+                             [('벤치', f'상품{i % 300}', 1, '대기중', f'010-{i % 500:04d}', 1000) for i in range(N_ORDERS)])
+            conn.commit()
+
+        # 1) 오버헤드: 계측 없는 앱 vs 있는 앱
+        init_app = metrics.init_app
+        metrics.init_app = lambda app: app.register_blueprint(metrics.metrics_bp)
+        db.TIMING = False
+        db.close_all()
+        plain = appp.create_app().test_client()
+        off = median_us(plain, '/api/products', REPEAT)
+        metrics.init_app = init_app
+        db.TIMING = True
+        db.close_all()
+        client = appp.create_app().test_client()
+        on = median_us(client, '/api/products', REPEAT)
+        print(f"GET /api/products median: {off:.0f} us without metrics, {on:.0f} us with metrics "
+              f"(+{on - off:.0f} us)")
+
+        # 2) 폴링 엔드포인트 비용
+        metrics.reset()
+        for _ in range(REPEAT // 10):
+            for url in POLLING:
+                client.get(url)
+        text = client.get('/metrics').get_data(as_text=True)
+        total = metric_sums(text, "http_request_duration_seconds")
+        db_time = metric_sums(text, "http_request_db_seconds")
+        size = metric_sums(text, "http_response_size_bytes")
+        print(f"\n{'route':<28}{'total s':>9}{'db s':>8}{'db %':>7}{'KB/req':>9}")
+        n = REPEAT // 10
+        for route in sorted(total, key=total.get, reverse=True):
+            if route.startswith('/metrics'):
+                continue
+            share = db_time.get(route, 0) / total[route] * 100 if total[route] else 0
+            print(f"{route:<28}{total[route]:>9.3f}{db_time.get(route, 0):>8.3f}{share:>6.0f}%{size.get(route, 0) / n / 1024:>9.1f}")
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
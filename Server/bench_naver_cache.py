@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+from naver_stub import NaverStub
+
+# =========================================================
+# ▼ [점검] 브랜드 페이지 반복 로드 시 네이버 호출 수 확인
+# =========================================================
+# 사용법: python bench_naver_cache.py [페이지 로드 횟수]
+# factory_index.html 과 같은 방식으로 요청을 동시에 보냅니다.
+#   - '전체' 카테고리: 상의/하의/아우터/신발 4건
+#   - 그 외 카테고리: start=1, start=101 2건
+
+N_LOADS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+BRANDS = ["빈폴", "엄브로", "데상트", "퓨마"]
+CATEGORIES = ["상의", "하의", "아우터", "신발"]
+
+
+def brand_page_urls(brand, category):
+    if category == "전체":
+        return [f"/api/naver/search?query={brand} {cat}" for cat in CATEGORIES]
+    query = f"{brand} {category}"
+    return [f"/api/naver/search?query={query}&start=1", f"/api/naver/search?query={query}&start=101"]
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    stub = NaverStub(delay=0.05).start()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'bench.db')
+        import appp
+        appp.NAVER_SHOP_URL = stub.url + "/v1/search/shop.json"
+        client = appp.app.test_client()
+
+        def load(url):
+            res = client.get(url)
+            assert res.status_code == 200 and res.get_json(), url
+
+        pages = [(b, c) for b in BRANDS for c in ["전체"] + CATEGORIES]
+        # '전체'의 '빈폴 상의' 와 '상의' 카테고리의 start=1 은 같은 키
+        unique = len({appp._naver_search_key(q['query'][0], int(q.get('start', ['1'])[0]), 20, 'sim')
+                      for b, c in pages for q in (parse_qs(urlparse(u).query) for u in brand_page_urls(b, c))})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            t0 = time.perf_counter()
+            for b, c in pages:
+                list(pool.map(load, brand_page_urls(b, c) * 2))  # 같은 요청 동시 2건 → 합쳐져야 함
+            cold = time.perf_counter() - t0
+            cold_calls = stub.calls
+
+            t0 = time.perf_counter()
+            for _ in range(N_LOADS):
+                for b, c in pages:
+                    list(pool.map(load, brand_page_urls(b, c)))
+            warm = time.perf_counter() - t0
+
+        print(f"unique search keys     : {unique}")
+        print(f"upstream calls (cold)  : {cold_calls}  ({cold:.2f}s)")
+        print(f"upstream calls (warm)  : {stub.calls - cold_calls}  ({N_LOADS} x {len(pages)} page loads, {warm:.2f}s)")
+        print(f"cache stats            : {appp.naver_search_cache.stats()}")
+        assert cold_calls == unique, "동일 요청이 합쳐지지 않았습니다."
+        assert stub.calls == cold_calls, "캐시된 페이지 로드에서 외부 호출이 발생했습니다."
+    finally:
+        stub.stop()
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 비전 검출 수신 → 슬롯 점유 계산 처리량
+# =========================================================
+# 사용법: python bench_occupancy.py [슬롯 수] [프레임 수] [배치 크기]
+# 가상의 카메라 2대가 프레임당 박스 20개씩 보내는 상황을 재생합니다.
+#   1) tracker.ingest() 직접 호출 (계산 + 상태 변경 기록)
+#   2) POST /api/vision/detections (JSON 파싱 포함)
+# 마지막으로 /api/slots/empty 지연 시간을 잽니다.
+
+N_SLOTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+N_FRAMES = int(sys.argv[2]) if len(sys.argv) > 2 else 6000
+BATCH = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+BOXES_PER_FRAME = 20
+CAMERAS = ["cam1", "cam2"]
+
+
+def make_slots(client):
+    cols = 20
+    for i in range(N_SLOTS):
+        client.post('/api/slots/save', json={"slot_id": f"S{i:04d}", "x": (i % cols) * 60, "y": (i // cols) * 60,
+                                             "w": 50, "h": 50, "is_active": True,
+                                             "camera_id": CAMERAS[(i % cols) * len(CAMERAS) // cols]})
+
+
+def make_batches(rnd):
+    # 슬롯 중 일부를 '차 있는' 슬롯으로 정하고 그 위에 약간 흔들리는 박스를 만듦
+    cols = 20
+    occupied = rnd.choice(N_SLOTS, size=BOXES_PER_FRAME, replace=False)
+    batches = []
+    frame = 0
+    while frame < N_FRAMES:
+        n = min(BATCH, N_FRAMES - frame)
+        if frame % (BATCH * 20) == 0:   # 가끔 점유 슬롯이 바뀜
+            occupied = rnd.choice(N_SLOTS, size=BOXES_PER_FRAME, replace=False)
+        base = np.stack([(occupied % cols) * 60 + 5, (occupied // cols) * 60 + 5,
+                         np.full(len(occupied), 40), np.full(len(occupied), 40)], axis=1)
+        boxes = np.tile(base, (n, 1)) + rnd.normal(0, 2, size=(n * len(occupied), 4))
+        scores = rnd.uniform(0.3, 1.0, size=len(boxes))
+        batches.append((list(range(frame, frame + n)), [len(occupied)] * n, boxes, scores))
+        frame += n
+    return batches
+
+
+def run_direct(conn, tracker, batches):
+    t0 = time.perf_counter()
+    changes = 0
+    for frame_ids, counts, boxes, scores in batches:
+        for cam in CAMERAS:
+            changes += len(tracker.ingest(conn, cam, frame_ids, counts, boxes, scores))
+    return time.perf_counter() - t0, changes
+
+
+def run_http(client, batches):
+    bodies = [{"camera_id": cam, "frame_ids": [f + N_FRAMES for f in frame_ids], "counts": counts,
+               "boxes": boxes.ravel().round(1).tolist(), "classes": [0] * len(scores), "scores": scores.round(3).tolist()}
+              for frame_ids, counts, boxes, scores in batches for cam in CAMERAS]
+    t0 = time.perf_counter()
+    for body in bodies:
+        res = client.post('/api/vision/detections', json=body)
+        assert res.status_code == 200, res.get_json()
+    return time.perf_counter() - t0
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'vision.db')
+        import appp
+        import occupancy
+        client = appp.app.test_client()
+        make_slots(client)
+        batches = make_batches(np.random.default_rng(1))
+        n_det = sum(len(b[2]) for b in batches) * len(CAMERAS)
+
+        with appp.app.app_context():
+            elapsed, changes = run_direct(db.get_db_connection(), occupancy.tracker, batches)
+        print(f"direct ingest : {n_det:,} detections in {elapsed:.2f}s "
+              f"→ {n_det / elapsed:,.0f} det/s, {N_FRAMES * len(CAMERAS) / elapsed:,.0f} frames/s, {changes} state changes")
+
+        elapsed = run_http(client, batches)
+        print(f"HTTP ingest   : {n_det:,} detections in {elapsed:.2f}s → {n_det / elapsed:,.0f} det/s")
+
+        times = []
+        for _ in range(200):
+            t0 = time.perf_counter()
+            empty = client.get('/api/slots/empty').get_json()
+            times.append((time.perf_counter() - t0) * 1000)
+        print(f"/api/slots/empty: {len(empty)} empty slots, median {sorted(times)[len(times) // 2]:.2f} ms")
+
+        with appp.app.app_context():
+            rows = db.get_db_connection().execute("SELECT count(*) FROM change_log WHERE topic='slot_state'").fetchone()[0]
+        print(f"slot_state writes: {rows} (state changes only) / stats {client.get('/api/vision/stats').get_json()}")
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import statistics
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 주문 목록 페이지네이션 / 변경분 / ETag 지연 시간
+# =========================================================
+# 사용법: python bench_orders.py [주문 수 ...]   (기본: 10000 1000000)
+# 주문 수가 늘어나도 각 요청의 지연 시간이 일정한지(flat) 확인합니다.
+
+SIZES = [int(a) for a in sys.argv[1:]] or [10000, 1000000]
+N_CONTACTS = 5000
+REPEAT = 50
+PAGE = 50
+
+
+def seed(path, n):
+    db.close_all()
+    db.DATABASE_FILE = path
+    import appp
+    import migrations
+    migrations.migrate(db.get_db_connection())
+
+    conn = sqlite3.connect(path)
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name='orders'").fetchall()
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")   # 대량 적재 동안만 트리거 제거
+    rows = ((f'회사{i % 50}', f'상품{i % 300}', 1 + i % 5, '2025-01-01', '', '대기중' if i % 3 else '완료',
+             f'user{i % N_CONTACTS}', 10000, '', f'2025-01-01 00:00:{i % 60:02d}.000') for i in range(n))
+    conn.executemany("INSERT INTO orders (company, item_name, quantity, order_date, due_date, status, contact, price, note, updated_at) "
+                     "VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+    for _, sql in triggers:
+        conn.execute(sql)
+    conn.commit()
+    conn.close()
+    return appp.app
+
+
+def measure(client, url, headers=None):
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        res = client.get(url, headers=headers or {})
+        times.append((time.perf_counter() - t0) * 1000)
+        assert res.status_code in (200, 304), (url, res.status_code)
+    return statistics.median(times)
+
+
+def run(n):
+    tmp = tempfile.mkdtemp()
+    try:
+        app = seed(os.path.join(tmp, 'orders.db'), n)
+        client = app.test_client()
+
+        first = client.get(f'/api/orders?limit={PAGE}')
+        etag = first.headers['ETag']
+        version = int(first.headers['X-Orders-Version'])
+        for i in range(10):
+            client.post('/api/order/update_status', json={"id": n - i * 7, "status": "완료"})
+
+        cases = {
+            "first page":         f'/api/orders?limit={PAGE}',
+            "middle page":        f'/api/orders?limit={PAGE}&after_id={n // 2}',
+            "last page":          f'/api/orders?limit={PAGE}&after_id={PAGE + 1}',
+            "my_list page":       f'/api/order/my_list?user_id=user7&limit={PAGE}',
+            "my_list deep page":  f'/api/order/my_list?user_id=user7&limit={PAGE}&after_id={n // 3}',
+            "since_version":      f'/api/orders?since_version={version}',
+            "updated_after":      f'/api/orders?updated_after=2025-06-01&limit={PAGE}',
+        }
+        result = {name: measure(client, url) for name, url in cases.items()}
+        fresh = client.get(f'/api/orders?limit={PAGE}')
+        result["etag 304"] = measure(client, f'/api/orders?limit={PAGE}', {'If-None-Match': fresh.headers['ETag']})
+        assert etag != fresh.headers['ETag']
+        return result
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    results = {}
+    for n in SIZES:
+        t0 = time.perf_counter()
+        results[n] = run(n)
+        print(f"seeded + measured {n:,} orders in {time.perf_counter() - t0:.1f}s")
+
+    print(f"\n{'median ms':<20}" + "".join(f"{n:>14,}" for n in SIZES))
+    for name in results[SIZES[0]]:
+        print(f"{name:<20}" + "".join(f"{results[n][name]:>14.2f}" for n in SIZES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 적재 계획(/api/dispatch/plan) vs 주문 하나씩 FIFO
+# =========================================================
+# 사용법: python bench_planner.py [선반 열 수] [선반 행 수]   (기본: 20 8)
+# 선반 슬롯을 만들고 절반쯤을 점유 상태로 둔 뒤, 승인된 주문 묶음 크기를 바꿔 가며
+# 계획의 총 작업 시간 / 카 이동 거리 / 팔 이동 거리 / 트립 수를 FIFO 와 비교합니다.
+# 시간 제한(budget_ms)에 따른 개선 정도도 봅니다.
+
+COLS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+ROWS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+OCCUPIED = 0.5
+BATCHES = [5, 20, 50]            # 승인된 주문 수
+BUDGETS = [0, 20, 200]           # ms
+ITEMS = ["빈폴 베이직 티셔츠", "엄브로 우븐 조거 팬츠", "데상트 트레이닝 재킷", "퓨마 스웨이드 클래식"]
+
+
+def seed_shelf(conn, rng):
+    conn.execute("DELETE FROM slots")
+    rows = []
+    for c in range(COLS):
+        for r in range(ROWS):
+            rows.append((f"{chr(65 + r)}-{c + 1}", 40 + c * 70, 20 + r * 60, 60, 50, 1))
+    conn.executemany("INSERT INTO slots (slot_id, x, y, w, h, is_active) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO slot_state (slot_id, occupied) VALUES (?, ?)",
+                     [(r[0], int(rng.random() < OCCUPIED)) for r in rows])
+    conn.commit()
+    return len(rows)
+
+
+def seed_orders(conn, rng, n):
+    conn.execute("UPDATE orders SET status = '완료' WHERE status = '승인됨'")
+    conn.executemany("INSERT INTO orders (company, item_name, quantity, status, contact) VALUES (?, ?, ?, '승인됨', ?)",
+                     [("벤치", rng.choice(ITEMS), rng.randint(1, 3), "010-0000") for _ in range(n)])
+    conn.commit()
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'planner.db')
+        import appp
+        client = appp.app.test_client()
+        rng = random.Random(7)
+        conn = db.connect()
+        n_slots = seed_shelf(conn, rng)
+        empty = len(client.get('/api/slots/empty').get_json())
+        print(f"shelf {COLS}x{ROWS} = {n_slots} slots, {empty} empty\n")
+
+        print(f"{'orders':>6}{'items':>6}{'budget':>7} | {'trips':>5}{'seconds':>9}{'car px':>9}{'arm px':>9} | "
+              f"{'FIFO trips':>10}{'seconds':>9}{'car px':>9}{'arm px':>9} | {'saved':>6}{'plan ms':>8}")
+        for n in BATCHES:
+            seed_orders(conn, rng, n)
+            for budget in BUDGETS:
+                t0 = time.perf_counter()
+                res = client.post('/api/dispatch/plan', json={"budget_ms": budget}).get_json()
+                wall = (time.perf_counter() - t0) * 1000
+                assert res["success"], res
+                p, f = res["totals"], res["fifo"]
+                slots = [s["slot_id"] for t in res["trips"] for s in t["stops"]]
+                assert len(slots) == len(set(slots)) == p["items"], "같은 슬롯이 두 번 배정되었습니다."
+                print(f"{n:>6}{p['items']:>6}{budget:>7} | {p['trips']:>5}{p['seconds']:>9.1f}{p['car_distance']:>9.0f}"
+                      f"{p['arm_distance']:>9.0f} | {f['trips']:>10}{f['seconds']:>9.1f}{f['car_distance']:>9.0f}"
+                      f"{f['arm_distance']:>9.0f} | {res['saved_pct']:>5.1f}%{wall:>8.1f}")
+        conn.close()
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import shutil
+import random
+import sqlite3
+import tempfile
+import statistics
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] /api/search (FTS5 trigram) vs LIKE 검색
+# =========================================================
+# 사용법: python bench_search.py [주문 수]   (기본: 1000000)
+# 1) 주문을 트리거 없이 대량 적재한 뒤 search.rebuild() 로 색인 (색인 시간 / 파일 크기)
+# 2) 검색어 종류별 /api/search 지연 시간 중앙값과 같은 조건의 LIKE '%..%' 스캔 비교
+# 3) 색인 트리거가 주문 INSERT 에 더하는 비용
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+REPEAT = 20
+SYLLABLES = "가나다라마바사아자차카타파하한성신대동서남북우진영미"
+COMPANIES = ["".join(random.Random(i).choices(SYLLABLES, k=3)) + "물산" for i in range(2000)] + ["코오롱인더스트리", "신세계인터내셔날"]
+BRANDS = ["엄브로", "빈폴", "데상트", "퓨마"]
+STYLES = ["우븐", "베이직", "트레이닝", "스웨이드", "로고", "클래식", "컴포트", "오버핏", "슬림", "와이드",
+          "경량", "기모", "린넨", "데님", "니트", "스트라이프", "체크", "카고", "테크", "레트로"]
+GOODS = ["조거 팬츠", "티셔츠", "피케 셔츠", "트랙 재킷", "윈드브레이커", "양말", "후드티", "맨투맨",
+         "반바지", "치노 팬츠", "패딩", "캡", "러닝화", "슬리퍼", "백팩"]
+NOTES = [""] * 50 + ["급함", "오전 배송", "파손 주의", "재입고 요청", "선물 포장"]
+
+QUERIES = [  # (설명, 검색어, type, sort)
+    ("rare note, recent", "재입고", "orders", "recent"),
+    ("2-char prefix, recent", "빈폴", "orders", "recent"),
+    ("three terms, recent", "엄브로 기모 조거", "orders", "recent"),
+    ("contact, recent", "010-0042", "orders", "recent"),
+    ("company, recent", "코오롱", "orders", "recent"),
+    ("no match", "나이키 에어맥스", "orders", "recent"),
+    ("two terms, rank", "데상트 윈드", "orders", "rank"),
+    ("common term, rank", "재킷", "orders", "rank"),
+    ("products, rank", "트랙 재킷", "products", "rank"),
+]
+
+
+def seed(path):
+    db.DATABASE_FILE = path
+    import appp
+    import migrations
+    migrations.migrate(db.get_db_connection())
+    db.close_all()
+
+    conn = sqlite3.connect(path)
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name='orders'").fetchall()
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")   # 대량 적재 동안만 트리거 제거
+    rng = random.Random(1)
+    rows = ((rng.choice(COMPANIES), f"{rng.choice(BRANDS)} {rng.choice(STYLES)} {rng.choice(GOODS)}", 1, '대기중', f'010-{rng.randrange(10000):04d}', rng.choice(NOTES))
+            for _ in range(N))
+    conn.executemany("INSERT INTO orders (company, item_name, quantity, status, contact, note) VALUES (?,?,?,?,?,?)", rows)
+    for _, sql in triggers:
+        conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def median_ms(fn, n=REPEAT):
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'search.db')
+        t0 = time.perf_counter()
+        seed(path)
+        print(f"seeded {N} orders in {time.perf_counter() - t0:.1f}s ({os.path.getsize(path) / 1e6:.0f} MB)")
+
+        import appp
+        import search
+        conn = db.connect()
+        t0 = time.perf_counter()
+        search.rebuild(conn)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"search.rebuild(): {time.perf_counter() - t0:.1f}s, DB now {os.path.getsize(path) / 1e6:.0f} MB\n")
+
+        client = appp.app.test_client()
+        print(f"{'query':<24}{'terms':<16}{'/api/search ms':>15}{'LIKE ms':>10}{'hits':>6}")
+        for label, q, kind, sort in QUERIES:
+            url = f"/api/search?q={q}&type={kind}&sort={sort}&page_size=20"
+            hits = len(client.get(url).get_json()[kind]["items"])
+            api = median_ms(lambda: client.get(url))
+            table, cols = ("orders", ("company", "item_name", "note", "contact")) if kind == "orders" else \
+                ("products", ("item_code", "product_name", "brand", "category", "color", "size"))
+            where = " AND ".join("(" + " OR ".join(f"{c} LIKE ?" for c in cols) + ")" for _ in q.split())
+            params = [f"%{t}%" for t in q.split() for _ in cols]
+            like_sql = f"SELECT * FROM {table} WHERE {where} ORDER BY rowid DESC LIMIT 20"
+            like = median_ms(lambda: conn.execute(like_sql, params).fetchall(), n=3)
+            print(f"{label:<24}{q:<16}{api:>15.2f}{like:>10.1f}{hits:>6}")
+
+        # 3) 색인 트리거 비용: 주문 1만 건 INSERT (트리거 있음 / 색인 트리거만 뺌)
+        rows = [("벤치", "빈폴 베이직 티셔츠", 1, '대기중', '010-9999', '') for _ in range(10000)]
+        sql = "INSERT INTO orders (company, item_name, quantity, status, contact, note) VALUES (?,?,?,?,?,?)"
+
+        def insert_each():
+            for r in rows:
+                conn.execute(sql, r)
+            conn.commit()
+
+        t_with = median_ms(insert_each, n=1)
+        fts_triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND name LIKE 'trg_orders_fts_%'").fetchall()
+        for name, _ in fts_triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        t_without = median_ms(insert_each, n=1)
+        for _, trigger_sql in fts_triggers:
+            conn.execute(trigger_sql)
+        conn.commit()
+        print(f"\n10k order INSERTs: {t_with:.0f} ms with search index, {t_without:.0f} ms without "
+              f"(+{(t_with - t_without) / len(rows) * 1000:.1f} us/row)")
+        conn.close()
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
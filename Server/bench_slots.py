@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import statistics
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 슬롯 R*Tree 검색 지연 시간
+# =========================================================
+# 사용법: python bench_slots.py [슬롯 수]   (기본: 2000)
+# 카메라 4대에 나눠진 캐비닛 칸을 /api/slots/import 로 한 번에 넣고
+#   overlap / region / nearest_empty 를 함수 직접 호출과 HTTP 로 각각 잽니다.
+# 전체 슬롯을 훑는 단순 방식(brute force)과 결과가 같은지도 확인합니다.
+
+N_SLOTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CAMERAS = ["cam1", "cam2", "cam3", "cam4"]
+REPEAT = 500
+
+
+def make_slots(rnd):
+    cols = 40
+    slots = []
+    for i in range(N_SLOTS):
+        slots.append({"slot_id": f"C{i:05d}", "x": (i % cols) * 40, "y": (i // cols) * 40, "w": 36, "h": 36,
+                      "is_active": rnd.random() > 0.05, "camera_id": CAMERAS[(i % cols) * len(CAMERAS) // cols]})
+    return slots
+
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'slots.db')
+        import appp
+        import slot_index
+        from occupancy import tracker
+        client = appp.app.test_client()
+        rnd = random.Random(7)
+        slots = make_slots(rnd)
+
+        t0 = time.perf_counter()
+        res = client.post('/api/slots/import', json={"slots": slots, "replace": True})
+        assert res.get_json()['imported'] == N_SLOTS
+        print(f"bulk import {N_SLOTS:,} slots: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+        # 절반 정도를 점유 상태로 만듦
+        for s in slots:
+            tracker.state[s['slot_id']] = rnd.random() < 0.5
+        with appp.app.app_context():
+            conn = db.get_db_connection()
+            tracker.refresh(conn)
+            tracker.empty = {sid for sid, occ in tracker.state.items() if not occ}
+
+            # brute force 와 결과 비교
+            for _ in range(50):
+                px, py = rnd.uniform(0, 1600), rnd.uniform(0, 2000)
+                slot, dist = slot_index.nearest_empty(conn, px, py)
+                brute = min(((s['x'] + s['w'] / 2 - px) ** 2 + (s['y'] + s['h'] / 2 - py) ** 2) ** 0.5
+                            for s in slots if s['is_active'] and s['slot_id'] in tracker.empty)
+                assert abs(dist - brute) < 1e-6, (dist, brute)
+                box = (px, py, 50, 50)
+                brute_overlap = {s['slot_id'] for s in slots
+                                 if s['x'] + s['w'] > px and s['x'] < px + 50 and s['y'] + s['h'] > py and s['y'] < py + 50}
+                assert {r['slot_id'] for r in slot_index.overlapping(conn, *box)} == brute_overlap
+
+            cases = {
+                "overlap (50px box)":   lambda: slot_index.overlapping(conn, rnd.uniform(0, 1600), rnd.uniform(0, 2000), 50, 50),
+                "region (400px, cam)":  lambda: slot_index.in_region(conn, rnd.uniform(0, 1200), rnd.uniform(0, 1600), 400, 400, "cam2"),
+                "nearest_empty":        lambda: slot_index.nearest_empty(conn, rnd.uniform(0, 1600), rnd.uniform(0, 2000)),
+                "brute force nearest":  lambda: min(s['x'] for s in conn.execute("SELECT * FROM slots").fetchall()),
+            }
+            print(f"\n{'direct call':<24}{'median ms':>10}")
+            for name, fn in cases.items():
+                print(f"{name:<24}{median_ms(fn):>10.3f}")
+
+        http = {
+            "GET /api/slots/overlap":       lambda: client.get('/api/slots/overlap?x=400&y=400&w=50&h=50'),
+            "GET /api/slots/region":        lambda: client.get('/api/slots/region?x=0&y=0&w=400&h=400&camera_id=cam1'),
+            "GET /api/slots/nearest_empty": lambda: client.get('/api/slots/nearest_empty?x=812&y=640'),
+            "POST /api/slots/save":         lambda: client.post('/api/slots/save', json=dict(slots[0], x=rnd.randint(0, 9))),
+        }
+        print(f"\n{'HTTP':<32}{'median ms':>10}")
+        for name, fn in http.items():
+            print(f"{name:<32}{median_ms(fn):>10.3f}")
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
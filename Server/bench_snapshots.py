@@ -0,0 +1,96 @@
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 스냅샷 보관소 적재 / 구간 검색 / 보관 정책
+# =========================================================
+# 사용법: python bench_snapshots.py [일 수] [시간당 프레임 수]   (기본: 30일, 카메라당 시간당 60장)
+# 카메라 4대가 한 달 동안 찍은 프레임을 store() 로 적재한 뒤
+#   WPF 사진 기록 검색(날짜 + 시작/끝 시각), 페이지 넘김, 원본/썸네일 읽기 지연 시간을 잽니다.
+# 마지막으로 보관 용량을 절반으로 줄여 prune() 이 오래된 세그먼트부터 지우는지 확인합니다.
+
+DAYS = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+PER_HOUR = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+CAMERAS = ["cam79", "cam112", "cam10", "cam97"]
+REPEAT = 200
+
+
+def sample_jpeg():
+    from PIL import Image
+    out = io.BytesIO()
+    Image.new('RGB', (640, 480), (40, 90, 160)).save(out, 'JPEG', quality=70)
+    return out.getvalue()
+
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        db.DATABASE_FILE = os.path.join(tmp, 'snap.db')
+        import appp
+        import snapshots
+        snapshots.ROOT = os.path.join(tmp, 'snapshots')
+        client = appp.app.test_client()
+        jpeg = sample_jpeg()
+        start = datetime(2025, 12, 1).timestamp()
+        n = DAYS * 24 * PER_HOUR * len(CAMERAS)
+
+        with appp.app.app_context():
+            conn = db.get_db_connection()
+            t0 = time.perf_counter()
+            step = 3600 / PER_HOUR
+            for i in range(DAYS * 24 * PER_HOUR):
+                ts = start + i * step
+                for cam in CAMERAS:
+                    snapshots.store(conn, cam, ts, jpeg, [{"cls": 0, "score": 0.9, "box": [10, 20, 30, 40]}])
+            elapsed = time.perf_counter() - t0
+        print(f"stored {n:,} frames ({len(jpeg):,} B each) in {elapsed:.1f}s → {n / elapsed:,.0f} frames/s")
+
+        mid = (datetime(2025, 12, 1) + timedelta(days=DAYS // 2)).date().isoformat()
+        first = client.get(f'/api/snapshots?camera_id=cam10&date={mid}&start_hour=9&end_hour=18&limit=50').get_json()
+        assert len(first['items']) == 50 and first['next']
+        snap_id = first['items'][0]['id']
+        cases = {
+            "date + hours (cam)":   f'/api/snapshots?camera_id=cam10&date={mid}&start_hour=9&end_hour=18&limit=50',
+            "date + hours (all)":   f'/api/snapshots?date={mid}&start_hour=0&end_hour=23&limit=50',
+            "next page":            f'/api/snapshots?camera_id=cam10&date={mid}&start_hour=9&end_hour=18&limit=50&before={first["next"]}',
+            "whole month (cam)":    f'/api/snapshots?camera_id=cam97&limit=50',
+            "image":                f'/api/snapshots/{snap_id}.jpg',
+            "thumbnail":            f'/api/snapshots/{snap_id}/thumb.jpg',
+        }
+        print(f"\n{'GET':<22}{'median ms':>10}")
+        for name, url in cases.items():
+            print(f"{name:<22}{median_ms(lambda: client.get(url)):>10.3f}")
+
+        with appp.app.app_context():
+            conn = db.get_db_connection()
+            total = conn.execute("SELECT SUM(bytes) FROM snapshot_segments").fetchone()[0]
+            snapshots.RETAIN_BYTES = total // 2
+            t0 = time.perf_counter()
+            removed = snapshots.prune(conn, force=True, now=start + DAYS * 86400)
+            left = conn.execute("SELECT count(*), MIN(ts) FROM snapshots").fetchone()
+            print(f"\nprune to {total // 2:,} B: removed {removed} segments in {(time.perf_counter() - t0) * 1000:.1f} ms, "
+                  f"{left[0]:,} frames left from {datetime.fromtimestamp(left[1])}")
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+# =========================================================
+# ▼ [벤치마크] 서버 시작 시간 (콜드 임포트 → 첫 응답)
+# =========================================================
+# 사용법: python bench_startup.py [반복 횟수]   (기본: 5)
+# 매번 새 파이썬 프로세스에서 잽니다.
+#   import only   : import appp 만 (DB 파일이 생기면 안 됨)
+#   fresh DB      : create_app() 이 마이그레이션 전체 적용 → GET /api/products
+#   migrated DB   : 이미 최신인 DB 로 create_app() → GET /api/products (DDL 없음)
+
+REPEAT = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r'''
+import sys, time, json, os
+t0 = time.perf_counter()
+sys.path.insert(0, HERE)
+import db
+db.DATABASE_FILE = DB_PATH
+import appp
+t_import = time.perf_counter()
+result = {"import": t_import - t0, "db_created": os.path.exists(DB_PATH)}
+if MODE != "import":
+    app = appp.create_app()
+    t_app = time.perf_counter()
+    res = app.test_client().get('/api/products')
+    assert res.status_code == 200 and res.get_json()
+    result.update(create_app=t_app - t_import, first_response=time.perf_counter() - t0)
+print(json.dumps(result))
+'''
+
+
+def run_child(mode, db_path, cwd):
+    code = f"HERE = {HERE!r}\nDB_PATH = {db_path!r}\nMODE = {mode!r}\n" + CHILD
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - t0
+    return result
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        rows = {"import only": [], "fresh DB": [], "migrated DB": []}
+        for i in range(REPEAT):
+            path = os.path.join(tmp, f"start{i}.db")
+            r = run_child("import", path, tmp)
+            assert not r["db_created"], "import appp 만으로 DB 파일이 생겼습니다."
+            rows["import only"].append(r)
+            rows["fresh DB"].append(run_child("app", path, tmp))
+            rows["migrated DB"].append(run_child("app", path, tmp))
+
+        print(f"{'case':<14}{'import':>10}{'create_app':>12}{'1st response':>14}{'process':>10}   (median of {REPEAT}, ms)")
+        for name, results in rows.items():
+            med = {k: statistics.median(r[k] for r in results) * 1000 for k in results[0] if k != "db_created"}
+            print(f"{name:<14}{med['import']:>10.1f}{med.get('create_app', float('nan')):>12.1f}"
+                  f"{med.get('first_response', float('nan')):>14.1f}{med['process']:>10.1f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import statistics
+
+import db
+
+# =========================================================
+# ▼ [벤치마크] 통계 API: 롤업 테이블 vs 매번 GROUP BY
+# =========================================================
+# 사용법: python bench_stats.py [주문 수 ...]   (기본: 10000 1000000)
+# 트리거 없이 주문을 대량 적재한 뒤 stats.backfill() 로 롤업을 채우고,
+# /api/stats 응답 시간과 orders 전체를 GROUP BY 하는 시간을 비교합니다.
+
+SIZES = [int(a) for a in sys.argv[1:]] or [10000, 1000000]
+REPEAT = 30
+BRANDS = ["BeanPole", "Umbro", "Puma", "DESCENTE"]
+STATUSES = ["대기중", "결제완료", "완료", "출고"]
+
+
+def seed(path, n):
+    db.close_all()
+    db.DATABASE_FILE = path
+    import appp
+    import migrations
+    migrations.migrate(db.get_db_connection())
+
+    conn = sqlite3.connect(path)
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name='orders'").fetchall()
+    for name, _ in triggers:
+        conn.execute(f"DROP TRIGGER {name}")   # 대량 적재 동안만 트리거 제거
+    rows = ((BRANDS[i % 4], f'상품{i % 300}', 1 + i % 5, f'2025-01-{1 + i % 28:02d} {i % 24:02d}:00:00', STATUSES[i % 7 % 4],
+             f'user{i % 5000}', 10000, f'2025-01-01 00:00:00.000') for i in range(n))
+    conn.executemany("INSERT INTO orders (company, item_name, quantity, order_date, status, contact, price, updated_at) "
+                     "VALUES (?,?,?,?,?,?,?,?)", rows)
+    for _, sql in triggers:
+        conn.execute(sql)
+    conn.commit()
+    conn.close()
+    return appp
+
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def run(n):
+    tmp = tempfile.mkdtemp()
+    try:
+        appp = seed(os.path.join(tmp, 'stats.db'), n)
+        import stats
+        client = appp.app.test_client()
+        with appp.app.app_context():
+            conn = db.get_db_connection()
+            t0 = time.perf_counter()
+            stats.backfill(conn)
+            backfill_ms = (time.perf_counter() - t0) * 1000
+            group_by = median_ms(lambda: (
+                conn.execute("SELECT status, count(*), SUM(quantity) FROM orders GROUP BY status").fetchall(),
+                conn.execute("SELECT company, count(*), SUM(quantity * price) FROM orders GROUP BY company").fetchall(),
+                conn.execute("SELECT substr(order_date, 1, 13) h, count(*) FROM orders GROUP BY h").fetchall()))
+
+        add = median_ms(lambda: client.post('/api/order/add', json={"company": "Puma", "item_name": "x", "quantity": 1}))
+        return {"backfill": backfill_ms,
+                "GET /api/stats": median_ms(lambda: client.get('/api/stats')),
+                "GET /api/stats/status": median_ms(lambda: client.get('/api/stats/status')),
+                "GROUP BY over orders": group_by,
+                "POST /api/order/add": add}
+    finally:
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    results = {n: run(n) for n in SIZES}
+    print(f"\n{'median ms':<24}" + "".join(f"{n:>14,}" for n in SIZES))
+    for name in results[SIZES[0]]:
+        print(f"{name:<24}" + "".join(f"{results[n][name]:>14.2f}" for n in SIZES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import db
+from naver_stub import NaverStub
+
+# =========================================================
+# ▼ [벤치마크] API 부하 시나리오 모음 (오프라인, 결과는 JSON)
+# =========================================================
+# 임시 DB 를 원하는 규모로 채운 뒤, 서버를 별도 프로세스(werkzeug, threaded)로 띄우고
+# 시나리오마다 정해진 시간 동안 동시 사용자 수만큼 요청을 반복합니다. (closed loop)
+#   winforms_polling : WinForms 화면의 /api/orders, /api/products 주기 조회
+#   brand_search     : 웹 브랜드 페이지 (/api/catalog/brand, 서버가 검색 2~4건을 동시에) → 가짜 네이버 서버(NaverStub)
+#   checkout_burst   : /api/payment/complete 결제 폭주 (장바구니 1~3개 상품)
+#   process_order    : /factory/api/process_order 공장 주문
+# 시나리오별 처리량(req/s), p50/p95/p99, 상태 코드, 오류율(5xx + 연결 오류)을 JSON 으로 남깁니다.
+#
+# 사용법:
+#   python bench_suite.py --out before.json
+#   python bench_suite.py --orders 200000 --duration 20 --concurrency 16 --out after.json --compare before.json
+#   python bench_suite.py --scenarios checkout_burst,process_order
+
+SCENARIOS = ("winforms_polling", "brand_search", "checkout_burst", "process_order")
+BRANDS = {"BP": "BeanPole", "UB": "Umbro", "PM": "Puma", "DS": "DESCENTE"}
+BRANDS_KR = ["빈폴", "엄브로", "데상트", "퓨마"]
+CATEGORIES = ["TOP", "BOTTOM", "OUTER"]
+SEARCH_CATEGORIES = ["상의", "하의", "아우터", "신발"]
+FACTORY_BRANDS = ["Descente", "Beanpole", "Umbro", "Puma"]
+STATUSES = ["대기중", "결제완료", "승인됨", "완료", "취소"]
+
+
+# ---------------------------------------------------------
+# 데이터 준비
+# ---------------------------------------------------------
+def seed(path, args):
+    """마이그레이션 후 규모만큼 데이터를 넣습니다. 대량 적재 동안은 orders 트리거를 잠시 빼고,
+    그 사이 빠진 검색 색인(orders_fts)은 적재 후 다시 만듭니다."""
+    db.DATABASE_FILE = path
+    import migrations
+    import search
+    import stats
+    from werkzeug.security import generate_password_hash
+    conn = db.connect()
+    migrations.migrate(conn)
+    rng = random.Random(args.seed)
+
+    codes = []
+    products = []
+    for i in range(args.products):
+        prefix = list(BRANDS)[i % len(BRANDS)]
+        code = f"{prefix}-{i // 1000 % 100:02d}-{i // 10 % 100:02d}-{i % 10:02d}-{i}"
+        codes.append(code)
+        products.append((code, f"{BRANDS[prefix]} 상품 {i}", BRANDS[prefix], CATEGORIES[i % 3], "Black", "M", 10 ** 6))
+    pw = generate_password_hash("bench1234")
+    users = [(f"user{i}", pw, f"사용자{i}", f"010-{i // 10000:04d}-{i % 10000:04d}") for i in range(args.users)]
+    slots = [(f"S-{i // 100:02d}-{i % 100:02d}", (i % 40) * 30, (i // 40) * 30, 28, 28, 1) for i in range(args.slots)]
+
+    with db.immediate(conn):
+        conn.executemany("INSERT OR REPLACE INTO products (item_code, product_name, brand, category, color, size, stock) "
+                         "VALUES (?,?,?,?,?,?,?)", products)
+        conn.executemany("INSERT OR IGNORE INTO users (id, password, name, phone) VALUES (?,?,?,?)", users)
+        conn.executemany("INSERT OR REPLACE INTO slots (slot_id, x, y, w, h, is_active) VALUES (?,?,?,?,?,?)", slots)
+
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name='orders'").fetchall()
+    with db.immediate(conn):
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        rows = ((BRANDS[list(BRANDS)[i % 4]], f"상품{rng.randrange(args.products or 1)}", 1 + i % 5,
+                 f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00", STATUSES[i % len(STATUSES)],
+                 users[i % len(users)][3] if users else "bench", 10000 + i % 50 * 1000, "2025-01-01 00:00:00.000")
+                for i in range(args.orders))
+        conn.executemany("INSERT INTO orders (company, item_name, quantity, order_date, status, contact, price, updated_at) "
+                         "VALUES (?,?,?,?,?,?,?,?)", rows)
+        for _, sql in triggers:
+            conn.execute(sql)
+    stats.backfill(conn)
+    search.rebuild(conn)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return codes
+
+
+# ---------------------------------------------------------
+# 서버 (별도 프로세스: 부하 생성기와 GIL 을 나눠 쓰지 않도록)
+# ---------------------------------------------------------
+def serve(db_path, naver_url):
+    import logging
+    from werkzeug.serving import make_server
+    sys.stdout = open(os.devnull, 'w')        # 가상 공정 시작 print (mock_factory) 는 버림
+    db.DATABASE_FILE = db_path
+    import appp
+    appp.NAVER_SHOP_URL = naver_url + "/v1/search/shop.json"
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, appp.create_app(), threaded=True)
+    sys.__stdout__.write(f"LISTENING {server.server_port}\n")
+    sys.__stdout__.flush()
+    server.serve_forever()
+
+
+def start_server(db_path, naver_url, cwd):
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", db_path, naver_url],
+                            cwd=cwd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("LISTENING"):
+        proc.kill()
+        raise RuntimeError(f"서버 시작 실패: {line!r}")
+    return proc, f"http://127.0.0.1:{int(line.split()[1])}"
+
+
+# ---------------------------------------------------------
+# 시나리오: 요청 묶음(동시에 보낼 요청 목록)을 하나씩 만들어 냄
+# ---------------------------------------------------------
+def winforms_polling(rng, ctx):
+    return [("GET", "/api/orders" if rng.random() < 0.5 else "/api/products", None)]
+
+
+def brand_search(rng, ctx):
+    # factory_index.html: 브랜드/카테고리 한 페이지 (서버가 네이버 검색 2~4건을 모아 줌)
+    brand = rng.choice(BRANDS_KR)
+    category = rng.choice(["All"] + SEARCH_CATEGORIES)
+    return [("GET", f"/api/catalog/brand?brand={brand}&category={category}&page={rng.randint(1, 5)}&page_size=12", None)]
+
+
+def checkout_burst(rng, ctx):
+    items = [{"item_code": rng.choice(ctx["codes"]), "quantity": 1, "price": 10000} for _ in range(rng.randint(1, 3))]
+    body = {"user_id": f"user{rng.randrange(max(ctx['users'], 1))}", "items": items,
+            "idempotency_key": f"bench-{threading.get_ident()}-{rng.getrandbits(64):x}"}
+    return [("POST", "/api/payment/complete", body)]
+
+
+def process_order(rng, ctx):
+    orders = [{"name": b, "quantity": rng.randint(1, 3)} for b in rng.sample(FACTORY_BRANDS, rng.randint(1, 2))]
+    return [("POST", "/factory/api/process_order", {"orders": orders, "user_id": f"user{rng.randrange(max(ctx['users'], 1))}"})]
+
+
+def endpoint_of(url):
+    return url.split('?')[0]
+
+
+def run_scenario(name, base, args, ctx):
+    make = globals()[name]
+    deadline = time.monotonic() + args.duration
+    results = []                    # (endpoint, status, latency)
+    lock = threading.Lock()
+    fanout = ThreadPoolExecutor(max_workers=args.concurrency * 4)
+
+    def send(session, method, url, body):
+        t0 = time.perf_counter()
+        try:
+            res = session.request(method, base + url, json=body, timeout=args.timeout)
+            res.content
+            status = res.status_code
+        except requests.RequestException:
+            status = 0              # 연결 오류/타임아웃
+        return endpoint_of(url), status, time.perf_counter() - t0
+
+    def worker(i):
+        rng = random.Random(args.seed * 1000 + i)
+        session = requests.Session()
+        local = []
+        while time.monotonic() < deadline:
+            batch = make(rng, ctx)
+            if len(batch) == 1:
+                local.append(send(session, *batch[0]))
+            else:
+                # 브라우저처럼 동시에 (요청마다 별도 세션)
+                local.extend(fanout.map(lambda r: send(requests.Session(), *r), batch))
+        with lock:
+            results.extend(local)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    fanout.shutdown()
+    return summarize(results, elapsed)
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {}
+    s = sorted(latencies)
+    pick = lambda p: round(s[min(len(s) - 1, int(len(s) * p))] * 1000, 3)
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(s[-1] * 1000, 3),
+            "mean": round(sum(s) / len(s) * 1000, 3)}
+
+
+def summarize(results, elapsed):
+    def block(rows):
+        statuses = {}
+        for _, status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(n for code, n in statuses.items() if code == "0" or code.startswith("5"))
+        return {"requests": len(rows), "throughput_rps": round(len(rows) / elapsed, 2),
+                "latency_ms": percentiles([lat for _, _, lat in rows]),
+                "errors": errors, "error_rate": round(errors / len(rows), 5) if rows else 0.0, "status": statuses}
+
+    out = block(results)
+    out["elapsed_s"] = round(elapsed, 3)
+    out["endpoints"] = {ep: block([r for r in results if r[0] == ep]) for ep in sorted({r[0] for r in results})}
+    return out
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f"\n{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, r in report["scenarios"].items():
+        lat = r["latency_ms"]
+        print(f"{name:<18}{r['throughput_rps']:>10.1f}{lat.get('p50', 0):>10.2f}{lat.get('p95', 0):>10.2f}"
+              f"{lat.get('p99', 0):>10.2f}{r['error_rate'] * 100:>8.2f}%")
+        if baseline and name in baseline.get("scenarios", {}):
+            b = baseline["scenarios"][name]
+            change = lambda new, old: f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{'  vs baseline':<18}{change(r['throughput_rps'], b['throughput_rps']):>10}"
+                  + "".join(f"{change(lat.get(p, 0), b['latency_ms'].get(p, 0)):>10}" for p in ("p50", "p95", "p99")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 API 부하 벤치마크")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--slots", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10.0, help="시나리오당 시간(초)")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 사용자 수")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--naver-delay", type=float, default=0.05, help="가짜 네이버 응답 지연(초)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="bench_suite.json")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(sorted(unknown))}")
+
+    tmp = tempfile.mkdtemp()
+    stub = NaverStub(delay=args.naver_delay).start()
+    proc = None
+    try:
+        path = os.path.join(tmp, "suite.db")
+        t0 = time.perf_counter()
+        codes = seed(path, args)
+        seed_s = time.perf_counter() - t0
+        print(f"seeded {args.products:,} products, {args.orders:,} orders, {args.users:,} users, "
+              f"{args.slots:,} slots in {seed_s:.1f}s")
+        proc, base = start_server(path, stub.url, tmp)
+        ctx = {"codes": codes or ["BP-01-01-01"], "users": args.users}
+
+        report = {
+            "meta": {
+                "commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(), "cpus": os.cpu_count(),
+                "scale": {"products": args.products, "orders": args.orders, "users": args.users, "slots": args.slots},
+                "duration_s": args.duration, "concurrency": args.concurrency, "naver_delay_s": args.naver_delay,
+                "seed": args.seed, "seed_time_s": round(seed_s, 3),
+            },
+            "scenarios": {},
+        }
+        for name in scenarios:
+            print(f"running {name} ({args.concurrency} users, {args.duration:.0f}s)...", flush=True)
+            report["scenarios"][name] = run_scenario(name, base, args, ctx)
+        report["meta"]["naver_stub_calls"] = stub.calls
+
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        baseline = None
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+        print_report(report, baseline)
+        print(f"\nresults → {args.out}")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+        stub.stop()
+        db.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ["--serve"]:
+        serve(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,106 @@
+import time
+import threading
+from collections import OrderedDict
+
+# =========================================================
+# ▼ [응답 캐시] TTL + LRU + 동시 요청 합치기 + stale 응답 후 갱신
+# =========================================================
+# - 같은 키로 동시에 들어온 요청은 한 번만 upstream 을 호출하고 결과를 공유합니다.
+# - TTL 이 지난 항목은 stale_ttl 동안은 그대로 돌려주고 뒤에서 새로 받아옵니다.
+# - loader 가 예외를 던지면 캐시에 저장하지 않습니다.
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, maxsize=256, ttl=300, stale_ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()   # key -> (value, stored_at)
+        self._inflight = {}          # key -> _InFlight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.errors = 0
+        self.evictions = 0
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        self._inflight[key] = _InFlight()
+                        threading.Thread(target=self._load, args=(key, loader), daemon=True).start()
+                    return value
+                del self._data[key]
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._inflight[key] = _InFlight()
+                self.misses += 1
+                leader = True
+
+        if leader:
+            self._load(key, loader)
+        else:
+            flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _load(self, key, loader):
+        flight = self._inflight[key]
+        try:
+            flight.value = loader()
+            with self._lock:
+                self.loads += 1
+                self._data[key] = (flight.value, time.monotonic())
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                "size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                "hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+                "coalesced": self.coalesced, "loads": self.loads, "errors": self.errors,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.stale_hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,292 @@
+import time
+import threading
+import http.client
+from urllib.parse import urlsplit
+from flask import Blueprint, Response, request, jsonify
+
+# =========================================================
+# ▼ [카메라 중계] 라즈베리파이 MJPEG 스트림을 한 번만 받아 여러 화면에 나눠 주기
+# =========================================================
+# - 카메라마다 업스트림 연결은 하나뿐입니다. (첫 시청자가 올 때 연결, 아무도 없으면 IDLE_TIMEOUT 뒤 끊음)
+# - 파트 헤더의 Content-Length 만큼 소켓 버퍼에서 bytes 하나로 바로 읽고,
+#   그 프레임 객체를 모든 시청자가 그대로 공유합니다. (시청자별 복사 없음)
+# - 시청자는 항상 '가장 최근 프레임'만 받습니다. 느린 시청자는 중간 프레임을 건너뜁니다.
+#
+#   GET /camera/<id>/stream.mjpg[?fps=10]   중계 스트림 (multipart/x-mixed-replace)
+#   GET /camera/<id>/latest.jpg             최신 프레임 한 장
+#   GET /api/cameras                        카메라별 연결/프레임/건너뛴 프레임 통계
+
+camera_bp = Blueprint('camera_relay', __name__)
+
+# 카메라 id → 라즈베리파이 스트림 주소 (main.cs / WpfSlotEditor / WpfManualControl 과 동일)
+CAMERAS = {
+    "cam79": "http://192.168.0.79:8000/stream.mjpg",
+    "cam112": "http://192.168.0.112:8000/stream.mjpg",
+    "cam10": "http://192.168.0.10:8000/stream.mjpg",
+    "cam97": "http://192.168.0.97:8000/stream.mjpg",
+}
+
+BOUNDARY = b'frame'
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 10.0
+IDLE_TIMEOUT = 30.0      # 시청자가 없어도 이 시간 동안은 업스트림 유지 (창 전환 시 재연결 방지)
+RECONNECT_MAX = 10.0     # 재연결 대기 최대(초)
+LATEST_WAIT = 3.0        # latest.jpg 가 첫 프레임을 기다리는 시간
+STALE_SECONDS = 5.0      # 이보다 오래된 프레임은 latest.jpg 로 주지 않음
+KEEPALIVE = 5.0
+MAX_LINE = 1024
+MAX_FRAME_BYTES = 8 * 1024 * 1024
+
+
+def _boundary(content_type):
+    for param in content_type.split(';')[1:]:
+        key, _, value = param.strip().partition('=')
+        if key.lower() == 'boundary':
+            return value.strip('"').encode()
+    raise ValueError(f"multipart boundary 가 없습니다: {content_type}")
+
+
+def open_stream(url):
+    """MJPEG 스트림에 연결합니다. (http.client 응답은 readline/read 가 도착한 만큼 바로 돌려줌)"""
+    u = urlsplit(url)
+    conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=CONNECT_TIMEOUT)
+    try:
+        conn.request('GET', u.path + (f'?{u.query}' if u.query else ''))
+        # 연결 후에는 읽기 제한 시간 (HTTP/1.0 응답이면 getresponse() 뒤 conn.sock 이 비워짐)
+        conn.sock.settimeout(READ_TIMEOUT)
+        res = conn.getresponse()
+        if res.status != 200:
+            raise ConnectionError(f"HTTP {res.status}")
+    except BaseException:
+        conn.close()
+        raise
+    return res
+
+
+def iter_frames(reader, boundary):
+    """MJPEG(multipart) 스트림에서 JPEG 프레임(bytes)을 차례로 꺼냅니다.
+
+    Content-Length 가 있으면 그만큼 한 번에 읽고, 없으면 다음 경계선까지 모읍니다.
+    """
+    delim = b'--' + boundary
+    at_boundary = False
+    while True:
+        if not at_boundary:
+            line = reader.readline(MAX_LINE)
+            if not line:
+                return
+            if not line.startswith(delim):
+                continue   # 프리앰블, 프레임 뒤 CRLF
+        at_boundary = False
+        length = None
+        while True:
+            header = reader.readline(MAX_LINE)
+            if not header:
+                return
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        if length is not None:
+            if length > MAX_FRAME_BYTES:
+                raise ValueError(f"프레임이 너무 큽니다: {length} bytes")
+            frame = reader.read(length)
+            if len(frame) < length:
+                return
+        else:
+            chunks, size = [], 0
+            while True:
+                line = reader.readline(64 * 1024)
+                if not line:
+                    return
+                if line.startswith(delim):
+                    at_boundary = True
+                    break
+                chunks.append(line)
+                size += len(line)
+                if size > MAX_FRAME_BYTES:
+                    raise ValueError("프레임이 너무 큽니다.")
+            frame = b''.join(chunks)
+            if frame.endswith(b'\r\n'):
+                frame = frame[:-2]
+        yield frame
+
+
+class CameraFeed:
+    """카메라 하나의 업스트림 연결과 최신 프레임 버퍼"""
+
+    def __init__(self, cam_id, url):
+        self.cam_id = cam_id
+        self.url = url
+        self._cond = threading.Condition()
+        self._thread = None
+        self.seq = 0
+        self.frame = None
+        self.part_head = None
+        self.frame_at = 0.0
+        self.subscribers = 0
+        self.last_wanted = time.monotonic()
+        self.connected = False
+        self.connects = 0
+        self.errors = 0
+        self.frames = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.last_error = None
+
+    # --- 업스트림 ---
+
+    def ensure_running(self):
+        with self._cond:
+            self.last_wanted = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'camera-{self.cam_id}', daemon=True)
+                self._thread.start()
+
+    def _idle(self):
+        return self.subscribers == 0 and time.monotonic() - self.last_wanted > IDLE_TIMEOUT
+
+    def _publish(self, frame):
+        head = (b'--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\nContent-Length: '
+                + str(len(frame)).encode() + b'\r\n\r\n')
+        with self._cond:
+            self.seq += 1
+            self.frame, self.part_head, self.frame_at = frame, head, time.monotonic()
+            self.frames += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        delay = 0.5
+        while not self._idle():
+            try:
+                with open_stream(self.url) as res:
+                    boundary = _boundary(res.getheader('Content-Type', ''))
+                    self.connects += 1
+                    self.connected = True
+                    delay = 0.5
+                    for frame in iter_frames(res, boundary):
+                        self._publish(frame)
+                        if self._idle():
+                            break
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+            self.connected = False
+            if self._idle():
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+        with self._cond:
+            self._thread = None
+
+    # --- 시청자 ---
+
+    def wait_frame(self, after_seq, timeout):
+        """after_seq 보다 새 프레임이 생기면 (seq, 파트 헤더, 프레임) 을 돌려줍니다. 시간 초과면 None"""
+        with self._cond:
+            if self.seq <= after_seq:
+                self._cond.wait(timeout)
+            if self.seq <= after_seq or self.frame is None:
+                return None
+            return self.seq, self.part_head, self.frame
+
+    def subscribe(self):
+        with self._cond:
+            self.subscribers += 1
+        self.ensure_running()
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+            self.last_wanted = time.monotonic()
+
+    def stream(self, min_interval=0.0):
+        """시청자 한 명의 multipart 응답 본문 (항상 최신 프레임, 밀린 프레임은 건너뜀)"""
+        self.subscribe()
+        try:
+            last = self.seq
+            while True:
+                got = self.wait_frame(last, KEEPALIVE)
+                if got is None:
+                    self.ensure_running()   # 업스트림이 끊겼다가 멈췄으면 다시 시작
+                    continue
+                seq, head, frame = got
+                if last:
+                    self.dropped += max(0, seq - last - 1)
+                last = seq
+                self.delivered += 1
+                yield head
+                yield frame
+                yield b'\r\n'
+                if min_interval:
+                    time.sleep(min_interval)
+        finally:
+            self.unsubscribe()
+
+    def latest(self, wait=LATEST_WAIT):
+        self.ensure_running()
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while self.frame is None or time.monotonic() - self.frame_at > STALE_SECONDS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self.seq, self.frame
+
+    def stats(self):
+        return {"url": self.url, "connected": self.connected, "subscribers": self.subscribers,
+                "connects": self.connects, "errors": self.errors, "last_error": self.last_error,
+                "frames": self.frames, "delivered": self.delivered, "dropped": self.dropped}
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed(cam_id):
+    with _feeds_lock:
+        feed = _feeds.get(cam_id)
+        if feed is None or feed.url != CAMERAS.get(cam_id):
+            if cam_id not in CAMERAS:
+                return None
+            feed = _feeds[cam_id] = CameraFeed(cam_id, CAMERAS[cam_id])
+        return feed
+
+
+# --- 라우트 ---
+
+@camera_bp.route('/camera/<cam_id>/stream.mjpg', methods=['GET'])
+def camera_stream(cam_id):
+    feed = get_feed(cam_id)
+    if feed is None:
+        return jsonify({"success": False, "message": f"알 수 없는 카메라: {cam_id}"}), 404
+    fps = request.args.get('fps', type=float)
+    headers = {"Cache-Control": "no-cache, private", "X-Accel-Buffering": "no"}
+    return Response(feed.stream(1.0 / fps if fps else 0.0), headers=headers,
+                    mimetype=f'multipart/x-mixed-replace; boundary={BOUNDARY.decode()}')
+
+
+@camera_bp.route('/camera/<cam_id>/latest.jpg', methods=['GET'])
+def camera_latest(cam_id):
+    feed = get_feed(cam_id)
+    if feed is None:
+        return jsonify({"success": False, "message": f"알 수 없는 카메라: {cam_id}"}), 404
+    got = feed.latest()
+    if got is None:
+        return jsonify({"success": False, "message": "카메라 프레임을 받을 수 없습니다.", "error": feed.last_error}), 503
+    seq, frame = got
+    etag = f"{cam_id}-{feed.connects}-{seq}"
+    if etag in request.if_none_match:
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+    res = Response(frame, mimetype='image/jpeg')
+    res.set_etag(etag)
+    res.cache_control.no_cache = True
+    return res
+
+
+@camera_bp.route('/api/cameras', methods=['GET'])
+def camera_stats():
+    return jsonify({cam_id: get_feed(cam_id).stats() for cam_id in CAMERAS})
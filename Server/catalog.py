@@ -0,0 +1,299 @@
+import io
+import csv
+import json
+import time
+import sqlite3
+from flask import Blueprint, Response, request, jsonify
+
+import db
+
+# =========================================================
+# ▼ [상품 일괄 처리] CSV/NDJSON 가져오기 · 내보내기 · 재고 증감
+# =========================================================
+# - 본문을 한 줄씩 읽으며 CHUNK_ROWS 줄마다 한 트랜잭션으로 upsert 합니다.
+#   (파렛트 하나 200 SKU 를 200번 요청/커밋하던 것을 요청 1번으로)
+# - 잘못된 줄은 건너뛰고 줄 번호와 이유를 돌려줍니다. 나머지 줄은 그대로 반영됩니다.
+# - 재고 증감(delta)은 UPDATE ... SET stock = stock + ? 한 문장이라 동시에 들어와도 잃어버리는 값이 없고,
+#   결과가 0 미만이 되는 줄은 거절합니다. (allow_negative=1 이면 허용)
+#
+#   POST /api/products/import[?format=csv|ndjson]    본문 또는 multipart file
+#        컬럼: item_code(필수), product_name, brand, category, color, size, stock
+#        이미 있는 품목은 보낸 컬럼만 바꿉니다. 새 품목은 stock(기본 0) 외 모든 컬럼이 필요합니다.
+#   POST /api/products/stock[?format=json|csv|ndjson][&allow_negative=1]
+#        {"adjustments": [{"item_code": "..", "delta": -2}, ...]}  또는 item_code,delta CSV/NDJSON
+#   GET  /api/products/export[?format=csv|ndjson][&brand=Puma]   스트리밍 내보내기
+
+catalog_bp = Blueprint('catalog', __name__)
+
+COLUMNS = ("item_code", "product_name", "brand", "category", "color", "size", "stock")
+CHUNK_ROWS = 5000
+MAX_ERRORS = 1000          # 응답에 담는 오류 줄 수 상한 (개수는 모두 셈)
+MAX_FIELD = 200
+EXPORT_BATCH = 2000
+
+# 빈 컬럼은 기존 값으로 채움 (NOT NULL 검사가 ON CONFLICT 보다 먼저라 VALUES 에서 채워야 함)
+# → 기존 품목은 보낸 컬럼만 바뀌고, 새 품목은 빈 컬럼이 있으면 NOT NULL 오류 (stock 만 기본 0)
+UPSERT = f"""INSERT INTO products ({', '.join(COLUMNS)}) VALUES (?1, {', '.join(
+    f'COALESCE(?{i}, (SELECT {c} FROM products WHERE item_code = ?1))' for i, c in enumerate(COLUMNS[1:-1], 2))},
+    COALESCE(?7, (SELECT stock FROM products WHERE item_code = ?1), 0))
+    ON CONFLICT(item_code) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in COLUMNS[1:])}"""
+
+ADJUST = "UPDATE products SET stock = stock + ? WHERE item_code = ? AND (? OR stock + ? >= 0)"
+
+
+class RowError(ValueError):
+    pass
+
+
+# --- 입력 읽기 ---
+
+def _input_stream():
+    """업로드 파일(multipart) 또는 요청 본문을 텍스트 스트림으로 (한 번에 다 읽지 않음)"""
+    upload = request.files.get('file')
+    raw = upload.stream if upload else request.stream
+    if not hasattr(raw, 'readable'):
+        raw = io.BufferedReader(raw)
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+
+def _format(default):
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt.lower()
+    upload = request.files.get('file')
+    name = (upload.filename or '') if upload else ''
+    mime = (upload.mimetype if upload else request.mimetype) or ''
+    if name.endswith('.csv') or mime in ('text/csv', 'application/csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or mime in ('application/x-ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return default
+
+
+def iter_records(text, fmt):
+    """(줄 번호, dict 또는 RowError) 를 차례로 돌려줍니다."""
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k.strip(): v for k, v in row.items() if k}
+    elif fmt == 'ndjson':
+        for line_no, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                yield line_no, RowError(f"JSON 형식 오류: {e}")
+                continue
+            yield line_no, obj if isinstance(obj, dict) else RowError("JSON 객체가 아닙니다.")
+    else:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt} (csv, ndjson)")
+
+
+def _text(record, key):
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    if len(value) > MAX_FIELD:
+        raise RowError(f"{key} 가 너무 깁니다.")
+    return value or None
+
+
+def _int(record, key):
+    value = record.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{key} 는 정수여야 합니다: {value!r}")
+
+
+def product_row(record):
+    item_code = _text(record, 'item_code')
+    if not item_code:
+        raise RowError("item_code 가 없습니다.")
+    stock = _int(record, 'stock')
+    if stock is not None and stock < 0:
+        raise RowError("stock 은 0 이상이어야 합니다.")
+    return (item_code, *(_text(record, c) for c in COLUMNS[1:-1]), stock)
+
+
+def adjustment_row(record):
+    item_code = _text(record, 'item_code')
+    if not item_code:
+        raise RowError("item_code 가 없습니다.")
+    delta = _int(record, 'delta')
+    if delta is None:
+        raise RowError("delta 가 없습니다.")
+    return delta, item_code
+
+
+# --- 적용 ---
+
+class _Report:
+    def __init__(self):
+        self.rows = 0
+        self.applied = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, item_code, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"line": line, "item_code": item_code, "error": message})
+
+    def result(self, started, **extra):
+        return {"success": self.error_count == 0, "rows": self.rows, "applied": self.applied,
+                "error_count": self.error_count, "errors": sorted(self.errors, key=lambda e: e["line"]),
+                "truncated": self.error_count > len(self.errors),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1), **extra}
+
+
+def _chunks(records, to_row, report):
+    """검증된 (줄 번호, 행) 을 CHUNK_ROWS 개씩 묶어 돌려줍니다."""
+    chunk = []
+    for line, record in records:
+        report.rows += 1
+        try:
+            if isinstance(record, RowError):
+                raise record
+            chunk.append((line, to_row(record)))
+        except RowError as e:
+            report.error(line, record.get('item_code') if isinstance(record, dict) else None, str(e))
+            continue
+        if len(chunk) >= CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_products(conn, records):
+    """레코드를 upsert 합니다. 묶음 하나가 한 트랜잭션이고, 실패한 줄만 빠집니다."""
+    report = _Report()
+    for chunk in _chunks(records, product_row, report):
+        with db.immediate(conn):
+            conn.execute("SAVEPOINT chunk")
+            try:
+                conn.executemany(UPSERT, [row for _, row in chunk])
+                conn.execute("RELEASE chunk")
+                report.applied += len(chunk)
+                continue
+            except sqlite3.Error:
+                conn.execute("ROLLBACK TO chunk")
+                conn.execute("RELEASE chunk")
+            # 묶음 안에 실패한 줄이 있으면 한 줄씩 다시 (새 품목인데 컬럼이 빠진 경우 등)
+            for line, row in chunk:
+                try:
+                    conn.execute(UPSERT, row)
+                    report.applied += 1
+                except sqlite3.IntegrityError as e:
+                    missing = [c for c, v in zip(COLUMNS[:-1], row) if v is None]
+                    message = f"새 품목에 필요한 값이 없습니다: {', '.join(missing)}" if missing else str(e)
+                    report.error(line, row[0], message)
+    return report
+
+
+def adjust_stock(conn, records, allow_negative=False):
+    """재고를 상대값만큼 바꿉니다. 없는 품목이나 0 미만이 되는 줄은 오류로 남깁니다."""
+    report = _Report()
+    for chunk in _chunks(records, adjustment_row, report):
+        with db.immediate(conn):
+            cursor = conn.cursor()
+            for line, (delta, item_code) in chunk:
+                cursor.execute(ADJUST, (delta, item_code, allow_negative, delta))
+                if cursor.rowcount:
+                    report.applied += 1
+                elif conn.execute("SELECT 1 FROM products WHERE item_code = ?", (item_code,)).fetchone():
+                    report.error(line, item_code, "재고가 부족합니다.")
+                else:
+                    report.error(line, item_code, "없는 품목입니다.")
+    return report
+
+
+# --- 내보내기 ---
+
+def export_rows(brand=None):
+    """전용 연결로 EXPORT_BATCH 줄씩 읽어 돌려줍니다. (풀 연결을 오래 잡지 않음)"""
+    conn = db.connect()
+    try:
+        sql = f"SELECT {', '.join(COLUMNS)} FROM products"
+        params = ()
+        if brand:
+            sql += " WHERE brand = ?"
+            params = (brand,)
+        cursor = conn.execute(sql + " ORDER BY item_code", params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def _csv_chunks(batches):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    for rows in batches:
+        writer.writerows(tuple(r) for r in rows)
+        yield out.getvalue().encode('utf-8')
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue().encode('utf-8')
+
+
+def _ndjson_chunks(batches):
+    for rows in batches:
+        yield "".join(json.dumps(dict(zip(COLUMNS, r)), ensure_ascii=False) + "\n" for r in rows).encode('utf-8')
+
+
+# --- 라우트 ---
+
+@catalog_bp.route('/api/products/import', methods=['POST'])
+def import_route():
+    started = time.perf_counter()
+    try:
+        records = iter_records(_input_stream(), _format('csv'))
+        report = import_products(db.get_db_connection(), records)
+    except (ValueError, csv.Error, UnicodeDecodeError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify(report.result(started))
+
+
+@catalog_bp.route('/api/products/stock', methods=['POST'])
+def stock_route():
+    started = time.perf_counter()
+    allow_negative = request.args.get('allow_negative') in ('1', 'true')
+    try:
+        fmt = _format('json')
+        if fmt == 'json':
+            data = request.get_json(silent=True) or {}
+            adjustments = data.get('adjustments')
+            if not isinstance(adjustments, list):
+                return jsonify({"success": False, "message": "adjustments 목록이 필요합니다."}), 400
+            records = ((i, a if isinstance(a, dict) else RowError("객체가 아닙니다.")) for i, a in enumerate(adjustments, 1))
+        else:
+            records = iter_records(_input_stream(), fmt)
+        report = adjust_stock(db.get_db_connection(), records, allow_negative)
+    except (ValueError, csv.Error, UnicodeDecodeError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify(report.result(started))
+
+
+@catalog_bp.route('/api/products/export', methods=['GET'])
+def export_route():
+    fmt = (request.args.get('format') or 'csv').lower()
+    brand = request.args.get('brand')
+    if fmt == 'csv':
+        body, mime, ext = _csv_chunks(export_rows(brand)), 'text/csv; charset=utf-8', 'csv'
+    elif fmt == 'ndjson':
+        body, mime, ext = _ndjson_chunks(export_rows(brand)), 'application/x-ndjson', 'ndjson'
+    else:
+        return jsonify({"success": False, "message": f"지원하지 않는 형식입니다: {fmt} (csv, ndjson)"}), 400
+    return Response(body, mimetype=mime,
+                    headers={"Content-Disposition": f'attachment; filename="products.{ext}"'})
@@ -0,0 +1,242 @@
+import json
+import time
+import threading
+from collections import deque
+from flask import Blueprint, request, jsonify
+
+import db
+from db import get_db_connection
+
+# =========================================================
+# ▼ [공정 명령 큐] 라인/디팔렛타이저 작업을 DB 에 영구 저장하는 작업 큐
+# =========================================================
+# 상태: queued → dispatched → done / failed
+# - 디스패처는 dequeue_batch() 로 여러 건을 한 번에 임대(lease)합니다.
+# - 임대 시간 안에 ack() 하지 않으면 다시 queued 로 취급되어 다른 디스패처가 가져갑니다.
+# - fail() 은 MAX_ATTEMPTS 미만이면 다시 queued, 넘으면 failed 로 남깁니다.
+# - 최근 접수 내역은 메모리 링 버퍼(RECENT_MAX 건)로 /factory/api/get_orders 에 제공합니다.
+#   (enqueue 한 쪽이 커밋한 뒤 remember() 로 넣음)
+
+queue_bp = Blueprint('command_queue', __name__)
+
+KINDS = ("line", "depalletizer")
+LEASE_SECONDS = 30.0
+MAX_ATTEMPTS = 3
+DEQUEUE_MAX = 100
+IDS_MAX = 1000         # ack/fail/extend 한 번에 받을 최대 id 수
+RECENT_MAX = 50
+DONE_KEEP_DAYS = 7
+
+_recent = deque(maxlen=RECENT_MAX)
+_recent_lock = threading.Lock()
+_recent_loaded = False
+_last_purge = 0.0
+
+
+def create_schema(cursor):
+    """factory_commands 테이블을 만듭니다. (migrations.py 에서 호출)"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS factory_commands (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL, command TEXT, state TEXT NOT NULL DEFAULT 'queued', attempts INTEGER NOT NULL DEFAULT 0, lease_owner TEXT, lease_until REAL, error TEXT, created_at TEXT DEFAULT (datetime('now', 'localtime')), updated_at TEXT DEFAULT (datetime('now', 'localtime')))''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_factory_commands_state ON factory_commands (kind, state, id)")
+
+
+def _row(r):
+    return {"id": r['id'], "kind": r['kind'], "payload": json.loads(r['payload']), "command": r['command'],
+            "state": r['state'], "attempts": r['attempts']}
+
+
+def enqueue(conn, kind, payload, command=None):
+    """작업을 queued 상태로 추가합니다. 커밋은 호출한 쪽에서 하고, 커밋이 끝나면 remember() 를 불러 주세요."""
+    if kind not in KINDS:
+        raise ValueError(f"알 수 없는 작업 종류: {kind}")
+    cur = conn.execute("INSERT INTO factory_commands (kind, payload, command) VALUES (?, ?, ?)",
+                       (kind, json.dumps(payload, ensure_ascii=False), command))
+    return cur.lastrowid
+
+
+def remember(command_id, kind, payload, command=None):
+    """커밋된 작업을 최근 접수 링 버퍼에 넣습니다. (롤백된 작업이 목록에 남지 않도록 커밋 뒤에만 호출)"""
+    with _recent_lock:
+        _recent.append({"id": command_id, "kind": kind, "command": command, **payload})
+
+
+def dequeue_batch(conn, kind, owner, limit=DEQUEUE_MAX, lease=LEASE_SECONDS):
+    """queued 이거나 임대가 만료된 작업을 최대 limit 건 임대합니다.
+
+    limit 은 1~DEQUEUE_MAX 로 맞춥니다. (SQLite 의 음수 LIMIT 은 '전부') 임대 시간도 1초 미만이면 1초로 봅니다.
+    """
+    limit = max(1, min(limit, DEQUEUE_MAX))
+    lease = max(1.0, lease)
+    now = time.time()
+    with db.immediate(conn):
+        conn.execute("""UPDATE factory_commands SET state='failed', error='임대 만료 (재시도 초과)', lease_owner=NULL,
+                            updated_at=datetime('now', 'localtime')
+                        WHERE kind=? AND state='dispatched' AND lease_until < ? AND attempts >= ?""",
+                     (kind, now, MAX_ATTEMPTS))
+        rows = conn.execute("""UPDATE factory_commands SET state='dispatched', lease_owner=?, lease_until=?,
+                                   attempts=attempts+1, updated_at=datetime('now', 'localtime')
+                               WHERE id IN (SELECT id FROM factory_commands
+                                            WHERE kind=? AND (state='queued' OR (state='dispatched' AND lease_until < ?))
+                                            ORDER BY id LIMIT ?)
+                               RETURNING id, kind, payload, command, state, attempts""",
+                            (owner, now + lease, kind, now, limit)).fetchall()
+    return sorted((_row(r) for r in rows), key=lambda c: c['id'])
+
+
+def ack(conn, ids, owner):
+    """임대 중인 작업을 done 으로 바꿉니다. 반영된 건수를 반환합니다."""
+    ids = list(ids)
+    cur = conn.execute(f"""UPDATE factory_commands SET state='done', lease_owner=NULL, lease_until=NULL,
+                               updated_at=datetime('now', 'localtime')
+                           WHERE id IN ({','.join('?' * len(ids))}) AND state='dispatched' AND lease_owner=?""",
+                       ids + [owner])
+    conn.commit()
+    return cur.rowcount
+
+
+def fail(conn, ids, owner, error=''):
+    """임대 중인 작업을 실패 처리합니다. 재시도 횟수가 남았으면 다시 queued 로 돌립니다."""
+    ids = list(ids)
+    cur = conn.execute(f"""UPDATE factory_commands
+                           SET state=CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                               error=?, lease_owner=NULL, lease_until=NULL, updated_at=datetime('now', 'localtime')
+                           WHERE id IN ({','.join('?' * len(ids))}) AND state='dispatched' AND lease_owner=?""",
+                       [MAX_ATTEMPTS, error] + ids + [owner])
+    conn.commit()
+    return cur.rowcount
+
+
+def extend(conn, ids, owner, lease=LEASE_SECONDS):
+    """임대 시간을 지금부터 lease 초로 늘립니다. (dequeue_batch 와 같이 1초 미만이면 1초)"""
+    lease = max(1.0, lease)
+    ids = list(ids)
+    cur = conn.execute(f"""UPDATE factory_commands SET lease_until=?
+                           WHERE id IN ({','.join('?' * len(ids))}) AND state='dispatched' AND lease_owner=?""",
+                       [time.time() + lease] + ids + [owner])
+    conn.commit()
+    return cur.rowcount
+
+
+def purge(conn):
+    # 끝난 작업은 DONE_KEEP_DAYS 일 지나면 정리 (10분에 한 번)
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < 600:
+        return
+    _last_purge = now
+    conn.execute("DELETE FROM factory_commands WHERE state='done' AND updated_at < datetime('now', 'localtime', ?)",
+                 (f"-{DONE_KEEP_DAYS} days",))
+    conn.commit()
+
+
+def counts(conn):
+    rows = conn.execute("SELECT kind, state, count(*) AS n FROM factory_commands GROUP BY kind, state").fetchall()
+    result = {k: {"queued": 0, "dispatched": 0, "done": 0, "failed": 0} for k in KINDS}
+    for r in rows:
+        result.setdefault(r['kind'], {})[r['state']] = r['n']
+    return result
+
+
+def recent(conn, kind=None, limit=RECENT_MAX):
+    """최근 접수 작업 (링 버퍼). 재시작 직후에는 DB 에서 한 번 채웁니다."""
+    global _recent_loaded
+    with _recent_lock:
+        if not _recent_loaded:
+            rows = conn.execute("SELECT id, kind, payload, command FROM factory_commands ORDER BY id DESC LIMIT ?",
+                                (RECENT_MAX,)).fetchall()
+            _recent.clear()
+            _recent.extend({"id": r['id'], "kind": r['kind'], "command": r['command'], **json.loads(r['payload'])}
+                           for r in reversed(rows))
+            _recent_loaded = True
+        items = [e for e in _recent if kind is None or e['kind'] == kind]
+    return items[-limit:][::-1]
+
+
+# --- 라우트 ---
+
+# 디팔렛타이저 작업 등록 (WinForms main.cs StartDepalletizerWorkAsync)
+@queue_bp.route('/api/depalletizer/start', methods=['POST'])
+def depalletizer_start():
+    try:
+        d = request.get_json()
+        if not d or not d.get('order_id'):
+            return jsonify({"success": False, "message": "order_id 가 필요합니다."}), 400
+        payload = {
+            "order_id": d.get('order_id'),
+            "action": d.get('action', 'move_from_car_to_shelf'),
+            "source": d.get('source', 'arduino_car'),
+            "target_slot": d.get('target_slot'),
+            "time": time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        conn = get_db_connection()
+        command_id = enqueue(conn, "depalletizer", payload)
+        conn.commit()
+        remember(command_id, "depalletizer", payload)
+        return jsonify({"success": True, "command_id": command_id})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+# 디스패처: 작업 일괄 임대 / 완료 / 실패 / 임대 연장
+@queue_bp.route('/api/commands/dequeue', methods=['POST'])
+def dequeue_commands():
+    d = request.get_json() or {}
+    kind, owner = d.get('kind', 'line'), d.get('owner')
+    if kind not in KINDS or not owner:
+        return jsonify({"success": False, "message": "kind, owner 가 필요합니다."}), 400
+    try:
+        limit, lease = int(d.get('limit', 10)), float(d.get('lease', LEASE_SECONDS))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "limit, lease 는 숫자여야 합니다."}), 400
+    if limit < 1 or not lease >= 1:
+        return jsonify({"success": False, "message": "limit 은 1 이상, lease 는 1초 이상이어야 합니다."}), 400
+    conn = get_db_connection()
+    commands = dequeue_batch(conn, kind, owner, limit, lease)
+    purge(conn)
+    return jsonify({"success": True, "commands": commands, "lease": lease})
+
+
+def _ids_owner(d):
+    """요청 본문의 ids(정수 목록), owner 확인 → (ids, owner, 오류 응답 또는 None)"""
+    ids, owner = d.get('ids'), d.get('owner')
+    if not isinstance(ids, list) or not ids or not isinstance(owner, str) or not owner:
+        return None, None, (jsonify({"success": False, "message": "ids(목록), owner 가 필요합니다."}), 400)
+    if len(ids) > IDS_MAX or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return None, None, (jsonify({"success": False, "message": f"ids 는 정수 {IDS_MAX} 개 이하여야 합니다."}), 400)
+    return ids, owner, None
+
+
+@queue_bp.route('/api/commands/ack', methods=['POST'])
+def ack_commands():
+    ids, owner, error = _ids_owner(request.get_json(silent=True) or {})
+    if error:
+        return error
+    return jsonify({"success": True, "updated": ack(get_db_connection(), ids, owner)})
+
+
+@queue_bp.route('/api/commands/fail', methods=['POST'])
+def fail_commands():
+    d = request.get_json(silent=True) or {}
+    ids, owner, error = _ids_owner(d)
+    if error:
+        return error
+    return jsonify({"success": True, "updated": fail(get_db_connection(), ids, owner, str(d.get('error', '')))})
+
+
+@queue_bp.route('/api/commands/extend', methods=['POST'])
+def extend_commands():
+    d = request.get_json(silent=True) or {}
+    ids, owner, error = _ids_owner(d)
+    if error:
+        return error
+    try:
+        lease = float(d.get('lease', LEASE_SECONDS))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "lease 는 숫자여야 합니다."}), 400
+    if not lease >= 1:
+        return jsonify({"success": False, "message": "lease 는 1초 이상이어야 합니다."}), 400
+    return jsonify({"success": True, "updated": extend(get_db_connection(), ids, owner, lease)})
+
+
+@queue_bp.route('/api/commands/stats', methods=['GET'])
+def command_stats():
+    return jsonify(counts(get_db_connection()))
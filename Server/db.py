@@ -0,0 +1,199 @@
+import time
+import sqlite3
+import threading
+import queue
+import atexit
+from contextlib import contextmanager
+from flask import g, has_app_context
+
+# =========================================================
+# ▼ [공용 DB 계층] appp.py / mock_factory.py 가 함께 사용
+# =========================================================
+# - 요청마다 connect/close 하지 않고 풀에서 연결을 빌려 쓰고 돌려줍니다.
+# - WAL 모드 + busy_timeout 으로 'database is locked' 오류를 줄입니다.
+# - sqlite3 의 cached_statements 로 자주 쓰는 SQL 의 prepare 결과를 재사용합니다.
+
+DATABASE_FILE = 'mydatabase.db'
+
+POOL_SIZE = 8               # 풀에 보관할 유휴 연결 최대 개수 (0 이면 매번 새로 연결 후 닫음)
+STATEMENT_CACHE_SIZE = 256  # 연결당 prepared statement 캐시 크기
+BUSY_TIMEOUT = 5.0          # 잠금 대기 시간(초)
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=67108864",
+]
+
+_pool = queue.LifoQueue()
+_local = threading.local()
+_lock = threading.Lock()
+_all_conns = set()
+_generation = 0             # close_all() 이후 스레드별 연결을 다시 만들도록 하는 세대 번호
+
+TIMING = True               # 쿼리 시간 측정 (스레드별 누적, metrics.py 가 요청마다 읽음)
+
+# 요청 중 DB 에 쓰기가 있었으면 요청 종료 시 호출되는 함수들 (예: events.notify)
+write_hooks = []
+
+
+_timing = threading.local()
+
+
+def _timed(method):
+    def wrapper(self, *args):
+        t0 = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            _timing.seconds = getattr(_timing, 'seconds', 0.0) + time.perf_counter() - t0
+            _timing.calls = getattr(_timing, 'calls', 0) + 1
+    return wrapper
+
+
+class TimedCursor(sqlite3.Cursor):
+    """execute / fetch 에 걸린 시간을 현재 스레드에 누적합니다.
+    (for row in cursor 로 한 줄씩 읽는 시간은 첫 execute 만 포함)"""
+    execute = _timed(sqlite3.Cursor.execute)
+    executemany = _timed(sqlite3.Cursor.executemany)
+    executescript = _timed(sqlite3.Cursor.executescript)
+    fetchone = _timed(sqlite3.Cursor.fetchone)
+    fetchmany = _timed(sqlite3.Cursor.fetchmany)
+    fetchall = _timed(sqlite3.Cursor.fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # conn.execute() 단축 메서드도 TimedCursor 를 거치게 함 (기본 구현은 cursor() 를 부르지 않음)
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def query_time(reset=False):
+    """현재 스레드가 누적한 (쿼리 시간(초), 호출 수). reset=True 면 0 으로 되돌림"""
+    result = getattr(_timing, 'seconds', 0.0), getattr(_timing, 'calls', 0)
+    if reset:
+        _timing.seconds, _timing.calls = 0.0, 0
+    return result
+
+
+def connect():
+    """풀과 무관한 전용 연결을 엽니다. (오래 유지되는 스트림 등, 사용 후 직접 close)"""
+    conn = sqlite3.connect(DATABASE_FILE, timeout=BUSY_TIMEOUT,
+                           check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE,
+                           factory=TimedConnection if TIMING else sqlite3.Connection)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _connect():
+    conn = connect()
+    with _lock:
+        _all_conns.add(conn)
+    return conn
+
+
+def _close(conn):
+    with _lock:
+        _all_conns.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _acquire():
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _connect()
+
+
+def _release(conn):
+    # 커밋되지 않은 작업은 버리고 깨끗한 상태로 풀에 반납
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error:
+        _close(conn)
+        return
+    if _pool.qsize() >= POOL_SIZE:
+        _close(conn)
+    else:
+        _pool.put(conn)
+
+
+def get_db_connection():
+    """현재 요청(또는 스레드)에 묶인 풀 연결을 반환합니다. close() 하지 마세요."""
+    if has_app_context():
+        conn = g.get('_db_conn')
+        if conn is None:
+            conn = g._db_conn = _acquire()
+            g._db_changes = conn.total_changes
+        return conn
+
+    # 요청 밖(초기화 코드, 백그라운드 스레드)은 스레드별 연결을 재사용
+    if getattr(_local, 'generation', None) != _generation:
+        _local.conn = _connect()
+        _local.generation = _generation
+    return _local.conn
+
+
+def release_db_connection(exc=None):
+    conn = g.pop('_db_conn', None)
+    if conn is None:
+        return
+    wrote = conn.total_changes != g.pop('_db_changes', conn.total_changes)
+    _release(conn)
+    if wrote:
+        for hook in write_hooks:
+            hook()
+
+
+def close_all():
+    """풀/스레드에 남아 있는 모든 연결을 닫습니다. (앱 종료, 벤치마크 설정 변경 시)"""
+    global _generation
+    while True:
+        try:
+            _pool.get_nowait()
+        except queue.Empty:
+            break
+    with _lock:
+        conns = list(_all_conns)
+    for conn in conns:
+        _close(conn)
+    _generation += 1
+
+
+@contextmanager
+def immediate(conn):
+    """BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡고, 블록이 끝나면 COMMIT (예외 시 ROLLBACK)"""
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def init_app(app):
+    app.teardown_appcontext(release_db_connection)
+
+
+atexit.register(close_all)
@@ -0,0 +1,424 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, jsonify
+
+import db
+import http_client
+import command_queue
+from http_client import LatencyHistogram
+from mock_factory import BRAND_CODES
+
+# =========================================================
+# ▼ [명령 디스패처] 라인/아두이노카 제어 명령 병합 + 장치별 전송 속도 제한
+# =========================================================
+# - 라인(line): command_queue 의 대기 주문을 브랜드별로 합쳐 최소 개수의 <B3U1..> 프레임으로 보냅니다.
+# - 아두이노카(car): FORWARD/STOP 처럼 서로 상쇄되는 명령, 연속된 SPEED 는 마지막 값만 남깁니다.
+#   STOP 은 장치의 예상 상태와 같아도 버리지 않습니다. (안전)
+# - 장치마다 초당 전송 횟수(토큰 버킷)와 동시 전송 수(in-flight window)를 제한합니다.
+# - 전송은 교체 가능한 transport 로 합니다. (HttpTransport: 실제 장치, LoopbackTransport: 점검용)
+# - stats() 로 장치별 대기 건수, 병합/상쇄 건수, 접수→전송 완료 지연 시간을 확인합니다.
+# - 서버 공용 디스패처는 create_app() 만 시작합니다. (python appp.py, 또는 DISPATCHER_AUTOSTART=1)
+#   시작하지 않았으면 /api/device/.../command, /api/dispatcher/stats 는 503 을 돌려주고 장치에 아무것도 보내지 않습니다.
+
+dispatcher_bp = Blueprint('dispatcher', __name__)
+
+# 장치 설정: 주소, 초당 전송 수, 버스트, 동시 전송 수
+DEVICES = {
+    "car":  {"url": "http://192.168.0.7:80/", "rate": 5.0, "burst": 2, "window": 1},
+    "line": {"url": "http://192.168.0.8:80/", "rate": 2.0, "burst": 1, "window": 1},
+}
+
+MOTION_COMMANDS = ("FORWARD", "BACKWARD", "LEFT", "RIGHT", "STOP")
+MAX_FRAME_QTY = 9        # 프레임 하나에 브랜드당 최대 수량 (넘으면 프레임을 나눔)
+PUMP_INTERVAL = 1.0      # command_queue 에서 라인 작업을 가져오는 주기(초)
+PUMP_BATCH = 50
+OWNER = "dispatcher"
+
+
+# ---------------------------------------------------------
+# 명령 병합
+# ---------------------------------------------------------
+def merge_orders(orders):
+    """주문 목록([{name, quantity}])을 브랜드별 수량 합계로 합칩니다."""
+    counts = {}
+    for item in orders:
+        code = BRAND_CODES.get(item['name'])
+        if code and int(item['quantity']) > 0:
+            counts[code] = counts.get(code, 0) + int(item['quantity'])
+    return counts
+
+
+def split_counts(counts):
+    """브랜드별 수량을 프레임 단위(브랜드당 최대 MAX_FRAME_QTY)로 나눕니다."""
+    remaining = {code: qty for code, qty in counts.items() if qty > 0}
+    parts = []
+    while remaining:
+        part = {}
+        for code in list(remaining):
+            part[code] = min(remaining[code], MAX_FRAME_QTY)
+            remaining[code] -= part[code]
+            if remaining[code] == 0:
+                del remaining[code]
+        parts.append(part)
+    return parts
+
+
+def format_frame(counts):
+    return "<" + "".join(f"{code}{qty}" for code, qty in counts.items()) + ">"
+
+
+def build_frames(counts):
+    """브랜드별 수량을 최소 개수의 <B3U1..> 프레임으로 만듭니다."""
+    return [format_frame(part) for part in split_counts(counts)]
+
+
+def coalesce_controls(pending, state):
+    """아두이노카 명령 목록을 줄입니다.
+
+    pending: [{"cmd", "t", ...}], state: 장치의 (예상) 현재 상태 {"motion", "speed"}
+    이동 명령/SPEED 가 아닌 명령은 순서를 바꾸지 않는 경계로 취급합니다.
+    경계 사이에서는 마지막 이동 명령과 마지막 SPEED 만 남기고, 현재 상태와 같으면 버립니다.
+    단, STOP 은 예상 상태가 이미 STOP 이어도 항상 보냅니다. (WPF 가 ESP01 에 직접 보낸 명령은
+    여기서 모르므로 예상 상태가 틀릴 수 있음) 상쇄는 한 묶음(run) 안에서만 일어납니다.
+    """
+    result, run = [], []
+    motion, speed = state.get("motion"), state.get("speed")
+
+    def flush():
+        nonlocal motion, speed
+        last_motion = last_speed = None
+        for item in run:
+            if item["cmd"] in MOTION_COMMANDS:
+                last_motion = item
+            else:
+                last_speed = item
+        first_t = min(i["t"] for i in run) if run else None
+        keep = []
+        if last_speed and last_speed["cmd"] != f"SPEED,{speed}":
+            keep.append(last_speed)
+            speed = last_speed["cmd"].split(",", 1)[1]
+        if last_motion and (last_motion["cmd"] == "STOP" or last_motion["cmd"] != motion):
+            keep.append(last_motion)
+            motion = last_motion["cmd"]
+        keep.sort(key=lambda i: run.index(i))
+        if keep:
+            keep[0] = dict(keep[0], t=first_t)   # 합쳐진 명령 중 가장 먼저 들어온 시각 기준으로 지연 측정
+        result.extend(keep)
+        run.clear()
+
+    for item in pending:
+        cmd = item["cmd"]
+        if cmd in MOTION_COMMANDS or cmd.startswith("SPEED,"):
+            run.append(item)
+        else:
+            flush()
+            result.append(item)
+    flush()
+    return result
+
+
+def coalesce_line(pending):
+    """라인 대기분을 브랜드별로 다시 합쳐 최소 프레임으로 만듭니다.
+
+    나눠진 프레임들은 같은 batch {"ids", "left", "error", "started"} 를 공유하고,
+    batch 의 작업 id 는 모든 프레임의 전송이 끝난 뒤 한꺼번에 ack (하나라도 실패하면 fail) 합니다.
+    이미 전송을 시작한 batch 의 남은 프레임은 다시 합치지 않습니다. (다른 batch 로 id 가 넘어가지 않게)
+    """
+    started = [i for i in pending if i.get("batch") and i["batch"]["started"]]
+    rest = [i for i in pending if not (i.get("batch") and i["batch"]["started"])]
+    if not rest:
+        return started
+    counts, ids, seen = {}, [], set()
+    for item in rest:
+        for code, qty in item["counts"].items():
+            counts[code] = counts.get(code, 0) + qty
+        batch = item.get("batch")
+        if batch is None:
+            ids += item["ids"]
+        elif id(batch) not in seen:
+            seen.add(id(batch))
+            ids += batch["ids"]
+    t = min(i["t"] for i in rest)
+    parts = split_counts(counts)
+    batch = {"ids": ids, "left": len(parts), "error": None, "started": False}
+    return started + [{"cmd": format_frame(part), "counts": part, "batch": batch, "t": t} for part in parts]
+
+
+# ---------------------------------------------------------
+# 전송 (transport)
+# ---------------------------------------------------------
+class HttpTransport:
+    """ESP01/ESP32 HTTP 인터페이스로 전송합니다. (?cmd=...)"""
+
+    def send(self, device, command):
+        conf = DEVICES[device]
+        res = http_client.get(f"device_{device}", conf["url"], params={"cmd": command, "speed": 200})
+        if res.status_code >= 400:
+            raise RuntimeError(f"{device}: HTTP {res.status_code}")
+
+
+class LoopbackTransport:
+    """장치 없이 보낸 명령을 기록만 합니다. (점검/벤치마크용)"""
+
+    def __init__(self, latency=0.0, fail_every=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, device, command):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.sent.append((device, command, time.monotonic()))
+            if self.fail_every and len(self.sent) % self.fail_every == 0:
+                raise RuntimeError("loopback failure")
+
+
+for _device in DEVICES:
+    http_client.ENDPOINTS.setdefault(f"device_{_device}", {"connect": 0.3, "read": 0.5, "retries": 1})
+
+
+# ---------------------------------------------------------
+# 디스패처
+# ---------------------------------------------------------
+class _TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+
+    def wait_time(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class Dispatcher:
+    def __init__(self, transport=None, devices=None, pump_queue=True):
+        self.transport = transport or HttpTransport()
+        self.devices = devices or DEVICES
+        self.pump_queue = pump_queue
+        self._cond = threading.Condition()
+        self._pending = {d: deque() for d in self.devices}
+        self._inflight = {d: 0 for d in self.devices}
+        self._buckets = {d: _TokenBucket(c["rate"], c["burst"]) for d, c in self.devices.items()}
+        self._state = {d: {"motion": None, "speed": None} for d in self.devices}
+        self._pool = ThreadPoolExecutor(max_workers=sum(c["window"] for c in self.devices.values()))
+        self._thread = None
+        self._running = False
+        self._last_pump = 0.0
+        self._leased = set()     # command_queue 에서 임대해 온 라인 작업 id
+        self.latency = {d: LatencyHistogram() for d in self.devices}
+        self.counters = {d: {"submitted": 0, "sent": 0, "failed": 0, "coalesced": 0} for d in self.devices}
+
+    # --- 접수 ---
+    def submit(self, device, command):
+        if device not in self.devices or device == "line":
+            raise ValueError(f"알 수 없는 장치: {device} (라인 작업은 submit_orders 사용)")
+        command = command.strip().upper()
+        with self._cond:
+            self._pending[device].append({"cmd": command, "t": time.monotonic()})
+            self.counters[device]["submitted"] += 1
+            self._cond.notify()
+
+    def submit_orders(self, orders, ids=()):
+        counts = merge_orders(orders)
+        with self._cond:
+            self._pending["line"].append({"cmd": format_frame(counts), "counts": counts,
+                                          "ids": list(ids), "t": time.monotonic()})
+            self.counters["line"]["submitted"] += 1
+            self._cond.notify()
+
+    # --- 실행 ---
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="dispatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, drain=True, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while drain and time.monotonic() < deadline and self.depth() > 0:
+            time.sleep(0.01)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=True)
+
+    def depth(self):
+        with self._cond:
+            return sum(len(p) for p in self._pending.values()) + sum(self._inflight.values())
+
+    def _coalesce(self, device):
+        pending = list(self._pending[device])
+        merged = coalesce_line(pending) if device == "line" else coalesce_controls(pending, self._state[device])
+        self.counters[device]["coalesced"] += max(0, len(pending) - len(merged))
+        self._pending[device] = deque(merged)
+
+    def _pick(self):
+        """보낼 수 있는 (장치, 명령, 0) 을 고릅니다. 없으면 (None, None, 다음 확인까지 대기 시간)."""
+        wait = 1.0
+        for device, conf in self.devices.items():
+            if not self._pending[device] or self._inflight[device] >= conf["window"]:
+                continue
+            delay = self._buckets[device].wait_time()
+            if delay > 0:
+                wait = min(wait, delay)
+                continue
+            self._coalesce(device)
+            if not self._pending[device]:
+                continue
+            item = self._pending[device].popleft()
+            if item.get("batch"):
+                item["batch"]["started"] = True
+            self._buckets[device].take()
+            self._inflight[device] += 1
+            if device != "line":
+                if item["cmd"] in MOTION_COMMANDS:
+                    self._state[device]["motion"] = item["cmd"]
+                elif item["cmd"].startswith("SPEED,"):
+                    self._state[device]["speed"] = item["cmd"].split(",", 1)[1]
+            return device, item, 0.0
+        return None, None, wait
+
+    def _run(self):
+        while True:
+            if self.pump_queue and "line" in self.devices:
+                self._pump()
+            with self._cond:
+                if not self._running:
+                    return
+                device, item, wait = self._pick()
+                if device is None:
+                    self._cond.wait(min(wait, PUMP_INTERVAL))
+                    continue
+            self._pool.submit(self._deliver, device, item)
+
+    def _deliver(self, device, item):
+        error = None
+        try:
+            self.transport.send(device, item["cmd"])
+            self.latency[device].observe(time.monotonic() - item["t"])
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        with self._cond:
+            self.counters[device]["sent" if error is None else "failed"] += 1
+            if error is not None and device != "line":
+                self._state[device] = {"motion": None, "speed": None}   # 실제 상태를 모르므로 다음 명령은 그대로 전송
+            batch = item.get("batch")
+            finished = False
+            if batch is not None:
+                batch["left"] -= 1
+                batch["error"] = batch["error"] or error
+                finished = batch["left"] == 0
+        try:
+            if finished and batch["ids"]:
+                if batch["error"] is None:
+                    command_queue.ack(db.get_db_connection(), batch["ids"], OWNER)
+                else:
+                    # 프레임 하나라도 실패하면 작업 전체를 실패 처리 (재시도 횟수가 남았으면 다음 pump 때 다시 들어옴)
+                    command_queue.fail(db.get_db_connection(), batch["ids"], OWNER, batch["error"])
+        except Exception as e:
+            # ack/fail 기록 실패: 이미 보낸 프레임을 실패로 돌리지 않음 (임대가 만료되면 큐가 다시 판단)
+            print(f"🚨 [Dispatcher] 작업 상태 기록 실패: {e}")
+        finally:
+            with self._cond:
+                if finished:
+                    self._leased.difference_update(batch["ids"])
+                self._inflight[device] -= 1
+                self._cond.notify()
+
+    def _pump(self):
+        # command_queue 의 라인 작업을 임대해서 병합 대기열로 옮김
+        now = time.monotonic()
+        if now - self._last_pump < PUMP_INTERVAL:
+            return
+        self._last_pump = now
+        try:
+            conn = db.get_db_connection()
+            with self._cond:
+                leased = list(self._leased)
+                room = PUMP_BATCH - len(self._leased)
+            if leased:
+                command_queue.extend(conn, leased, OWNER)   # 아직 못 보낸 작업의 임대 연장
+            commands = command_queue.dequeue_batch(conn, "line", OWNER, room) if room > 0 else []
+        except Exception as e:
+            print(f"🚨 [Dispatcher] 작업 큐 조회 실패: {e}")
+            return
+        for c in commands:
+            with self._cond:
+                self._leased.add(c["id"])
+            self.submit_orders(c["payload"].get("details", []), [c["id"]])
+
+    def stats(self):
+        with self._cond:
+            return {
+                device: {
+                    "queue_depth": len(self._pending[device]),
+                    "inflight": self._inflight[device],
+                    **self.counters[device],
+                    "latency": self.latency[device].snapshot(),
+                }
+                for device in self.devices
+            }
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_dispatcher():
+    """서버 공용 디스패처를 시작합니다. (create_app 에서만 호출, 이미 시작했으면 그대로 반환)"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher().start()
+        return _dispatcher
+
+
+def get_dispatcher():
+    """시작된 서버 공용 디스패처, 설정으로 시작하지 않았으면 None (라우트가 새로 시작하지 않음)"""
+    return _dispatcher
+
+
+def _not_started():
+    return jsonify({"success": False, "message": "디스패처가 시작되지 않았습니다. (python appp.py 또는 DISPATCHER_AUTOSTART=1)"}), 503
+
+
+# --- 라우트 ---
+
+# 장치 제어 명령 접수 (예: {"cmd": "FORWARD"}, {"cmd": "SPEED,180"})
+@dispatcher_bp.route('/api/device/<device>/command', methods=['POST'])
+def device_command(device):
+    try:
+        cmd = (request.get_json() or {}).get('cmd')
+        if not cmd:
+            return jsonify({"success": False, "message": "cmd 가 필요합니다."}), 400
+        d = get_dispatcher()
+        if d is None:
+            return _not_started()
+        d.submit(device, cmd)
+        return jsonify({"success": True}), 202
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 404
+
+
+@dispatcher_bp.route('/api/dispatcher/stats', methods=['GET'])
+def dispatcher_stats():
+    d = get_dispatcher()
+    if d is None:
+        return _not_started()
+    return jsonify(d.stats())
@@ -0,0 +1,189 @@
+import json
+import time
+import threading
+from flask import Blueprint, Response, request, jsonify
+
+import db
+
+# =========================================================
+# ▼ [변경 피드] orders / products / slots / slot_state 변경 사항 실시간 전달
+# =========================================================
+# - 각 테이블의 INSERT/UPDATE/DELETE 는 트리거가 change_log 에 한 줄씩 기록합니다.
+#   (라우트, factory.process_order, 다른 워커 프로세스의 변경까지 모두 포함)
+# - change_log.version 은 단조 증가하므로 클라이언트는 마지막 version 부터 이어 받습니다.
+# - 같은 프로세스의 쓰기는 요청 종료 시 즉시 깨우고, 그 외에는 POLL_INTERVAL 마다 확인합니다.
+#
+#   GET /api/events?since=<version>&topics=orders,products   (SSE, Last-Event-ID 지원)
+#   GET /api/events/poll?since=<version>&timeout=25          (long-poll, JSON)
+
+events_bp = Blueprint('events', __name__)
+
+# 피드 대상 테이블: 키 컬럼, 이벤트에 실을 컬럼
+TABLES = {
+    "orders": ("id", ["id", "company", "item_name", "quantity", "order_date", "due_date",
+                      "status", "contact", "price", "note"]),
+    "products": ("item_code", ["item_code", "product_name", "brand", "category", "color", "size", "stock"]),
+    "slots": ("slot_id", ["slot_id", "x", "y", "w", "h", "is_active"]),
+    "slot_state": ("slot_id", ["slot_id", "occupied", "camera_id", "frame_id", "since"]),
+}
+
+# UPDATE 기록 조건: orders 는 updated_at 갱신용 트리거가 다시 UPDATE 하므로 그 UPDATE 는 제외
+UPDATE_WHEN = {
+    "orders": "NEW.updated_at IS OLD.updated_at",
+}
+
+CHANGE_LOG_KEEP = 50000   # change_log 에 남겨 둘 최근 변경 수
+POLL_INTERVAL = 1.0       # 다른 프로세스의 변경을 확인하는 주기(초)
+HEARTBEAT = 15.0          # SSE 연결 유지용 주석 전송 주기(초)
+BATCH_LIMIT = 500         # 한 번에 보내는 최대 이벤트 수
+
+_cond = threading.Condition()
+_seq = 0          # notify() 때마다 증가 (대기 직전에 온 알림을 놓치지 않기 위함)
+_last_prune = 0.0
+
+
+def create_schema(cursor):
+    """change_log 테이블과 기록용 트리거를 만듭니다. (migrations.py 에서 호출)"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS change_log (version INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, op TEXT NOT NULL, row_key TEXT NOT NULL, data TEXT, ts TEXT DEFAULT (datetime('now', 'localtime')))''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_change_log_topic ON change_log (topic, version)''')
+    for table, (key, cols) in TABLES.items():
+        for op, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            row_json = "json_object(" + ", ".join(f"'{c}', {ref}.{c}" for c in cols) + ")"
+            when = f"WHEN {UPDATE_WHEN[table]}" if op == "UPDATE" and table in UPDATE_WHEN else ""
+            cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()}_log AFTER {op} ON {table} {when}
+                BEGIN INSERT INTO change_log (topic, op, row_key, data) VALUES ('{table}', '{op.lower()}', {ref}.{key}, {row_json}); END''')
+
+
+def notify():
+    """대기 중인 구독자를 깨웁니다."""
+    global _seq
+    with _cond:
+        _seq += 1
+        _cond.notify_all()
+
+
+db.write_hooks.append(notify)
+
+
+def current_version(conn, topic=None):
+    if topic is None:
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log").fetchone()[0]
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log WHERE topic = ?", (topic,)).fetchone()[0]
+
+
+def oldest_version(conn):
+    return conn.execute("SELECT COALESCE(MIN(version), 0) FROM change_log").fetchone()[0]
+
+
+def fetch_changes(conn, since, topics=None, contact=None, limit=BATCH_LIMIT):
+    """since 이후 변경을 반환합니다. (events, 마지막 version, reset 필요 여부)
+
+    since 가 이미 정리된 구간이면 reset=True 를 돌려주며, 클라이언트는 목록 전체를 다시 받아야 합니다.
+    """
+    rows = conn.execute("SELECT version, topic, op, row_key, data, ts FROM change_log WHERE version > ? ORDER BY version LIMIT ?",
+                        (since, limit)).fetchall()
+    reset = False
+    if since > 0:
+        oldest, newest = conn.execute("SELECT MIN(version), MAX(version) FROM change_log").fetchone()
+        reset = newest is None or since > newest or oldest > since + 1
+    last = rows[-1]['version'] if rows else since
+
+    events = []
+    for r in rows:
+        if topics and r['topic'] not in topics:
+            continue
+        data = json.loads(r['data']) if r['data'] else None
+        # contact 지정 시(웹 주문 내역) 해당 연락처의 주문 변경만 전달
+        if contact is not None and (r['topic'] != 'orders' or data.get('contact') != contact):
+            continue
+        events.append({"version": r['version'], "topic": r['topic'], "op": r['op'],
+                       "key": r['row_key'], "data": data, "ts": r['ts']})
+    return events, last, reset
+
+
+def prune(conn):
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < 60:
+        return
+    _last_prune = now
+    conn.execute("DELETE FROM change_log WHERE version <= (SELECT MAX(version) FROM change_log) - ?", (CHANGE_LOG_KEEP,))
+    conn.commit()
+
+
+def _wait(seen, timeout):
+    # seen 이후 알림이 이미 왔으면 기다리지 않음
+    with _cond:
+        if _seq == seen:
+            _cond.wait(timeout)
+
+
+def _parse_args():
+    since = request.args.get('since', type=int)
+    if since is None:
+        since = request.headers.get('Last-Event-ID', type=int)
+    topics = set(t for t in request.args.get('topics', '').split(',') if t) or None
+    contact = request.args.get('contact')
+    return since, topics, contact
+
+
+@events_bp.route('/api/events', methods=['GET'])
+def stream_events():
+    since, topics, contact = _parse_args()
+
+    def generate():
+        conn = db.connect()   # 스트림 동안 풀 연결을 잡고 있지 않도록 전용 연결 사용
+        try:
+            last = current_version(conn) if since is None else since
+            yield f"retry: 3000\nevent: hello\ndata: {json.dumps({'version': last})}\n\n"
+            idle = 0.0
+            while True:
+                seen = _seq
+                events, new_last, reset = fetch_changes(conn, last, topics, contact)
+                conn.commit()   # 읽기 스냅샷 해제 (WAL 체크포인트 방해 방지)
+                prune(conn)
+                if reset:
+                    last = current_version(conn)
+                    yield f"id: {last}\nevent: reset\ndata: {json.dumps({'version': last})}\n\n"
+                    continue
+                for e in events:
+                    yield f"id: {e['version']}\nevent: {e['topic']}\ndata: {json.dumps(e, ensure_ascii=False)}\n\n"
+                if new_last != last:
+                    last = new_last
+                    idle = 0.0
+                    if len(events) >= BATCH_LIMIT:
+                        continue
+                t0 = time.monotonic()
+                _wait(seen, POLL_INTERVAL)
+                idle += time.monotonic() - t0
+                if idle >= HEARTBEAT:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+        finally:
+            conn.close()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+
+@events_bp.route('/api/events/poll', methods=['GET'])
+def poll_events():
+    since, topics, contact = _parse_args()
+    timeout = min(max(request.args.get('timeout', 25, type=float), 0), 60)
+    conn = db.get_db_connection()
+    if since is None:
+        return jsonify({"version": current_version(conn), "events": [], "reset": False})
+
+    deadline = time.monotonic() + timeout
+    while True:
+        seen = _seq
+        events, last, reset = fetch_changes(conn, since, topics, contact)
+        conn.commit()
+        if reset:
+            return jsonify({"version": current_version(conn), "events": [], "reset": True})
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            prune(conn)
+            return jsonify({"version": last, "events": events, "reset": False})
+        since = last
+        _wait(seen, min(POLL_INTERVAL, remaining))
@@ -0,0 +1,219 @@
+import time
+import random
+import bisect
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# =========================================================
+# ▼ [외부 통신] 네이버 등 모든 outbound HTTP 호출 공용 클라이언트
+# =========================================================
+# - Session 하나로 keep-alive 연결을 재사용합니다.
+# - 엔드포인트별 connect/read 타임아웃, 재시도(지수 백오프, 상한 있음)를 적용합니다.
+# - 연속 실패가 쌓이면 회로 차단기가 열려 upstream 을 부르지 않고 바로 실패합니다.
+# - 엔드포인트별 지연 시간 히스토그램을 모읍니다. (stats() 로 조회)
+
+# 엔드포인트별 정책: connect/read 타임아웃(초), 재시도 횟수
+ENDPOINTS = {
+    "naver_search":  {"connect": 3.05, "read": 5.0, "retries": 2},
+    "naver_shop":    {"connect": 3.05, "read": 5.0, "retries": 2},   # naver_shop.py (따로 차단, 검색 API 에 영향 없게)
+    "naver_captcha": {"connect": 3.05, "read": 5.0, "retries": 1},
+    "default":       {"connect": 3.05, "read": 10.0, "retries": 0},
+}
+
+BACKOFF_BASE = 0.1      # 첫 재시도 대기(초)
+BACKOFF_MAX = 1.0       # 재시도 대기 상한(초)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+BREAKER_THRESHOLD = 5   # 연속 실패 몇 번이면 차단
+BREAKER_COOLDOWN = 30.0 # 차단 유지 시간(초) 후 한 건만 시험 호출
+
+# 지연 시간 히스토그램 버킷 상한(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class CircuitOpenError(Exception):
+    """회로 차단기가 열려 있어 호출하지 않고 바로 실패한 경우"""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True   # 시험 호출은 한 번에 한 건만
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # 시험 호출 실패 → 다시 차단 / 닫힌 상태에서 연속 실패 누적 → 차단
+            if self._probing or (self.opened_at is None and self.failures >= self.threshold):
+                self.trips += 1
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # 마지막 칸은 +Inf
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self):
+        # Prometheus 형식처럼 누적 카운트로 반환
+        with self._lock:
+            cumulative, acc = [], 0
+            for le, c in zip(list(self.buckets) + ["+Inf"], self.counts):
+                acc += c
+                cumulative.append((le, acc))
+            return {"buckets": cumulative, "count": self.count, "sum": round(self.total, 6)}
+
+
+class _EndpointState:
+    def __init__(self):
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+_states = {}
+_states_lock = threading.Lock()
+_timing = threading.local()   # 현재 스레드(요청)가 upstream 을 기다린 시간 누적
+
+
+def _state(endpoint):
+    with _states_lock:
+        st = _states.get(endpoint)
+        if st is None:
+            st = _states[endpoint] = _EndpointState()
+        return st
+
+
+def _backoff(attempt):
+    delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+    return delay * (0.5 + random.random() / 2)
+
+
+def get(endpoint, url, **kwargs):
+    """엔드포인트 정책(타임아웃/재시도/차단기)을 적용해 GET 요청을 보냅니다.
+
+    5xx/429/연결 오류가 재시도 후에도 계속되면 마지막 예외를 그대로 던지고,
+    차단기가 열려 있으면 CircuitOpenError 를 던집니다. 4xx 응답은 그대로 반환합니다.
+    """
+    policy = ENDPOINTS.get(endpoint, ENDPOINTS["default"])
+    st = _state(endpoint)
+
+    if not st.breaker.allow():
+        st.rejected += 1
+        raise CircuitOpenError(f"{endpoint}: upstream 차단 중")
+
+    kwargs.setdefault("timeout", (policy["connect"], policy["read"]))
+    last_error = None
+    # allow() 이후 어떤 예외로 빠져나가도 실패로 기록 (시험 호출 표시가 남아 영영 차단되지 않게)
+    try:
+        for attempt in range(policy["retries"] + 1):
+            if attempt:
+                st.retries += 1
+                time.sleep(_backoff(attempt - 1))
+            st.calls += 1
+            t0 = time.perf_counter()
+            try:
+                res = _session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+            except requests.RequestException:
+                # 잘못된 URL 등 재시도해도 소용없는 오류
+                st.errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - t0
+                st.latency.observe(elapsed)
+                _timing.seconds = getattr(_timing, 'seconds', 0.0) + elapsed
+            if res.status_code in RETRY_STATUS:
+                last_error = requests.HTTPError(f"{endpoint}: HTTP {res.status_code}", response=res)
+                continue
+            st.breaker.record_success()
+            return res
+
+        st.errors += 1
+        raise last_error
+    except BaseException:
+        st.breaker.record_failure()
+        raise
+
+
+def stats():
+    with _states_lock:
+        items = list(_states.items())
+    return {
+        name: {
+            "calls": st.calls, "errors": st.errors, "retries": st.retries, "rejected": st.rejected,
+            "breaker": st.breaker.state, "breaker_trips": st.breaker.trips,
+            "latency": st.latency.snapshot(),
+        }
+        for name, st in items
+    }
+
+
+def upstream_time(reset=False):
+    """현재 스레드가 upstream 호출에 쓴 시간(초). reset=True 면 0 으로 되돌림 (metrics.py 가 요청마다 사용)"""
+    seconds = getattr(_timing, 'seconds', 0.0)
+    if reset:
+        _timing.seconds = 0.0
+    return seconds
+
+
+def add_upstream_time(seconds):
+    """다른 스레드에 맡긴 upstream 호출을 기다린 시간을 현재 스레드(요청)에 더합니다. (fan-out 용)"""
+    _timing.seconds = getattr(_timing, 'seconds', 0.0) + seconds
+
+
+def reset():
+    """통계와 차단기 상태를 초기화합니다. (벤치마크/점검용)"""
+    with _states_lock:
+        _states.clear()
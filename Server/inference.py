@@ -0,0 +1,587 @@
+import io
+import os
+import time
+import threading
+from collections import deque
+from multiprocessing import get_context, shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from flask import Blueprint, jsonify
+
+import db
+import camera_relay
+from occupancy import tracker, iou_matrix
+
+try:
+    from PIL import Image
+except ImportError:   # Pillow 가 없으면 프레임 디코딩 불가 (submit 은 decode_errors 로 집계)
+    Image = None
+
+try:
+    import onnxruntime as ort
+except ImportError:   # onnxruntime 이 없으면 OnnxDetector 를 쓸 수 없음 (FakeDetector 는 가능)
+    ort = None
+
+# =========================================================
+# ▼ [서버 추론] 카메라 프레임 → 디코딩(프로세스 풀) → 동적 배치 → 검출기 → 슬롯 점유
+# =========================================================
+# 지금까지 검출은 라즈베리파이에서만 돌고 서버는 결과(/api/vision/detections)만 받았습니다.
+# 이 모듈은 서버 안에서 카메라 중계(camera_relay)의 프레임을 직접 검출해 occupancy.tracker 에 넣습니다.
+#
+# 흐름
+#   1) submit(camera_id, jpeg): 카메라마다 '기다리는 최신 프레임' 한 칸만 둡니다.
+#      디코딩 중인데 새 프레임이 오면 기다리던 프레임을 버림 (dropped_stale) → 느려져도 밀리지 않고 최신만 처리
+#   2) 디코딩: 프로세스 풀 작업자가 JPEG 을 풀어 레터박스(비율 유지 + 회색 여백)로
+#      공유 메모리 링 버퍼(uint8, 슬롯 ring_size 개)의 한 칸에 바로 씁니다. (픽셀을 pickle 로 돌려받지 않음)
+#      JPEG 은 draft() 로 DCT 단계에서 입력 크기에 가깝게 줄여 디코딩합니다.
+#   3) 배치: 검출을 기다리는 프레임도 카메라당 최신 한 장만 둡니다.
+#      첫 프레임이 준비된 뒤 max_batch 개가 모이거나 max_wait 초가 지나면 출발.
+#      같은 카메라의 더 새 프레임이 있거나 받은 지 max_age 초가 지난 프레임은 버림 (dropped_late)
+#   4) 미리 잡아 둔 float32 배치 버퍼 (max_batch, 3, S, S) 에 0~1 로 정규화해 복사 → 링 칸은 바로 반납
+#   5) 검출기(detect) → 레터박스를 되돌려 카메라 픽셀 좌표로 → tracker.ingest (카메라별 한 번)
+# 단계별 지연 시간 (decode / queue / infer / ingest / total) 과 최근 FPS_WINDOW 초의 fps 를 잽니다.
+#
+# 검출기
+#   OnnxDetector : ONNX Runtime (CPU), YOLOv8 형식 출력. 모델 경로는 INFERENCE_MODEL 환경 변수
+#   FakeDetector : 점검/벤치마크용 결정적 검출기 (격자 칸 밝기가 배경과 다르면 박스)
+#
+#   POST   /api/inference/cameras/<id>   카메라 프레임 검출 시작 (camera_relay.CAMERAS 의 id)
+#   DELETE /api/inference/cameras/<id>   중지
+#   GET    /api/inference/stats          카운터, 배치 크기, fps, 단계별 지연 시간
+
+inference_bp = Blueprint('inference', __name__)
+
+MODEL_PATH = os.environ.get('INFERENCE_MODEL', 'models/detector.onnx')
+MAX_BATCH = 8
+MAX_WAIT = 0.02          # 첫 프레임 뒤 배치를 채우려고 기다리는 최대 시간(초)
+MAX_AGE = 0.5            # 받은 지 이보다 오래된 프레임은 검출하지 않음(초)
+DECODE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+RING_EXTRA = 4           # 링 버퍼 칸 = max_batch * 2 + RING_EXTRA
+PAD_VALUE = 114          # 레터박스 여백 (YOLO 학습 때와 같은 회색)
+CONF = 0.25
+NMS_IOU = 0.45
+MAX_DET = 300
+FPS_WINDOW = 5.0
+STAGES = ("decode", "queue", "infer", "ingest", "total")
+
+
+# ---------------------------------------------------------
+# 디코딩 (프로세스 풀 작업자에서 실행)
+# ---------------------------------------------------------
+_rings = {}              # 공유 메모리 이름 → (SharedMemory, ndarray)  프로세스마다 한 번만 연결
+
+
+def _ring(name, shape):
+    got = _rings.get(name)
+    if got is None:
+        shm = shared_memory.SharedMemory(name=name)
+        got = _rings[name] = (shm, np.ndarray(shape, dtype=np.uint8, buffer=shm.buf))
+    return got[1]
+
+
+def decode_into(name, shape, slot, jpeg):
+    """JPEG 을 레터박스해 링 버퍼 slot 칸에 씁니다. → (scale, pad_x, pad_y, 걸린 시간)"""
+    if Image is None:
+        raise RuntimeError("Pillow 가 설치되어 있지 않습니다.")
+    t0 = time.perf_counter()
+    dst = _ring(name, shape)[slot]
+    size = shape[1]
+    img = Image.open(io.BytesIO(jpeg))
+    w, h = img.size
+    img.draft('RGB', (size, size))     # 640x480 → 320 이면 디코딩 단계에서 320x240 으로
+    img = img.convert('RGB')
+    scale = min(size / w, size / h)
+    nw, nh = max(1, round(w * scale)), max(1, round(h * scale))
+    if img.size != (nw, nh):
+        img = img.resize((nw, nh), Image.BILINEAR)
+    px, py = (size - nw) // 2, (size - nh) // 2
+    dst[:py] = PAD_VALUE
+    dst[py + nh:] = PAD_VALUE
+    dst[py:py + nh, :px] = PAD_VALUE
+    dst[py:py + nh, px + nw:] = PAD_VALUE
+    dst[py:py + nh, px:px + nw] = np.asarray(img)
+    return scale, px, py, time.perf_counter() - t0
+
+
+# ---------------------------------------------------------
+# 검출기
+# ---------------------------------------------------------
+class Detector:
+    """검출기 인터페이스
+
+    input_size: 정사각형 입력 한 변 (픽셀)
+    detect(batch): batch (N, 3, S, S) float32 0~1 → 이미지마다 (boxes (K,4) x1,y1,x2,y2 입력 좌표, scores (K,), classes (K,))
+    """
+    input_size = 640
+
+    def detect(self, batch):
+        raise NotImplementedError
+
+
+def nms(boxes, scores, classes, iou=NMS_IOU):
+    """클래스별 NMS (클래스마다 좌표를 멀리 떨어뜨려 한 번에 처리). 남길 인덱스 (점수 순)"""
+    order = np.argsort(-scores, kind='stable')
+    shifted = boxes + (classes[:, None] * 1e5).astype(boxes.dtype)
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if order.size == 1:
+            break
+        overlap = iou_matrix(shifted[i:i + 1], shifted[order[1:]])[0]
+        order = order[1:][overlap < iou]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxDetector(Detector):
+    """ONNX Runtime (CPU) 검출기. 출력은 YOLOv8 형식 (N, 4 + 클래스 수, 후보 수), 상자는 cx, cy, w, h
+
+    입력의 배치 축이 고정(1)인 모델이면 이미지마다 나눠 실행합니다.
+    """
+
+    def __init__(self, path=MODEL_PATH, conf=CONF, iou=NMS_IOU, threads=None):
+        if ort is None:
+            raise RuntimeError("onnxruntime 이 설치되어 있지 않습니다. (pip install onnxruntime)")
+        if not os.path.exists(path):
+            raise RuntimeError(f"검출 모델이 없습니다: {path}")
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.input_size = inp.shape[2] if isinstance(inp.shape[2], int) else 640
+        self.fixed_batch = isinstance(inp.shape[0], int)
+        self.conf = conf
+        self.iou = iou
+
+    def detect(self, batch):
+        if self.fixed_batch:
+            pred = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))])
+        else:
+            pred = self.session.run(None, {self.input_name: batch})[0]
+        out = []
+        for p in pred.transpose(0, 2, 1):            # (후보 수, 4 + 클래스 수)
+            cls_scores = p[:, 4:]
+            classes = cls_scores.argmax(axis=1)
+            scores = cls_scores[np.arange(len(p)), classes]
+            keep = np.flatnonzero(scores >= self.conf)
+            keep = keep[np.argsort(-scores[keep])[:MAX_DET]]
+            cxcy, wh = p[keep, :2], p[keep, 2:4]
+            boxes = np.concatenate([cxcy - wh / 2, cxcy + wh / 2], axis=1)
+            kept = nms(boxes, scores[keep], classes[keep], self.iou)
+            out.append((boxes[kept], scores[keep][kept], classes[keep][kept]))
+        return out
+
+
+class FakeDetector(Detector):
+    """점검/벤치마크용 결정적 검출기
+
+    입력을 grid x grid 칸으로 나눠 칸 평균 밝기가 배경(칸들의 중앙값)과 threshold 이상 다르면 그 칸을 박스로 냅니다.
+    batch_cost + image_cost x N 초를 기다려 실제 모델의 호출당/이미지당 시간을 흉내 낼 수 있습니다.
+    """
+
+    def __init__(self, input_size=320, grid=16, threshold=0.12, batch_cost=0.0, image_cost=0.0):
+        self.input_size = input_size
+        self.grid = grid
+        self.threshold = threshold
+        self.batch_cost = batch_cost
+        self.image_cost = image_cost
+        self.calls = 0
+
+    def detect(self, batch):
+        self.calls += 1
+        if self.batch_cost or self.image_cost:
+            time.sleep(self.batch_cost + self.image_cost * len(batch))
+        n, s, g = len(batch), self.input_size, self.grid
+        step = s // g
+        cells = batch[:, :, :step * g, :step * g].mean(axis=1).reshape(n, g, step, g, step).mean(axis=(2, 4))
+        diff = np.abs(cells - np.median(cells.reshape(n, -1), axis=1)[:, None, None])
+        out = []
+        for i in range(n):
+            r, c = np.nonzero(diff[i] >= self.threshold)
+            boxes = np.stack([c * step, r * step, (c + 1) * step, (r + 1) * step], axis=1).astype(np.float32)
+            out.append((boxes.reshape(-1, 4), np.minimum(1.0, 0.5 + diff[i][r, c]).astype(np.float32),
+                        np.zeros(len(r), dtype=np.int64)))
+        return out
+
+
+def load_detector():
+    """서버용 검출기 (INFERENCE_MODEL 의 ONNX 모델). 없으면 RuntimeError"""
+    return OnnxDetector(MODEL_PATH)
+
+
+# ---------------------------------------------------------
+# 파이프라인
+# ---------------------------------------------------------
+class _Stage:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=1000)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        pick = lambda q: round(recent[min(len(recent) - 1, int(len(recent) * q))] * 1000, 2) if recent else None
+        return {"count": self.count, "mean_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+                "p50_ms": pick(0.5), "p95_ms": pick(0.95)}
+
+
+class _Camera:
+    def __init__(self):
+        self.pending = None      # 디코딩을 기다리는 최신 프레임 (frame_id, jpeg, 받은 시각)
+        self.decoding = False
+        self.next_id = 0
+        self.follower = None     # (스레드, 중지 Event) - attach 한 경우
+        self.counters = {"received": 0, "inferred": 0, "dropped": 0}
+
+
+class InferencePipeline:
+    def __init__(self, detector, max_batch=MAX_BATCH, max_wait=MAX_WAIT, max_age=MAX_AGE,
+                 workers=DECODE_WORKERS, sink=None):
+        """workers=0 이면 디코딩도 배치 스레드에서 (프로세스 풀 없음)
+        sink(camera_id, frame_ids, counts, boxes_xywh, scores, classes): 결과를 받을 함수 (기본: occupancy.tracker)
+        """
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_age = max_age
+        self.workers = workers
+        self.sink = sink or self._ingest
+        size = detector.input_size
+        self.ring_size = max_batch * 2 + RING_EXTRA
+        self._shape = (self.ring_size, size, size, 3)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self._shape)))
+        self.ring = np.ndarray(self._shape, dtype=np.uint8, buffer=self._shm.buf)
+        _rings[self._shm.name] = (self._shm, self.ring)
+        self.batch = np.empty((max_batch, 3, size, size), dtype=np.float32)
+        # 작업자는 spawn 으로 (Windows 에서도 되고, 요청 스레드가 도는 서버 프로세스를 fork 하지 않음)
+        self._pool = ProcessPoolExecutor(workers, mp_context=get_context('spawn')) if workers else None
+        self._cond = threading.Condition()
+        self._free = deque(range(self.ring_size))
+        self._cams = {}
+        self._ready = deque()    # 디코딩이 끝난 프레임 (dict)
+        self._inline = deque()   # workers=0 일 때 배치 스레드가 디코딩할 프레임
+        self._done = deque()     # (끝난 시각, 프레임 수) - fps 계산용
+        self._running = False
+        self._thread = None
+        self._conn = None
+        self.counters = {"received": 0, "decoded": 0, "inferred": 0, "batches": 0, "dropped_stale": 0,
+                         "dropped_late": 0, "decode_errors": 0, "detect_errors": 0, "ingest_errors": 0}
+        self.stages = {name: _Stage() for name in STAGES}
+
+    # --- 실행 ---
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        if self._pool:
+            # 작업자를 미리 띄워 첫 프레임이 프로세스 시작을 기다리지 않게
+            list(self._pool.map(time.sleep, [0] * self.workers))
+        self._thread = threading.Thread(target=self._run, name="inference", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        for cam_id in list(self._cams):
+            self.detach(cam_id)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        _rings.pop(self._shm.name, None)
+        self.ring = None
+        self._shm.close()
+        self._shm.unlink()
+
+    # --- 프레임 접수 ---
+    def submit(self, camera_id, jpeg, frame_id=None):
+        """카메라 프레임 하나를 넣습니다. 앞서 기다리던 프레임이 있으면 버리고 이것으로 바꿈
+
+        frame_id 는 카메라별로 증가해야 합니다. (occupancy.tracker 가 더 작은 번호는 버림)
+        """
+        now = time.perf_counter()
+        with self._cond:
+            cam = self._cams.get(camera_id)
+            if cam is None:
+                cam = self._cams[camera_id] = _Camera()
+            if frame_id is None:
+                # 받은 시각(ms) 기준 → 파이프라인을 다시 만들어도 tracker 가 이전 프레임으로 보고 버리지 않음
+                frame_id = max(cam.next_id, int(time.time() * 1000))
+            cam.next_id = max(cam.next_id, frame_id) + 1
+            self.counters["received"] += 1
+            cam.counters["received"] += 1
+            if cam.pending is not None:
+                self.counters["dropped_stale"] += 1
+                cam.counters["dropped"] += 1
+            cam.pending = (frame_id, jpeg, now)
+            self._kick()
+
+    def _kick(self):
+        # 디코딩 중이 아닌 카메라의 기다리는 프레임을 빈 링 칸이 있는 만큼 디코딩 시작 (_cond 안에서 호출)
+        for camera_id, cam in self._cams.items():
+            if not self._free:
+                return
+            if cam.pending is None or cam.decoding:
+                continue
+            frame_id, jpeg, received = cam.pending
+            cam.pending = None
+            cam.decoding = True
+            item = {"camera_id": camera_id, "frame_id": frame_id, "slot": self._free.popleft(),
+                    "received": received, "started": time.perf_counter()}
+            if self._pool:
+                future = self._pool.submit(decode_into, self._shm.name, self._shape, item["slot"], jpeg)
+                future.add_done_callback(lambda f, item=item: self._decoded(item, f))
+            else:
+                self._inline.append((item, jpeg))
+                self._cond.notify_all()
+
+    def _decoded(self, item, future):
+        try:
+            scale, px, py, seconds = future.result()
+        except Exception as e:
+            self._decode_failed(item, e)
+            return
+        self._decoded_ok(item, scale, px, py, seconds)
+
+    def _decoded_ok(self, item, scale, px, py, seconds):
+        item.update(scale=scale, pad=(px, py), decoded=time.perf_counter())
+        with self._cond:
+            self._cams[item["camera_id"]].decoding = False
+            self.counters["decoded"] += 1
+            self.stages["decode"].observe(seconds)
+            # 검출을 기다리는 같은 카메라의 이전 프레임은 버림 → 대기열은 카메라당 최대 한 장
+            for older in [r for r in self._ready if r["camera_id"] == item["camera_id"]]:
+                self._ready.remove(older)
+                self._drop(older, "dropped_stale")
+            self._ready.append(item)
+            self._kick()
+            self._cond.notify_all()
+
+    def _decode_failed(self, item, error):
+        with self._cond:
+            self._cams[item["camera_id"]].decoding = False
+            self.counters["decode_errors"] += 1
+            self._free.append(item["slot"])
+            self._kick()
+        print(f"🚨 [Inference] {item['camera_id']} 프레임 디코딩 실패: {error}")
+
+    # --- 배치 ---
+    def _collect(self):
+        """배치로 묶을 프레임을 기다렸다가 꺼냅니다. (중지되면 None)"""
+        with self._cond:
+            while self._running and not self._ready and not self._inline:
+                self._cond.wait(0.5)
+            if not self._running:
+                return None
+            if self._inline:
+                return self._inline.popleft()
+            deadline = self._ready[0]["decoded"] + self.max_wait
+            while self._running and len(self._ready) < self.max_batch and not self._inline:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            items = [self._ready.popleft() for _ in range(min(self.max_batch, len(self._ready)))]
+
+            # 같은 카메라는 가장 새 프레임만, 너무 오래된 프레임은 버림
+            now, newest, keep = time.perf_counter(), {}, []
+            for item in items:
+                if now - item["received"] > self.max_age:
+                    self._drop(item, "dropped_late")
+                    continue
+                older = newest.get(item["camera_id"])
+                if older is not None:
+                    keep.remove(older)
+                    self._drop(older, "dropped_stale")
+                newest[item["camera_id"]] = item
+                keep.append(item)
+            return keep
+
+    def _drop(self, item, counter):
+        # _cond 안에서 호출
+        self.counters[counter] += 1
+        self._cams[item["camera_id"]].counters["dropped"] += 1
+        self._free.append(item["slot"])
+
+    def _run(self):
+        self._conn = db.connect() if self.sink == self._ingest else None
+        while True:
+            got = self._collect()
+            if got is None:
+                return
+            if isinstance(got, tuple):     # workers=0: 여기서 디코딩
+                item, jpeg = got
+                try:
+                    self._decoded_ok(item, *decode_into(self._shm.name, self._shape, item["slot"], jpeg))
+                except Exception as e:
+                    self._decode_failed(item, e)
+                continue
+            if got:
+                self._infer(got)
+            with self._cond:
+                self._kick()
+
+    def _infer(self, items):
+        n = len(items)
+        started = time.perf_counter()
+        for i, item in enumerate(items):
+            np.multiply(self.ring[item["slot"]].transpose(2, 0, 1), np.float32(1 / 255), out=self.batch[i])
+        with self._cond:
+            for item in items:
+                self._free.append(item["slot"])   # 배치 버퍼로 옮겼으니 링 칸은 바로 반납
+                self.stages["queue"].observe(started - item["decoded"])
+            self._kick()
+        try:
+            results = self.detector.detect(self.batch[:n])
+        except Exception as e:
+            with self._cond:
+                self.counters["detect_errors"] += 1
+            print(f"🚨 [Inference] 검출 실패: {e}")
+            return
+        inferred = time.perf_counter()
+
+        # 레터박스를 되돌려 카메라 픽셀 좌표 (x, y, w, h) 로, 카메라별로 모음
+        per_camera = {}
+        for item, (boxes, scores, classes) in zip(items, results):
+            px, py = item["pad"]
+            xyxy = (np.asarray(boxes, dtype=np.float32).reshape(-1, 4) - (px, py, px, py)) / item["scale"]
+            xywh = np.concatenate([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+            per_camera.setdefault(item["camera_id"], []).append((item["frame_id"], xywh, scores, classes))
+        errors = 0
+        for camera_id, frames in per_camera.items():
+            frames.sort(key=lambda f: f[0])
+            try:
+                self.sink(camera_id, [f[0] for f in frames], [len(f[1]) for f in frames],
+                          np.concatenate([f[1] for f in frames]), np.concatenate([f[2] for f in frames]),
+                          np.concatenate([f[3] for f in frames]))
+            except Exception as e:
+                errors += 1
+                print(f"🚨 [Inference] {camera_id} 결과 반영 실패: {e}")
+        finished = time.perf_counter()
+
+        with self._cond:
+            self.counters["batches"] += 1
+            self.counters["inferred"] += n
+            self.counters["ingest_errors"] += errors
+            self.stages["infer"].observe(inferred - started)
+            self.stages["ingest"].observe(finished - inferred)
+            for item in items:
+                self._cams[item["camera_id"]].counters["inferred"] += 1
+                self.stages["total"].observe(finished - item["received"])
+            self._done.append((finished, n))
+            while self._done and finished - self._done[0][0] > FPS_WINDOW:
+                self._done.popleft()
+
+    def _ingest(self, camera_id, frame_ids, counts, boxes, scores, classes):
+        tracker.ingest(self._conn, camera_id, frame_ids, counts, boxes, scores, classes)
+
+    # --- 카메라 중계 구독 ---
+    def attach(self, camera_id, feed):
+        """camera_relay 의 CameraFeed 를 구독해 새 프레임마다 submit (카메라별 스레드, 시청자 한 명으로 집계)"""
+        with self._cond:
+            cam = self._cams.setdefault(camera_id, _Camera())
+            if cam.follower is not None:
+                return False
+            stop = threading.Event()
+            thread = threading.Thread(target=self._follow, args=(camera_id, feed, stop),
+                                      name=f"inference-{camera_id}", daemon=True)
+            cam.follower = (thread, stop)
+        thread.start()
+        return True
+
+    def detach(self, camera_id, timeout=5.0):
+        with self._cond:
+            cam = self._cams.get(camera_id)
+            follower = cam.follower if cam else None
+            if follower is None:
+                return False
+            cam.follower = None
+        thread, stop = follower
+        stop.set()
+        thread.join(timeout)
+        return True
+
+    def _follow(self, camera_id, feed, stop):
+        feed.subscribe()
+        try:
+            last = feed.seq
+            while not stop.is_set():
+                got = feed.wait_frame(last, 1.0)
+                if got is None:
+                    feed.ensure_running()
+                    continue
+                last, _, frame = got
+                self.submit(camera_id, frame)
+        finally:
+            feed.unsubscribe()
+
+    # --- 통계 ---
+    def stats(self):
+        with self._cond:
+            now = time.perf_counter()
+            window = [n for t, n in self._done if now - t <= FPS_WINDOW]
+            return {
+                "running": self._running, "detector": type(self.detector).__name__,
+                "input_size": self.detector.input_size, "max_batch": self.max_batch,
+                "max_wait_ms": round(self.max_wait * 1000, 1), "workers": self.workers,
+                **self.counters,
+                "avg_batch": round(self.counters["inferred"] / self.counters["batches"], 2) if self.counters["batches"] else None,
+                "fps": round(sum(window) / FPS_WINDOW, 1),
+                "cameras": {cid: {**cam.counters, "attached": cam.follower is not None} for cid, cam in self._cams.items()},
+                "stages": {name: st.summary() for name, st in self.stages.items()},
+            }
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """서버 공용 파이프라인 (처음 사용할 때 모델을 읽고 시작). 모델이 없으면 RuntimeError"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = InferencePipeline(load_detector()).start()
+        return _pipeline
+
+
+# --- 라우트 ---
+
+@inference_bp.route('/api/inference/cameras/<cam_id>', methods=['POST'])
+def inference_attach(cam_id):
+    feed = camera_relay.get_feed(cam_id)
+    if feed is None:
+        return jsonify({"success": False, "message": f"알 수 없는 카메라: {cam_id}"}), 404
+    try:
+        pipeline = get_pipeline()
+    except RuntimeError as e:
+        return jsonify({"success": False, "message": str(e)}), 503
+    started = pipeline.attach(cam_id, feed)
+    return jsonify({"success": True, "started": started}), 202 if started else 200
+
+
+@inference_bp.route('/api/inference/cameras/<cam_id>', methods=['DELETE'])
+def inference_detach(cam_id):
+    if _pipeline is None or not _pipeline.detach(cam_id):
+        return jsonify({"success": False, "message": f"검출 중인 카메라가 아닙니다: {cam_id}"}), 404
+    return jsonify({"success": True})
+
+
+@inference_bp.route('/api/inference/stats', methods=['GET'])
+def inference_stats():
+    if _pipeline is None:
+        return jsonify({"running": False})
+    return jsonify(_pipeline.stats())
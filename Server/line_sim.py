@@ -0,0 +1,388 @@
+import sys
+import time
+import heapq
+import random
+import argparse
+from itertools import islice
+from collections import deque
+
+import planner
+
+# =========================================================
+# ▼ [라인 시뮬레이터] 주문 → 라인 → 카메라 → 아두이노카 → ESP32 로봇팔 → 선반 (이산 사건)
+# =========================================================
+# mock_factory / main.cs 의 시뮬레이션 모드는 로그만 찍어서 시간당 몇 건을 처리할 수 있는지 알 수 없었습니다.
+# 실제 시간을 기다리지 않고 사건(도착, 작업 끝, 이동 끝 ...) 시각만 따라가므로 수천 시간을 몇 초에 돌립니다.
+#
+# 흐름 (상자 단위)
+#   주문 도착 (포아송, 시간당 rate 건, 주문당 1~3개)
+#   → 라인 투입 (상자 하나당 LINE_TIME)
+#   → 카메라 검출 (다음 프레임까지 대기 + 검출 지연, 카메라 cameras 대)
+#   → 적재 위치에서 카 대기
+#   → 카 트립: 적재 후 슬롯마다 이동(|Δx|/CAR_SPEED) + 정지/출발 시간, 팔이 상자를 놓는 동안 정지
+#   → 로봇팔: ARM_STAGES 단계별 시간 + 높이 이동(|Δy|/ARM_SPEED)
+#   → 선반 슬롯에 DWELL 동안 보관 후 비워짐 (출고)
+# 카 배차 방식
+#   fifo  : 기존처럼 가장 오래된 주문 하나의 상자가 다 모이면 그 주문만 싣고, 첫 번째 빈 슬롯(slot_id 순)으로
+#   batch : 상자가 CAR_CAPACITY 개 모이거나 가장 오래된 상자가 BATCH_WAIT 초 기다리면 출발,
+#           슬롯/방문 순서는 planner.plan_trip (2-opt + 빈 슬롯 교체, 끝까지 개선)
+#           후보는 적재 위치에서 가까운 빈 슬롯 CANDIDATES 개
+# 슬롯 좌표는 bench_planner 와 같은 가상 선반, 또는 --db 로 slots 테이블(활성 슬롯)을 씁니다.
+#
+# 사용법:
+#   python line_sim.py [--hours 1000] [--rate 40] [--policy batch|fifo] [--cars 1] [--cameras 1]
+#   python line_sim.py --sweep --hours 200   (정책별 감당 가능한 최대 주문/시간을 이분 탐색으로 찾음)
+
+LINE_TIME = 4.0                  # 라인이 상자 하나를 투입/분류하는 시간(초)
+CAMERA_FPS = 10.0
+CAMERA_LATENCY = (0.35, 0.10)    # 검출 지연 (평균, 표준편차) 초
+CAR_STOP = 0.8                   # 정지/출발 한 번의 시간(초)
+ARM_STAGES = (("reach", 1.2), ("grip", 0.6), ("place", 0.8), ("release", 0.4), ("home", 1.2))
+BATCH_WAIT = 20.0                # batch: 짐이 덜 찼어도 가장 오래 기다린 상자가 이만큼 기다리면 출발(초)
+DWELL = 1800.0                   # 선반에 머무는 평균 시간(초), 지수 분포
+MAX_QTY = 3
+SHELF = (20, 8)                  # 가상 선반 열 x 행
+CANDIDATES = 32                  # batch: 적재 위치에서 가까운 빈 슬롯 N개만 계획 후보로 (트립마다 전체를 보면 느림)
+
+
+class Resource:
+    """대기열이 있는 작업자 묶음. 가동 시간과 대기열 길이(시간 가중 평균)를 기록"""
+
+    def __init__(self, sim, name, capacity=1):
+        self.sim = sim
+        self.name = name
+        self.capacity = capacity
+        self.busy = 0
+        self.queue = deque()
+        self.busy_time = 0.0
+        self.queue_area = 0.0
+        self.max_queue = 0
+        self.served = 0
+        self._last = 0.0
+
+    def _account(self):
+        now = self.sim.now
+        self.busy_time += self.busy * (now - self._last)
+        self.queue_area += len(self.queue) * (now - self._last)
+        self._last = now
+
+    def request(self, duration, done):
+        """duration(초 또는 호출 가능한 값) 동안 일하고 done() 호출"""
+        self._account()
+        if self.busy < self.capacity:
+            self._start(duration, done)
+        else:
+            self.queue.append((duration, done))
+            self.max_queue = max(self.max_queue, len(self.queue))
+
+    def _start(self, duration, done):
+        self.busy += 1
+        d = duration() if callable(duration) else duration
+        self.sim.at(d, self._finish, done)
+
+    def _finish(self, done):
+        self._account()
+        self.busy -= 1
+        self.served += 1
+        if self.queue:
+            self._start(*self.queue.popleft())
+        done()
+
+    def report(self, horizon):
+        self._account()
+        return {"utilization": round(self.busy_time / (horizon * self.capacity), 3),
+                "avg_queue": round(self.queue_area / horizon, 2), "max_queue": self.max_queue, "served": self.served}
+
+
+class _Order:
+    __slots__ = ("id", "arrived", "qty", "staged", "loaded", "remaining")
+
+    def __init__(self, oid, arrived, qty):
+        self.id = oid
+        self.arrived = arrived
+        self.qty = qty
+        self.staged = 0
+        self.loaded = 0
+        self.remaining = qty
+
+
+def check_params(rate, capacity, cars=1, cameras=1, dwell=DWELL):
+    """설정이 잘못되었으면 메시지, 괜찮으면 None"""
+    if not rate > 0:
+        return "rate 는 0 보다 커야 합니다."
+    if not 1 <= capacity <= CANDIDATES:
+        return f"capacity 는 1~{CANDIDATES} 여야 합니다. (트립 후보 슬롯이 CANDIDATES 개)"
+    if cars < 1 or cameras < 1:
+        return "cars, cameras 는 1 이상이어야 합니다."
+    if not dwell > 0:
+        return "dwell 은 0 보다 커야 합니다."
+    return None
+
+
+class LineSim:
+    def __init__(self, rate, policy="batch", cars=1, cameras=1, capacity=planner.CAR_CAPACITY,
+                 slots=None, dwell=DWELL, batch_wait=BATCH_WAIT, seed=1):
+        error = check_params(rate, capacity, cars, cameras, dwell)
+        if error:
+            raise ValueError(error)
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self._events = []
+        self._seq = 0
+        self.rate = rate / 3600.0
+        self.policy = policy
+        self.capacity = capacity
+        self.dwell = dwell
+        self.batch_wait = batch_wait
+        self.pos = slots or shelf_slots()
+        self.free = set(self.pos)
+        self.by_depot = sorted(self.pos, key=lambda s: (planner.cost(planner.DEPOT, self.pos[s]), s))
+        self.line = Resource(self, "line")
+        self.cameras = Resource(self, "camera", cameras)
+        self.cars = Resource(self, "car", cars)
+        self.arm = Resource(self, "arm")
+        self.staging = deque()           # 검출이 끝나 카를 기다리는 상자 (주문, 도착 시각)
+        self.staging_area = 0.0
+        self.staging_max = 0
+        self._check_at = None            # batch: 예약해 둔 대기 시간 확인 시각
+        self.blocked_time = 0.0          # 카가 놀고 상자도 있는데 빈 슬롯이 없던 시간
+        self._last = 0.0
+        self.idle_cars = cars
+        self.orders = 0
+        self.completed = 0
+        self.boxes = 0
+        self.lead_times = []
+
+    # --- 사건 큐 ---
+
+    def at(self, delay, fn, *args):
+        self._seq += 1
+        heapq.heappush(self._events, (self.now + delay, self._seq, fn, args))
+
+    def _account(self):
+        dt = self.now - self._last
+        self.staging_area += len(self.staging) * dt
+        if self.staging and self.idle_cars and not self.free:
+            self.blocked_time += dt
+        self._last = self.now
+
+    def run(self, hours):
+        horizon = hours * 3600.0
+        self.at(self.rng.expovariate(self.rate), self._arrival)
+        while self._events and self._events[0][0] <= horizon:
+            t, _, fn, args = heapq.heappop(self._events)
+            self.now = t
+            fn(*args)
+        self.now = horizon
+        self._account()
+        return self.report(horizon)
+
+    # --- 흐름 ---
+
+    def _arrival(self):
+        self.orders += 1
+        order = _Order(self.orders, self.now, self.rng.randint(1, MAX_QTY))
+        for _ in range(order.qty):
+            self.line.request(LINE_TIME, lambda o=order: self.cameras.request(self._detect_time, lambda: self._staged(o)))
+        self.at(self.rng.expovariate(self.rate), self._arrival)
+
+    def _detect_time(self):
+        mean, sd = CAMERA_LATENCY
+        return self.rng.uniform(0, 1 / CAMERA_FPS) + max(0.0, self.rng.gauss(mean, sd))
+
+    def _staged(self, order):
+        self._account()
+        order.staged += 1
+        self.staging.append((order, self.now))
+        self.staging_max = max(self.staging_max, len(self.staging))
+        self._dispatch()
+
+    def _ready(self):
+        """카를 출발시킬 만큼 상자가 모였는지"""
+        if self.policy == "fifo":
+            first = self.staging[0][0]
+            return first.staged == first.qty or first.staged - first.loaded >= self.capacity
+        return len(self.staging) >= self.capacity or self.now - self.staging[0][1] >= self.batch_wait - 1e-9
+
+    def _take(self):
+        """이번 트립에 실을 상자(주문) 목록과 슬롯 방문 순서"""
+        if self.policy == "fifo":
+            first = self.staging[0][0]
+            boxes = []
+            for e in self.staging:        # 한 주문의 상자는 대기열 앞쪽에 모여 있음
+                if e[0] is first:
+                    boxes.append(e)
+                    if len(boxes) == self.capacity:
+                        break
+            n = min(len(boxes), len(self.free))
+            route = heapq.nsmallest(n, self.free)
+        else:
+            n = min(self.capacity, len(self.staging), len(self.free))
+            boxes = list(islice(self.staging, n))
+            near = {}
+            for s in self.by_depot:
+                if s in self.free:
+                    near[s] = self.pos[s]
+                    if len(near) >= CANDIDATES:
+                        break
+            route = planner.plan_trip(n, near)
+        boxes = boxes[:n]
+        for e in boxes:
+            self.staging.remove(e)
+            e[0].loaded += 1
+        return [o for o, _ in boxes], route
+
+    def _dispatch(self):
+        self._account()
+        while self.idle_cars and self.staging and self.free and self._ready():
+            boxes, route = self._take()
+            self.free.difference_update(route)
+            self.idle_cars -= 1
+            self.cars._account()
+            self.cars.busy += 1
+            self.at(planner.LOAD_TIME, self._drive, list(zip(boxes, route)), planner.DEPOT)
+        if self.policy == "batch" and self.staging and self.idle_cars:
+            # 남은 상자 중 가장 오래된 것의 대기 시간이 찰 때 다시 확인 (같은 시각은 한 번만 예약)
+            due = self.staging[0][1] + self.batch_wait
+            if due > self.now and due != self._check_at:
+                self._check_at = due
+                self.at(due - self.now, self._dispatch)
+
+    def _drive(self, stops, here):
+        if not stops:
+            self.at(abs(here[0] - planner.DEPOT[0]) / planner.CAR_SPEED + CAR_STOP, self._back)
+            return
+        (order, slot), rest = stops[0], stops[1:]
+        target = self.pos[slot]
+        travel = abs(target[0] - here[0]) / planner.CAR_SPEED + CAR_STOP
+        self.at(travel, lambda: self.arm.request(self._arm_time(target), lambda: self._placed(order, slot, rest, target)))
+
+    def _arm_time(self, target):
+        return sum(d for _, d in ARM_STAGES) + 2 * abs(target[1] - planner.DEPOT[1]) / planner.ARM_SPEED
+
+    def _placed(self, order, slot, rest, here):
+        self.boxes += 1
+        order.remaining -= 1
+        if order.remaining == 0:
+            self.completed += 1
+            self.lead_times.append(self.now - order.arrived)
+        self.at(self.rng.expovariate(1 / self.dwell), self._vacate, slot)
+        self._drive(rest, here)
+
+    def _back(self):
+        self.cars._account()
+        self.cars.busy -= 1
+        self.cars.served += 1
+        self.idle_cars += 1
+        self._dispatch()
+
+    def _vacate(self, slot):
+        self._account()
+        self.free.add(slot)
+        self._dispatch()
+
+    # --- 결과 ---
+
+    def report(self, horizon):
+        hours = horizon / 3600.0
+        stages = {r.name: r.report(horizon) for r in (self.line, self.cameras, self.cars, self.arm)}
+        stages["staging"] = {"avg_queue": round(self.staging_area / horizon, 2), "max_queue": self.staging_max,
+                             "final_queue": len(self.staging)}
+        stages["shelf"] = {"blocked_fraction": round(self.blocked_time / horizon, 3), "slots": len(self.pos),
+                           "free_at_end": len(self.free)}
+        lead = sorted(self.lead_times)
+        busiest = max(("line", "camera", "car", "arm"), key=lambda k: stages[k]["utilization"])
+        bottleneck = "shelf" if stages["shelf"]["blocked_fraction"] > 0.05 else busiest
+        return {
+            "policy": self.policy, "hours": hours, "rate": round(self.rate * 3600, 2),
+            "orders_arrived": self.orders, "orders_completed": self.completed, "boxes_placed": self.boxes,
+            "throughput_per_hour": round(self.completed / hours, 2),
+            "lead_time_s": {"mean": round(sum(lead) / len(lead), 1) if lead else None,
+                            "p95": round(lead[int(len(lead) * 0.95)], 1) if lead else None},
+            "stages": stages, "bottleneck": bottleneck,
+        }
+
+
+def shelf_slots(cols=SHELF[0], rows=SHELF[1]):
+    """bench_planner 와 같은 배치의 가상 선반 {slot_id: (중심 x, 중심 y)}"""
+    return {f"{chr(65 + r)}-{c + 1}": (40 + c * 70 + 30, 20 + r * 60 + 25) for c in range(cols) for r in range(rows)}
+
+
+def db_slots():
+    """slots 테이블의 활성 슬롯 중심 좌표"""
+    import db
+    conn = db.connect()
+    try:
+        rows = conn.execute("SELECT slot_id, x, y, w, h FROM slots WHERE is_active = 1").fetchall()
+    finally:
+        conn.close()
+    return {r['slot_id']: (r['x'] + r['w'] / 2, r['y'] + r['h'] / 2) for r in rows}
+
+
+def stable(result):
+    """대기열이 계속 늘지 않고 도착한 만큼 처리했으면 감당 가능"""
+    return (result["stages"]["staging"]["final_queue"] <= 4 * planner.CAR_CAPACITY
+            and result["stages"]["line"]["avg_queue"] < 20
+            and result["orders_completed"] >= 0.97 * result["orders_arrived"])
+
+
+def max_rate(policy, hours=200, lo=1.0, hi=400.0, **kwargs):
+    """감당 가능한 최대 주문/시간 (이분 탐색)"""
+    for _ in range(10):
+        mid = (lo + hi) / 2
+        if stable(LineSim(mid, policy, **kwargs).run(hours)):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _print(result, elapsed):
+    print(f"[{result['policy']}] {result['hours']:.0f} h at {result['rate']} orders/h "
+          f"(simulated in {elapsed:.2f}s): completed {result['orders_completed']}/{result['orders_arrived']} orders, "
+          f"{result['throughput_per_hour']}/h, lead time mean {result['lead_time_s']['mean']}s p95 {result['lead_time_s']['p95']}s")
+    for name, st in result["stages"].items():
+        print(f"    {name:<8} " + ", ".join(f"{k}={v}" for k, v in st.items()))
+    print(f"    bottleneck: {result['bottleneck']}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="이산 사건 라인 시뮬레이터")
+    ap.add_argument("--hours", type=float, default=1000)
+    ap.add_argument("--rate", type=float, default=40, help="시간당 주문 수")
+    ap.add_argument("--policy", choices=("batch", "fifo", "both"), default="both")
+    ap.add_argument("--cars", type=int, default=1)
+    ap.add_argument("--cameras", type=int, default=1)
+    ap.add_argument("--capacity", type=int, default=planner.CAR_CAPACITY)
+    ap.add_argument("--dwell", type=float, default=DWELL, help="선반 평균 보관 시간(초)")
+    ap.add_argument("--db", action="store_true", help="slots 테이블의 슬롯 좌표 사용")
+    ap.add_argument("--sweep", action="store_true", help="정책별 최대 처리량 탐색")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    error = check_params(args.rate, args.capacity, args.cars, args.cameras, args.dwell)
+    if error:
+        ap.error(error)
+
+    slots = db_slots() if args.db else shelf_slots()
+    if not slots:
+        print("슬롯이 없습니다.")
+        return 1
+    kwargs = dict(cars=args.cars, cameras=args.cameras, capacity=args.capacity, slots=slots,
+                  dwell=args.dwell, seed=args.seed)
+    policies = ("fifo", "batch") if args.policy == "both" else (args.policy,)
+    if args.sweep:
+        for policy in policies:
+            t0 = time.perf_counter()
+            rate = max_rate(policy, args.hours, **kwargs)
+            print(f"[{policy}] max sustainable ≈ {rate:.1f} orders/h  ({time.perf_counter() - t0:.1f}s)")
+            t0 = time.perf_counter()
+            _print(LineSim(rate * 0.95, policy, **kwargs).run(args.hours), time.perf_counter() - t0)
+        return 0
+    for policy in policies:
+        t0 = time.perf_counter()
+        _print(LineSim(args.rate, policy, **kwargs).run(args.hours), time.perf_counter() - t0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+import io
+import time
+import pstats
+import cProfile
+import threading
+from flask import Blueprint, Response, request, g, jsonify
+
+import db
+import http_client
+from http_client import LatencyHistogram
+
+# =========================================================
+# ▼ [계측] 라우트별 지연 시간 / DB 시간 / upstream 시간 / 크기 → /metrics (Prometheus)
+# =========================================================
+# - 라우트는 URL 규칙 단위로 묶습니다. (/api/snapshots/<int:snap_id>.jpg 처럼 id 별로 늘어나지 않음)
+# - DB 시간: db.TimedConnection 이 스레드별로 누적한 execute/fetch 시간 (요청 시작 때 0 으로)
+# - upstream 시간: http_client.get() 이 기다린 시간 (네이버 검색/캡차)
+# - 스트리밍 응답(MJPEG, SSE)은 본문이 끝나기 전에 기록되므로 헤더까지의 시간만 잽니다.
+#
+#   GET  /metrics                      Prometheus 텍스트 형식
+#   POST /metrics/profile {"requests": 20, "route": "/api/orders"}
+#                                      다음 N개 요청을 cProfile 로 프로파일 (route 생략 시 모든 라우트)
+#   GET  /metrics/profile[?sort=tottime&limit=40]   누적된 프로파일 결과 (pstats 텍스트, 다시 켜면 초기화)
+#   로컬에서 보낸 요청에 X-Profile: 1 헤더를 붙이면 그 요청도 프로파일에 더합니다.
+#
+# 프로파일은 로컬(127.0.0.1)에서만 켤 수 있고, 한 번에 한 요청씩만 돕니다. (겹치는 요청은 건너뜀)
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+LOCAL_ADDRS = ("127.0.0.1", "::1")
+PROFILE_MAX = 1000              # 한 번에 켤 수 있는 프로파일 요청 수 상한
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+class _RouteMetrics:
+    def __init__(self):
+        self.duration = LatencyHistogram(DURATION_BUCKETS)
+        self.db = LatencyHistogram(DURATION_BUCKETS)
+        self.upstream = LatencyHistogram(DURATION_BUCKETS)
+        self.request_bytes = LatencyHistogram(SIZE_BUCKETS)
+        self.response_bytes = LatencyHistogram(SIZE_BUCKETS)
+        self.statuses = {}       # 상태 코드 → 요청 수
+        self.db_queries = 0
+        self.in_flight = 0
+
+
+_routes = {}                     # (method, route) → _RouteMetrics
+_lock = threading.Lock()
+
+
+def _route_metrics(key):
+    with _lock:
+        m = _routes.get(key)
+        if m is None:
+            m = _routes[key] = _RouteMetrics()
+        return m
+
+
+def _route_key():
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    return request.method, rule
+
+
+# --- 프로파일러 ---
+
+class Profiler:
+    """켜져 있을 때 요청 N개를 cProfile 로 돌려 결과를 합칩니다. (동시에 한 요청만)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self.remaining = 0
+        self.route = None
+        self.profiled = 0
+        self._stats = None
+
+    def arm(self, count, route=None):
+        with self._lock:
+            self.remaining = min(max(count, 0), PROFILE_MAX)
+            self.route = route
+            self.profiled = 0
+            self._stats = None
+
+    def start(self, route):
+        """이 요청을 프로파일할 차례면 시작한 Profile 을, 아니면 None"""
+        forced = request.headers.get('X-Profile') and request.remote_addr in LOCAL_ADDRS
+        if not forced and (self.remaining <= 0 or (self.route and route != self.route) or route.startswith('/metrics')):
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        if not forced:
+            with self._lock:
+                if self.remaining <= 0:
+                    self._busy.release()
+                    return None
+                self.remaining -= 1
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+
+    def finish(self, prof):
+        prof.disable()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(prof)
+            else:
+                self._stats.add(prof)
+            self.profiled += 1
+        self._busy.release()
+
+    def report(self, sort='cumulative', limit=40):
+        with self._lock:
+            if self._stats is None:
+                return "(프로파일 결과 없음)\n"
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats(sort).print_stats(limit)
+        return f"profiled requests: {self.profiled}, remaining: {self.remaining}, route: {self.route or '*'}\n" + out.getvalue()
+
+
+profiler = Profiler()
+
+
+# --- 요청 훅 ---
+
+def _before():
+    key = _route_key()
+    m = _route_metrics(key)
+    with _lock:
+        m.in_flight += 1
+    g._metrics = (key, m, time.perf_counter())
+    db.query_time(reset=True)
+    http_client.upstream_time(reset=True)
+    if profiler.remaining > 0 or 'X-Profile' in request.headers:
+        g._profile = profiler.start(key[1])
+
+
+def _after(response):
+    state = g.pop('_metrics', None)
+    if state is None:
+        return response
+    prof = g.pop('_profile', None)
+    if prof is not None:
+        profiler.finish(prof)
+    key, m, t0 = state
+    elapsed = time.perf_counter() - t0
+    db_seconds, db_calls = db.query_time()
+    m.duration.observe(elapsed)
+    m.db.observe(db_seconds)
+    m.upstream.observe(http_client.upstream_time())
+    m.request_bytes.observe(request.content_length or 0)
+    if not response.is_streamed:
+        m.response_bytes.observe(response.calculate_content_length() or 0)
+    with _lock:
+        m.db_queries += db_calls
+        m.statuses[response.status_code] = m.statuses.get(response.status_code, 0) + 1
+        m.in_flight -= 1
+    return response
+
+
+def _teardown(exc=None):
+    # 처리되지 않은 예외로 after_request 가 불리지 않은 경우
+    state = g.pop('_metrics', None)
+    prof = g.pop('_profile', None)
+    if prof is not None:
+        profiler.finish(prof)
+    if state is not None:
+        key, m, t0 = state
+        m.duration.observe(time.perf_counter() - t0)
+        with _lock:
+            m.statuses[500] = m.statuses.get(500, 0) + 1
+            m.in_flight -= 1
+
+
+def init_app(app):
+    app.before_request(_before)
+    app.after_request(_after)
+    app.teardown_request(_teardown)
+    app.register_blueprint(metrics_bp)
+
+
+# --- Prometheus 텍스트 ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _histogram(lines, name, help_text, series):
+    """series: [(labels, LatencyHistogram.snapshot())]"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, snap in series:
+        for le, count in snap["buckets"]:
+            lines.append(f"{name}_bucket{_labels(**labels, le=le)} {count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {snap['sum']}")
+        lines.append(f"{name}_count{_labels(**labels)} {snap['count']}")
+
+
+def render():
+    with _lock:
+        routes = sorted(_routes.items())
+        counters = [(k, dict(m.statuses), m.db_queries, m.in_flight) for k, m in routes]
+    lines = []
+    by_route = [({"method": method, "route": rule}, m) for (method, rule), m in routes]
+
+    lines.append("# HELP http_requests_total Requests by route and status code.")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, rule), codes, _, _ in counters:
+        for code, n in sorted(codes.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=rule, status=code)} {n}")
+    lines.append("# HELP http_requests_in_flight Requests currently being handled.")
+    lines.append("# TYPE http_requests_in_flight gauge")
+    for (method, rule), _, _, in_flight in counters:
+        lines.append(f"http_requests_in_flight{_labels(method=method, route=rule)} {in_flight}")
+    for name, attr, help_text in (
+            ("http_request_duration_seconds", "duration", "Time until the response is returned (headers for streams)."),
+            ("http_request_db_seconds", "db", "SQLite execute/fetch time per request."),
+            ("http_request_upstream_seconds", "upstream", "Outbound (Naver) call time per request."),
+            ("http_request_size_bytes", "request_bytes", "Request body size."),
+            ("http_response_size_bytes", "response_bytes", "Response body size (non-streamed responses).")):
+        _histogram(lines, name, help_text, [(l, getattr(m, attr).snapshot()) for l, m in by_route])
+    lines.append("# HELP http_request_db_queries_total SQLite execute/fetch calls.")
+    lines.append("# TYPE http_request_db_queries_total counter")
+    for (method, rule), _, queries, _ in counters:
+        lines.append(f"http_request_db_queries_total{_labels(method=method, route=rule)} {queries}")
+
+    upstream = sorted(http_client.stats().items())
+    _histogram(lines, "upstream_call_duration_seconds", "Outbound call latency by endpoint (each attempt).",
+               [({"endpoint": name}, st["latency"]) for name, st in upstream])
+    lines.append("# HELP upstream_calls_total Outbound calls by endpoint and result.")
+    lines.append("# TYPE upstream_calls_total counter")
+    for name, st in upstream:
+        for result in ("calls", "errors", "retries", "rejected"):
+            lines.append(f"upstream_calls_total{_labels(endpoint=name, result=result)} {st[result]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """수집한 값을 모두 지웁니다. (벤치마크/점검용)"""
+    with _lock:
+        _routes.clear()
+
+
+# --- 라우트 ---
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+@metrics_bp.route('/metrics/profile', methods=['GET', 'POST'])
+def profile():
+    if request.remote_addr not in LOCAL_ADDRS:
+        return jsonify({"success": False, "message": "로컬에서만 사용할 수 있습니다."}), 403
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        count = data.get('requests', 20)
+        if not isinstance(count, int) or count < 0:
+            return jsonify({"success": False, "message": "requests 는 0 이상의 정수여야 합니다."}), 400
+        profiler.arm(count, data.get('route'))
+        return jsonify({"success": True, "requests": profiler.remaining, "route": profiler.route})
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'ncalls', 'time', 'calls'):
+        sort = 'cumulative'
+    return Response(profiler.report(sort, request.args.get('limit', 40, type=int)), mimetype='text/plain')
@@ -0,0 +1,148 @@
+import sys
+
+import db
+import upload_store
+import slot_index
+import command_queue
+import occupancy
+import stats
+import snapshots
+import events
+import search
+
+# =========================================================
+# ▼ [DB 스키마] 버전별 마이그레이션 (스키마 정의는 여기 한 곳에만)
+# =========================================================
+# - schema_version 테이블에 적용한 버전을 기록하고, 아직 적용하지 않은 것만 순서대로 실행합니다.
+#   이미 최신이면 SELECT 한 번으로 끝납니다. (서버 시작/테스트마다 DDL 을 다시 돌리지 않음)
+# - 스키마를 바꿀 때는 기존 항목을 고치지 말고 MIGRATIONS 끝에 새 버전을 추가하세요.
+# - schema_version 이 생기기 전의 DB(예전 init_tables / setup_database.py 로 만든 것)도
+#   1번부터 그대로 적용됩니다. 그래서 각 단계는 IF NOT EXISTS / 컬럼 확인으로 여러 번 실행해도 안전해야 합니다.
+#
+# 상태 확인:  python migrations.py          적용:  python migrations.py migrate
+
+# orders.updated_at 형식 (밀리초까지, 문자열 비교로 정렬 가능)
+ORDER_STAMP = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+# 초기 제품 (products 가 비어 있을 때만 넣음)
+SEED_PRODUCTS = [
+    # [빈폴] BeanPole -> BP
+    ('BP-01-01-01', '빈폴 베이직 티셔츠', 'BeanPole', 'TOP', 'Black', 'XS', 10),
+    ('BP-01-02-02', '빈폴 로고 피케 셔츠', 'BeanPole', 'TOP', 'White', 'S', 15),
+    ('BP-02-03-04', '빈폴 컴포트 치노 팬츠', 'BeanPole', 'BOTTOM', 'Gray', 'L', 8),
+    # [엄브로] Umbro -> UB
+    ('UB-01-04-05', '엄브로 팀 트레이닝 탑', 'Umbro', 'TOP', 'Red', 'XL', 12),
+    ('UB-02-05-03', '엄브로 우븐 조거 팬츠', 'Umbro', 'BOTTOM', 'Blue', 'M', 20),
+    ('UB-03-01-03', '엄브로 벤치 롱 코트', 'Umbro', 'OUTER', 'Black', 'M', 7),
+    ('UB-03-02-06', '엄브로 아노락 자켓', 'Umbro', 'OUTER', 'White', 'Free', 5),
+    # [퓨마] Puma -> PM
+    ('PM-01-03-02', '퓨마 T7 트랙 재킷', 'Puma', 'TOP', 'Gray', 'S', 18),
+    ('PM-02-01-05', '퓨마 아이코닉 T7 팬츠', 'Puma', 'BOTTOM', 'Black', 'XL', 1),
+    # [데상트] DESCENTE -> DS
+    ('DS-03-01-04', '데상트 스위스 스키팀 재킷', 'DESCENTE', 'OUTER', 'Black', 'L', 5),
+]
+
+
+def _base_tables(cursor):
+    # 운영 DB(mydatabase.db)와 같은 정의
+    cursor.execute('''CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, password TEXT NOT NULL, name TEXT NOT NULL, nickname TEXT, role TEXT DEFAULT 'STAFF', email TEXT, phone TEXT, birthdate TEXT, profile_image TEXT)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS products (item_code TEXT PRIMARY KEY, product_name TEXT NOT NULL, brand TEXT NOT NULL, category TEXT NOT NULL, color TEXT NOT NULL, size TEXT NOT NULL, stock INTEGER NOT NULL DEFAULT 0)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS orders (id INTEGER PRIMARY KEY AUTOINCREMENT, company TEXT NOT NULL, item_name TEXT NOT NULL, quantity INTEGER NOT NULL, price INTEGER DEFAULT 0, order_date TEXT, due_date TEXT, contact TEXT, note TEXT, status TEXT DEFAULT '대기중')''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS slots (slot_id TEXT PRIMARY KEY, x INTEGER, y INTEGER, w INTEGER, h INTEGER, is_active BOOLEAN DEFAULT 0)''')
+    # 결제 재시도 중복 방지용 idempotency key
+    cursor.execute('''CREATE TABLE IF NOT EXISTS checkout_requests (idempotency_key TEXT PRIMARY KEY, user_id TEXT, response TEXT NOT NULL, created_at TEXT DEFAULT (datetime('now', 'localtime')))''')
+
+
+def _orders_updated_at(cursor):
+    # 기존 DB 에는 updated_at 이 없으므로 추가 후 현재 시각으로 채움
+    order_cols = [r[1] for r in cursor.execute("PRAGMA table_info(orders)")]
+    if 'updated_at' not in order_cols:
+        cursor.execute("ALTER TABLE orders ADD COLUMN updated_at TEXT")
+        cursor.execute(f"UPDATE orders SET updated_at = {ORDER_STAMP}")
+    # 등록/수정 시 updated_at 자동 갱신 (같은 값이면 다시 UPDATE 하지 않음)
+    for op in ("INSERT", "UPDATE"):
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_orders_{op.lower()}_stamp AFTER {op} ON orders
+            BEGIN UPDATE orders SET updated_at = {ORDER_STAMP} WHERE id = NEW.id AND updated_at IS NOT {ORDER_STAMP}; END''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_contact_id ON orders (contact, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_updated_at ON orders (updated_at)")
+
+
+def _seed_products(cursor):
+    if cursor.execute("SELECT count(*) FROM products").fetchone()[0] == 0:
+        print("📦 초기 제품 데이터 추가 중...")
+        cursor.executemany("INSERT INTO products (item_code, product_name, brand, category, color, size, stock) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                           "ON CONFLICT(item_code) DO NOTHING", SEED_PRODUCTS)
+
+
+def _checkout_refunds(cursor):
+    # 결제는 됐는데 재고 부족으로 주문을 못 만든 요청을 환불 대상으로 남김 (status='refund_required')
+    cols = [r[1] for r in cursor.execute("PRAGMA table_info(checkout_requests)")]
+    if 'status' not in cols:
+        cursor.execute("ALTER TABLE checkout_requests ADD COLUMN status TEXT NOT NULL DEFAULT 'done'")
+    if 'imp_uid' not in cols:
+        cursor.execute("ALTER TABLE checkout_requests ADD COLUMN imp_uid TEXT")
+    if 'amount' not in cols:
+        cursor.execute("ALTER TABLE checkout_requests ADD COLUMN amount INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_checkout_requests_status ON checkout_requests (status)")
+
+
+# (버전, 이름, 적용 함수(cursor))
+MIGRATIONS = [
+    (1, "base tables", _base_tables),
+    (2, "orders.updated_at + stamp triggers", _orders_updated_at),
+    (3, "upload_objects", upload_store.create_schema),
+    (4, "slots_rtree", slot_index.create_schema),
+    (5, "factory_commands", command_queue.create_schema),
+    (6, "slot_state", occupancy.create_schema),
+    (7, "stats rollups", stats.create_schema),
+    (8, "snapshots", snapshots.create_schema),
+    (9, "change_log", events.create_schema),     # 위 테이블들에 기록 트리거를 거므로 마지막
+    (10, "seed products", _seed_products),
+    (11, "search fts5", search.create_schema),
+    (12, "products_fts ref column", search.add_ref_column),
+    (13, "checkout_requests refund columns", _checkout_refunds),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_version'").fetchone() is None:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn):
+    """적용하지 않은 마이그레이션을 실행하고 적용한 (버전, 이름) 목록을 반환합니다."""
+    if current_version(conn) >= LATEST:
+        return []
+    applied = []
+    # 여러 프로세스가 동시에 시작해도 한 곳에서만 적용되도록 쓰기 잠금을 먼저 잡고 다시 확인
+    with db.immediate(conn):
+        conn.execute('''CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT DEFAULT (datetime('now', 'localtime')))''')
+        version = current_version(conn)
+        cursor = conn.cursor()
+        for v, name, fn in MIGRATIONS:
+            if v > version:
+                fn(cursor)
+                cursor.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (v, name))
+                applied.append((v, name))
+    return applied
+
+
+if __name__ == '__main__':
+    conn = db.connect()
+    try:
+        if sys.argv[1:] == ['migrate']:
+            for v, name in migrate(conn):
+                print(f"  ✅ {v:>3}  {name}")
+        elif sys.argv[1:]:
+            print("사용법: python migrations.py [migrate]")
+            sys.exit(1)
+        version = current_version(conn)
+        print(f"{db.DATABASE_FILE}: 스키마 버전 {version} / 최신 {LATEST}")
+        for v, name, _ in MIGRATIONS:
+            print(f"  {'적용됨' if v <= version else '대기  '}  {v:>3}  {name}")
+    finally:
+        conn.close()
@@ -0,0 +1,104 @@
+import io
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from PIL import Image
+
+# =========================================================
+# ▼ [오프라인용] 라즈베리파이 MJPEG 카메라(stream.mjpg) 흉내 서버
+# =========================================================
+# 벤치마크/점검 스크립트에서 실제 카메라 대신 사용합니다.
+# 프레임마다 JPEG 주석(COM) 구간에 "seq=<번호>" 를 넣어 몇 번째 프레임인지 알 수 있습니다.
+# 사용법:
+#   cam = MjpegStub(fps=30).start()
+#   camera_relay.CAMERAS["cam79"] = cam.url + "/stream.mjpg"
+#   ...
+#   cam.connections  -> 받은 스트림 연결 수
+
+BOUNDARY = b'FRAME'
+
+
+def _base_jpeg(size):
+    out = io.BytesIO()
+    Image.new('RGB', size, (60, 120, 80)).save(out, 'JPEG', quality=70)
+    return out.getvalue()
+
+
+class MjpegStub:
+    def __init__(self, fps=30.0, size=(640, 480), content_length=True):
+        self.fps = fps
+        self.content_length = content_length   # False 면 파트 헤더에 Content-Length 없이 보냄
+        self.connections = 0
+        self.frames_sent = 0
+        self._jpeg = _base_jpeg(size)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def frame(self, seq):
+        # SOI 바로 뒤에 COM 구간 삽입
+        comment = f"seq={seq}".encode()
+        return self._jpeg[:2] + b'\xff\xfe' + (len(comment) + 2).to_bytes(2, 'big') + comment + self._jpeg[2:]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.0'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if not self.path.startswith('/stream.mjpg'):
+                    self.send_error(404)
+                    return
+                with stub._lock:
+                    stub.connections += 1
+                self.send_response(200)
+                self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY.decode()}')
+                self.send_header('Cache-Control', 'no-cache, private')
+                self.end_headers()
+                seq = 0
+                interval = 1.0 / stub.fps
+                next_at = time.monotonic()
+                try:
+                    while True:
+                        data = stub.frame(seq)
+                        head = b'--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n'
+                        if stub.content_length:
+                            head += b'Content-Length: ' + str(len(data)).encode() + b'\r\n'
+                        self.wfile.write(head + b'\r\n' + data + b'\r\n')
+                        with stub._lock:
+                            stub.frames_sent += 1
+                        seq += 1
+                        next_at += interval
+                        time.sleep(max(0.0, next_at - time.monotonic()))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 중계 서버가 연결을 끊은 경우
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def frame_seq(jpeg):
+    """MjpegStub 프레임에서 seq 번호를 꺼냅니다. (없으면 None)"""
+    if jpeg[2:4] != b'\xff\xfe':
+        return None
+    n = int.from_bytes(jpeg[4:6], 'big') - 2
+    text = bytes(jpeg[6:6 + n])
+    return int(text[4:]) if text.startswith(b'seq=') else None
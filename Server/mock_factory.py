@@ -1,16 +1,12 @@
-import sqlite3
 from flask import Blueprint, render_template, request, jsonify
 import time
+# --- [DB 연결] 메인 서버(appp.py)와 같은 풀 연결을 사용합니다. ---
+from db import get_db_connection
+import command_queue
+import sessions
 
 factory_bp = Blueprint('factory', __name__)
 
-# --- [DB 연결 함수] ---
-# 메인 서버(app.py)와 같은 DB 파일을 사용합니다.
-def get_db_connection():
-    conn = sqlite3.connect('mydatabase.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 # --- [가격표] HTML과 동일하게 맞춘 가격 정보 ---
 # 웹에서 가격을 안 보내주니 서버가 여기서 찾아서 DB에 넣습니다.
 PRODUCT_PRICES = {
@@ -21,7 +17,7 @@ PRODUCT_PRICES = {
 }
 
 # --- 친구의 전역 변수들 (기존 로직 유지용) ---
-ORDERS_DB = []
+# 처리한 주문은 ORDERS_DB 리스트 대신 command_queue(영구 작업 큐, 'line')에 쌓입니다.
 BRAND_CODES = { "Descente": 'D', "Beanpole": 'B', "Umbro": 'U', "Puma": 'P' }
 
 def create_mock_command(orders):
@@ -51,22 +47,14 @@ def process_order():
     try:
         data = request.get_json()
         orders = data.get('orders', [])
-        user_id = data.get('user_id', 'Guest') # HTML에서 보낸 로그인 ID 받기
+        user_id = sessions.current_user_id(data.get('user_id', 'Guest')) # 세션 토큰 (없으면 HTML에서 보낸 로그인 ID)
         order_time = time.strftime('%Y-%m-%d %H:%M:%S')
 
         if not orders:
             return jsonify({"status": "error", "message": "주문 목록이 비어 있습니다."}), 400
 
-        # 1. 친구의 메모리 리스트에 저장 (가상 공정용 - 기존 유지)
-        ORDERS_DB.append({
-            "user": user_id,
-            "time": order_time,
-            "details": orders,
-            "command": create_mock_command(orders)
-        })
-        
         # ---------------------------------------------------------
-        # ▼▼▼ [핵심] 실제 DB(mydatabase.db)에 주문 저장하기 ▼▼▼
+        # ▼▼▼ [핵심] 실제 DB(mydatabase.db)에 주문 저장 + 라인 작업 큐 등록 ▼▼▼
         # ---------------------------------------------------------
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -84,12 +72,16 @@ def process_order():
                 VALUES (?, ?, ?, ?, '대기중', ?, ?, ?)
             """, (user_id, name, qty, order_time, '010-0000-0000', price, '웹사이트 주문')) 
 
+        # 주문과 같은 트랜잭션으로 공정 명령을 큐에 넣습니다. (디스패처가 가져감)
+        command = create_mock_command(orders)
+        payload = {"user": user_id, "time": order_time, "details": orders}
+        command_id = command_queue.enqueue(conn, "line", payload, command)
         conn.commit()
-        conn.close()
+        command_queue.remember(command_id, "line", payload, command)
         # ---------------------------------------------------------
 
         # 가상 공정 시작 알림
-        mock_process_start(ORDERS_DB[-1]["command"])
+        mock_process_start(command)
 
         return jsonify({
             "status": "success",
@@ -102,9 +94,10 @@ def process_order():
 
 @factory_bp.route('/api/get_orders', methods=['GET'])
 def get_orders():
-    latest_orders = ORDERS_DB[-5:][::-1]
+    conn = get_db_connection()
+    latest_orders = command_queue.recent(conn, kind="line", limit=5)
     return jsonify({
         "status": "success",
-        "total_count": len(ORDERS_DB),
+        "total_count": sum(command_queue.counts(conn)["line"].values()),
         "latest_orders": latest_orders
-    }), 200
\ No newline at end of file
+    }), 200
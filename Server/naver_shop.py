@@ -1,4 +1,4 @@
-import requests
+import http_client
 from flask import Blueprint, request, jsonify
 import urllib.parse
 
@@ -9,6 +9,8 @@ shop_bp = Blueprint('shop', __name__)
 NAVER_CLIENT_ID = "여기에_Client_ID_입력"
 NAVER_CLIENT_SECRET = "여기에_Client_Secret_입력"
 
+NAVER_SHOP_URL = "https://openapi.naver.com/v1/search/shop.json"
+
 # 우리가 허용할 브랜드 목록
 TARGET_BRANDS = ["빈폴", "엄브로", "데상트", "퓨마"]
 
@@ -31,8 +33,8 @@ def search_shop():
     # 시작 위치 계산 (1페이지=1, 2페이지=21, 3페이지=41 ...)
     start = (page - 1) * display + 1
 
-    # 3. 네이버 API 요청
-    url = f"https://openapi.naver.com/v1/search/shop.json?query={encText}&display={display}&start={start}&sort=sim"
+    # 3. 네이버 API 요청 (공용 클라이언트: 타임아웃/재시도/차단기 적용)
+    url = f"{NAVER_SHOP_URL}?query={encText}&display={display}&start={start}&sort=sim"
     
     headers = {
         "X-Naver-Client-Id": NAVER_CLIENT_ID,
@@ -40,7 +42,7 @@ def search_shop():
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get("naver_shop", url, headers=headers)
         res_code = response.status_code
 
         if res_code == 200:
@@ -49,14 +51,8 @@ def search_shop():
             print("Error Code:", res_code)
             return jsonify({"error": "Naver API Error"}), res_code
 
+    except http_client.CircuitOpenError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         print("Server Error:", str(e))
         return jsonify({"error": str(e)}), 500
-
-# app.py 상단에 import 추가
-from naver_shop import shop_bp
-
-# ... (중간 생략) ...
-
-# 기존 factory_bp 등록 밑에 추가
-app.register_blueprint(shop_bp)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# =========================================================
+# ▼ [오프라인용] 네이버 쇼핑/캡차 API 흉내 서버
+# =========================================================
+# 벤치마크/점검 스크립트에서 실제 네이버 대신 사용합니다.
+# 사용법:
+#   stub = NaverStub(delay=0.05).start()
+#   appp.NAVER_SHOP_URL = stub.url + "/v1/search/shop.json"
+#   ...
+#   stub.calls  -> 받은 요청 수
+
+
+class NaverStub:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay      # 응답 지연(초)
+        self.fail = fail        # True 면 500 응답
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _items(self, query, start, display):
+        brand = query.split()[0] if query.split() else "stub"
+        return [{
+            "title": f"{query} 상품 {start + i}",
+            "link": f"https://example.com/{start + i}",
+            "image": "",
+            "lprice": str(10000 + (start + i) * 10),
+            "hprice": "",
+            "mallName": "stub",
+            "productId": f"{abs(hash(query)) % 100000}{start + i:05d}",
+            "brand": brand,
+            "category1": "패션의류",
+        } for i in range(display)]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code, body):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                try:
+                    self.send_response(code)
+                    self.send_header('Content-Type', 'application/json; charset=utf-8')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 클라이언트가 타임아웃으로 먼저 끊은 경우
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.calls += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.fail:
+                    return self._send(500, {"errorMessage": "stub failure"})
+
+                parsed = urlparse(self.path)
+                qs = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if parsed.path.endswith('/search/shop.json'):
+                    start = int(qs.get('start', 1))
+                    display = int(qs.get('display', 10))
+                    return self._send(200, {"total": 1000, "start": start, "display": display,
+                                            "items": stub._items(qs.get('query', ''), start, display)})
+                if parsed.path.endswith('/captcha/nkey'):
+                    if qs.get('code') == '1':
+                        return self._send(200, {"result": qs.get('value') == 'ok', "responseTime": 1.0})
+                    return self._send(200, {"key": "stubkey"})
+                return self._send(404, {"errorMessage": "not found"})
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
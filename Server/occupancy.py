@@ -0,0 +1,282 @@
+import os
+import time
+import threading
+import numpy as np
+from flask import Blueprint, request, jsonify
+
+import db
+import events
+from db import get_db_connection
+
+# =========================================================
+# ▼ [비전 연동] 라즈베리파이 YOLO 검출 결과 수신 → 슬롯 점유 상태 계산
+# =========================================================
+# - 카메라가 여러 프레임의 검출 결과를 한 번에(열 단위 배열로) 보냅니다.
+# - 모든 박스 × 모든 활성 슬롯의 IoU 를 NumPy 로 한 번에 계산합니다.
+# - 카메라별 최근 WINDOW 프레임의 다수결로 점유 여부를 정해 깜빡임을 없앱니다.
+# - 슬롯 하나는 카메라 하나만 판단합니다. slots.camera_id 로 묶으세요.
+#   (/api/slots/save, /api/slots/import 에 "camera_id" 를 함께 보내면 됨)
+#   camera_id 가 없는 슬롯은 DEFAULT_CAMERA(환경 변수 OCCUPANCY_DEFAULT_CAMERA) 카메라가 판단하고,
+#   설정이 없으면 어느 카메라도 판단하지 않아 저장된 상태를 그대로 유지합니다.
+#   (슬롯을 못 보는 카메라가 '비었음' 으로 덮어써 상태가 깜빡이지 않도록)
+# - 상태가 바뀐 슬롯만 slot_state 테이블에 한 트랜잭션으로 기록합니다.
+# - 빈 슬롯 목록은 메모리에 정렬해 둔 목록을 그대로 돌려줍니다. (DB 조회 없음)
+#   slots 가 바뀌었는지는 같은 프로세스의 쓰기면 요청 종료 시(db.write_hooks) 바로,
+#   다른 프로세스의 쓰기는 RECHECK 초마다 change_log 버전으로 확인합니다.
+#   요청 밖에서 slots 를 직접 고친 스크립트는 tracker.invalidate() 를 불러 주세요.
+#
+# POST /api/vision/detections
+#   {"camera_id": "cam1",
+#    "frame_ids": [101, 102],          # 프레임 번호 (카메라별 증가)
+#    "counts":    [2, 1],              # 프레임별 박스 개수
+#    "boxes":     [x, y, w, h, ...],   # 박스 좌표 (슬롯과 같은 픽셀 좌표계, 평탄화)
+#    "classes":   [0, 3, 0],
+#    "scores":    [0.91, 0.55, 0.88]}
+# GET  /api/slots/empty[?camera_id=cam1]
+
+occupancy_bp = Blueprint('occupancy', __name__)
+
+IOU_THRESHOLD = 0.25   # 박스-슬롯 IoU 가 이 값 이상이면 해당 프레임에서 '점유'
+MIN_SCORE = 0.4        # 이 점수 미만 검출은 무시
+CLASSES = None         # 점유로 인정할 클래스 번호 집합 (None = 전부)
+WINDOW = 5             # 다수결에 쓰는 최근 프레임 수
+MAX_FRAMES = 1000      # 요청 한 번에 받을 최대 프레임 수
+DEFAULT_CAMERA = os.environ.get('OCCUPANCY_DEFAULT_CAMERA') or None   # camera_id 없는 슬롯을 판단할 카메라
+RECHECK = 1.0          # 다른 프로세스의 slots 변경을 확인하는 주기(초)
+
+
+def create_schema(cursor):
+    """slot_state 테이블을 만들고 slots 에 camera_id 를 추가합니다. (migrations.py 에서 호출)"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS slot_state (slot_id TEXT PRIMARY KEY, occupied INTEGER NOT NULL, camera_id TEXT, frame_id INTEGER, since TEXT)''')
+    slot_cols = [r[1] for r in cursor.execute("PRAGMA table_info(slots)")]
+    if 'camera_id' not in slot_cols:
+        # NULL 이면 DEFAULT_CAMERA 만 판단 (설정이 없으면 어느 카메라도 판단하지 않음)
+        cursor.execute("ALTER TABLE slots ADD COLUMN camera_id TEXT")
+    # 슬롯을 지우면 점유 상태도 함께 지움
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_slots_delete_state AFTER DELETE ON slots
+        BEGIN DELETE FROM slot_state WHERE slot_id = OLD.slot_id; END''')
+
+
+def iou_matrix(boxes, rects):
+    """boxes (N,4), rects (M,4) 모두 x1,y1,x2,y2 → IoU (N,M)"""
+    ix1 = np.maximum(boxes[:, None, 0], rects[None, :, 0])
+    iy1 = np.maximum(boxes[:, None, 1], rects[None, :, 1])
+    ix2 = np.minimum(boxes[:, None, 2], rects[None, :, 2])
+    iy2 = np.minimum(boxes[:, None, 3], rects[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_b = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    area_r = (rects[:, 2] - rects[:, 0]) * (rects[:, 3] - rects[:, 1])
+    union = area_b[:, None] + area_r[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def frame_hits(counts, boxes, scores, classes, rects):
+    """프레임별 슬롯 점유 여부 (F,M) bool"""
+    counts = np.asarray(counts, dtype=np.int64)
+    F, M = len(counts), len(rects)
+    hits = np.zeros((F, M), dtype=bool)
+    if M == 0 or len(boxes) == 0:
+        return hits
+    keep = scores >= MIN_SCORE
+    if CLASSES is not None:
+        keep &= np.isin(classes, list(CLASSES))
+    frame_of = np.repeat(np.arange(F), counts)[keep]
+    xywh = boxes[keep]
+    if len(xywh) == 0:
+        return hits
+    xyxy = np.concatenate([xywh[:, :2], xywh[:, :2] + xywh[:, 2:]], axis=1)
+    hit = iou_matrix(xyxy, rects) >= IOU_THRESHOLD
+    # 프레임별 OR: 같은 프레임의 박스 행들을 묶어서 reduce
+    starts = np.flatnonzero(np.r_[True, frame_of[1:] != frame_of[:-1]])
+    hits[frame_of[starts]] = np.logical_or.reduceat(hit, starts, axis=0)
+    return hits
+
+
+class _CameraState:
+    def __init__(self, slot_ids, rects):
+        self.slot_ids = slot_ids
+        self.rects = rects
+        self.window = np.zeros((WINDOW, len(slot_ids)), dtype=np.uint8)
+        self.pos = 0
+        self.filled = 0
+        self.last_frame = -1
+
+
+class OccupancyTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots_version = None
+        self._dirty = True       # 다음 조회 때 slots 버전을 확인
+        self._checked = 0.0      # 마지막 버전 확인 시각 (monotonic)
+        self._sorted = {}        # camera_id -> 정렬된 빈 슬롯 목록 (empty 가 바뀌면 비움)
+        self._slots = {}        # slot_id -> 판단하는 camera_id (None = 없음)
+        self._rows = []
+        self._cameras = {}      # camera_id -> _CameraState
+        self.state = {}         # slot_id -> 점유 여부
+        self.empty = set()      # 비어 있는 활성 슬롯
+        self.frames = 0
+        self.detections = 0
+        self.changes = 0
+
+    def invalidate(self):
+        """다음 조회 때 slots 버전을 다시 확인하게 합니다. (db.write_hooks 에서 호출)"""
+        self._dirty = True
+
+    def _refresh(self, conn):
+        # slots 가 바뀌었을 때만 슬롯 좌표 배열을 다시 만듦 (쓰기 알림이 없으면 RECHECK 초마다만 확인)
+        now = time.monotonic()
+        if not self._dirty and now - self._checked < RECHECK:
+            return
+        self._dirty, self._checked = False, now
+        version = events.current_version(conn, 'slots')
+        if version == self._slots_version:
+            return
+        rows = conn.execute("SELECT slot_id, x, y, w, h, camera_id FROM slots WHERE is_active = 1").fetchall()
+        saved = {r['slot_id']: bool(r['occupied']) for r in conn.execute("SELECT slot_id, occupied FROM slot_state")}
+        self._slots = {r['slot_id']: r['camera_id'] or DEFAULT_CAMERA for r in rows}
+        self._rows = rows
+        self._cameras = {}
+        self.state = {sid: saved.get(sid, self.state.get(sid, False)) for sid in self._slots}
+        self.empty = {sid for sid, occ in self.state.items() if not occ}
+        self._sorted = {}
+        self._slots_version = version
+
+    def _camera(self, camera_id):
+        cam = self._cameras.get(camera_id)
+        if cam is None:
+            rows = [r for r in self._rows if self._slots[r['slot_id']] == camera_id]
+            rects = np.array([[r['x'], r['y'], r['x'] + r['w'], r['y'] + r['h']] for r in rows],
+                             dtype=np.float32).reshape(-1, 4)
+            cam = self._cameras[camera_id] = _CameraState([r['slot_id'] for r in rows], rects)
+        return cam
+
+    def ingest(self, conn, camera_id, frame_ids, counts, boxes, scores, classes=None):
+        """검출 배치를 반영하고 상태가 바뀐 슬롯 목록 [(slot_id, occupied)] 을 반환합니다."""
+        frame_ids = np.asarray(frame_ids, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float32)
+        classes = np.zeros(len(boxes), dtype=np.int64) if classes is None else np.asarray(classes, dtype=np.int64)
+        if len(frame_ids) != len(counts) or counts.sum() != len(boxes) or len(scores) != len(boxes) \
+                or len(classes) != len(boxes):
+            raise ValueError("frame_ids/counts/boxes/scores/classes 길이가 맞지 않습니다.")
+
+        with self._lock:
+            self._refresh(conn)
+            cam = self._camera(camera_id)
+
+            # 이미 받은 프레임(재전송/순서 뒤바뀜)은 버림
+            fresh = frame_ids > cam.last_frame
+            if not fresh.all():
+                box_keep = np.repeat(fresh, counts)
+                frame_ids, counts = frame_ids[fresh], counts[fresh]
+                boxes, scores, classes = boxes[box_keep], scores[box_keep], classes[box_keep]
+            if len(frame_ids) == 0:
+                return []
+            hits = frame_hits(counts, boxes, scores, classes, cam.rects)
+
+            # 슬라이딩 윈도우에 최근 프레임만 기록
+            for row in hits[-WINDOW:]:
+                cam.window[cam.pos] = row
+                cam.pos = (cam.pos + 1) % WINDOW
+            cam.filled = min(WINDOW, cam.filled + len(hits))
+            cam.last_frame = int(frame_ids.max())
+            smoothed = cam.window[:cam.filled].sum(axis=0) * 2 > cam.filled
+
+            changed = []
+            for idx in np.flatnonzero(smoothed != np.array([self.state.get(s, False) for s in cam.slot_ids], dtype=bool)):
+                sid = cam.slot_ids[idx]
+                occ = bool(smoothed[idx])
+                self.state[sid] = occ
+                (self.empty.discard if occ else self.empty.add)(sid)
+                changed.append((sid, occ))
+            if changed:
+                self._sorted = {}
+
+            self.frames += len(frame_ids)
+            self.detections += len(boxes)
+            self.changes += len(changed)
+
+            # 메모리 상태를 바꾼 순서 그대로 DB 에 남도록 잠금 안에서 기록
+            if changed:
+                conn.executemany("""INSERT INTO slot_state (slot_id, occupied, camera_id, frame_id, since)
+                                    VALUES (?, ?, ?, ?, datetime('now', 'localtime'))
+                                    ON CONFLICT(slot_id) DO UPDATE SET occupied=excluded.occupied, camera_id=excluded.camera_id,
+                                        frame_id=excluded.frame_id, since=excluded.since""",
+                                 [(sid, int(occ), camera_id, int(frame_ids.max())) for sid, occ in changed])
+                conn.commit()
+        return changed
+
+    def refresh(self, conn):
+        with self._lock:
+            self._refresh(conn)
+
+    def is_empty(self, slot_id):
+        return slot_id in self.empty
+
+    def empty_slots(self, conn, camera_id=None):
+        with self._lock:
+            self._refresh(conn)
+            cached = self._sorted.get(camera_id)
+            if cached is None:
+                if camera_id is None:
+                    cached = sorted(self.empty)
+                else:
+                    cached = sorted(s for s in self.empty if self._slots.get(s) == camera_id)
+                self._sorted[camera_id] = cached
+            return list(cached)
+
+    def stats(self):
+        with self._lock:
+            return {"frames": self.frames, "detections": self.detections, "state_changes": self.changes,
+                    "slots": len(self.state), "empty": len(self.empty)}
+
+
+tracker = OccupancyTracker()
+db.write_hooks.append(tracker.invalidate)
+
+
+def _parse_batch(d):
+    # 열 단위(compact) 형식 또는 {"frames": [{frame_id, boxes, classes, scores}, ...]} 형식
+    if 'frames' in d:
+        frames = d['frames']
+        frame_ids = [f['frame_id'] for f in frames]
+        counts = [len(f.get('boxes', [])) for f in frames]
+        boxes = [b for f in frames for b in f.get('boxes', [])]
+        classes = [c for f in frames for c in f.get('classes', [0] * len(f.get('boxes', [])))]
+        scores = [s for f in frames for s in f.get('scores', [1.0] * len(f.get('boxes', [])))]
+        return frame_ids, counts, boxes, classes, scores
+    boxes = d.get('boxes', [])
+    n = len(boxes) // 4 if boxes and not isinstance(boxes[0], list) else len(boxes)
+    return d['frame_ids'], d['counts'], boxes, d.get('classes', [0] * n), d.get('scores', [1.0] * n)
+
+
+# --- 라우트 ---
+
+@occupancy_bp.route('/api/vision/detections', methods=['POST'])
+def ingest_detections():
+    try:
+        d = request.get_json()
+        camera_id = d.get('camera_id')
+        if not camera_id:
+            return jsonify({"success": False, "message": "camera_id 가 필요합니다."}), 400
+        frame_ids, counts, boxes, classes, scores = _parse_batch(d)
+        if len(frame_ids) > MAX_FRAMES:
+            return jsonify({"success": False, "message": f"한 번에 최대 {MAX_FRAMES} 프레임까지 보낼 수 있습니다."}), 413
+        changed = tracker.ingest(get_db_connection(), camera_id, frame_ids, counts, boxes, scores, classes)
+        return jsonify({"success": True, "frames": len(frame_ids),
+                        "changed": [{"slot_id": s, "occupied": o} for s, o in changed]})
+    except (KeyError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@occupancy_bp.route('/api/slots/empty', methods=['GET'])
+def get_empty_slots():
+    return jsonify(tracker.empty_slots(get_db_connection(), request.args.get('camera_id')))
+
+
+@occupancy_bp.route('/api/vision/stats', methods=['GET'])
+def vision_stats():
+    return jsonify(tracker.stats())
@@ -0,0 +1,156 @@
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# =========================================================
+# ▼ [비밀번호] 해시 계산을 별도 프로세스 풀에서 + 로그인 시도 제한
+# =========================================================
+# - scrypt 해시는 한 번에 수십 ms 동안 CPU 를 씁니다. 요청 스레드에서 돌리면
+#   로그인이 몰릴 때 다른 API 까지 느려지므로 크기가 정해진 프로세스 풀에 맡깁니다.
+# - 풀에 쌓인 작업이 MAX_PENDING 을 넘으면 기다리지 않고 Busy 를 던집니다. (→ 503)
+#   TIMEOUT 안에 끝나지 않거나 풀을 다시 만들어도 작업 프로세스가 죽으면 역시 Busy 입니다.
+# - 저장된 해시의 방식/파라미터가 METHOD 와 다르면 로그인 성공 시 새로 해시합니다.
+# - 아이디별/IP별 토큰 버킷으로 로그인 시도 횟수를 제한합니다. (→ 429)
+
+METHOD = "scrypt:32768:8:1"            # werkzeug 해시 방식 (바꾸면 다음 로그인 때 자동 재해시)
+POOL_SIZE = max(1, min(4, (os.cpu_count() or 2) - 1))   # 0 이면 요청 스레드에서 바로 계산
+MAX_PENDING = 32                       # 풀에서 대기/실행 중인 작업 상한
+TIMEOUT = 10.0                         # 작업 하나를 기다리는 최대 시간(초)
+
+# 토큰 버킷: (최대 연속 시도, 초당 충전)
+USER_LIMIT = (5, 1 / 10)               # 아이디 하나: 5번 연속, 이후 10초에 1번
+IP_LIMIT = (30, 1.0)                   # IP 하나: 30번 연속, 이후 초당 1번
+
+
+class Busy(Exception):
+    """해시 작업이 너무 많이 밀려 있어 바로 거절한 경우"""
+
+
+# --- 풀에서 실행되는 함수 (모듈 최상위에 있어야 pickle 가능) ---
+
+def _hash(password):
+    return generate_password_hash(password, method=METHOD)
+
+
+def _verify(stored, password):
+    """(일치 여부, 재해시된 값 또는 None)"""
+    if not check_password_hash(stored, password):
+        return False, None
+    if needs_rehash(stored):
+        return True, _hash(password)
+    return True, None
+
+
+def needs_rehash(stored):
+    return not stored.startswith(METHOD + "$")
+
+
+class HashPool:
+    def __init__(self, size=POOL_SIZE, max_pending=MAX_PENDING):
+        self.size = size
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.done = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self.size <= 0:
+            return fn(*args)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise Busy("로그인 요청이 많습니다. 잠시 후 다시 시도해주세요.")
+            self.pending += 1
+        try:
+            try:
+                return self._get_executor().submit(fn, *args).result(TIMEOUT)
+            except BrokenProcessPool:
+                # 작업 프로세스가 죽었으면 풀을 새로 만들고 한 번만 다시 시도
+                with self._lock:
+                    self._executor = None
+                return self._get_executor().submit(fn, *args).result(TIMEOUT)
+        except (FutureTimeout, BrokenProcessPool):
+            with self._lock:
+                self.rejected += 1
+            raise Busy("로그인 처리가 지연되고 있습니다. 잠시 후 다시 시도해주세요.")
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.done += 1
+
+    def hash(self, password):
+        return self._run(_hash, password)
+
+    def verify(self, stored, password):
+        ok, new_hash = self._run(_verify, stored, password)
+        if new_hash:
+            self.rehashed += 1
+        return ok, new_hash
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        return {"size": self.size, "max_pending": self.max_pending, "pending": self.pending,
+                "done": self.done, "rejected": self.rejected, "rehashed": self.rehashed}
+
+
+pool = HashPool()
+
+
+class TokenBucket:
+    """키(아이디, IP)별 토큰 버킷. 시도할 때마다 토큰 하나를 씁니다."""
+
+    def __init__(self, burst, rate, max_keys=100_000):
+        self.burst = burst
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = {}   # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """토큰이 있으면 0, 없으면 다음 토큰까지 남은 초를 반환합니다."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return 0.0
+
+    def _prune(self, now):
+        # 다 충전된 버킷은 없는 것과 같으므로 지움
+        full = [k for k, (t, u) in self._buckets.items() if t + (now - u) * self.rate >= self.burst]
+        for k in full:
+            del self._buckets[k]
+
+
+user_buckets = TokenBucket(*USER_LIMIT)
+ip_buckets = TokenBucket(*IP_LIMIT)
+
+
+def throttle(user_id, ip):
+    """로그인 시도를 허용하면 0, 막으면 Retry-After 로 쓸 초를 반환합니다."""
+    wait = ip_buckets.take(ip)
+    if wait:
+        return wait
+    return user_buckets.take(user_id)
@@ -0,0 +1,270 @@
+import time
+from flask import Blueprint, request, jsonify
+
+from db import get_db_connection
+from occupancy import tracker
+
+# =========================================================
+# ▼ [적재 계획] 승인된 주문 묶음 → 빈 슬롯 배정 + 아두이노카 이동 순서
+# =========================================================
+# 예전에는 주문 하나마다 임의의 빈 슬롯을 골라 카가 적재 위치 ↔ 선반을 한 번씩 왕복했습니다.
+# 여기서는 대기 중인 주문을 한꺼번에 보고 카 한 번(트립)에 CAR_CAPACITY 개씩 싣고 돌도록 계획합니다.
+#
+# 비용 모델 (슬롯 좌표 = slots 테이블 사각형의 중심, 카메라 픽셀 좌표)
+#   - 카는 선반 앞을 x 방향으로, 로봇팔은 y 방향으로 움직입니다.
+#     두 슬롯 사이 비용 = |Δx| / CAR_SPEED + |Δy| / ARM_SPEED (초)
+#   - 트립마다 적재 위치(DEPOT)에서 출발/복귀하고 LOAD_TIME 이 들고, 상자 하나 놓는 데 PLACE_TIME
+# 계획 순서
+#   1) 적재 위치에서 가까운 빈 슬롯부터 최근접 이웃으로 트립을 만듦 (주문 순서대로 트립에 채움)
+#   2) 트립마다 2-opt 로 방문 순서를 다듬고, 쓰지 않은 빈 슬롯과 바꿔 더 짧아지면 교체
+#   3) TIME_BUDGET 안에서만 개선 (시간이 다 되면 그때까지의 최선)
+# 같은 주문을 하나씩 처리하는 FIFO 방식(첫 번째 빈 슬롯, 주문마다 왕복)의 비용도 같이 돌려줍니다.
+#
+#   POST /api/dispatch/plan  {"order_ids": [3, 5], "capacity": 4, "budget_ms": 200}
+#        order_ids 생략 시 status 가 PENDING_STATUS 인 주문 전부 (id 순)
+
+planner_bp = Blueprint('planner', __name__)
+
+PENDING_STATUS = "승인됨"
+DEPOT = (0.0, 0.0)           # 카가 상자를 싣는 위치 (x, 팔 높이 y)
+CAR_CAPACITY = 4             # 트립 한 번에 싣는 상자 수
+CAR_SPEED = 200.0            # px/s
+ARM_SPEED = 100.0            # px/s
+LOAD_TIME = 3.0              # 트립마다 적재 시간(초)
+PLACE_TIME = 2.0             # 상자 하나 내려놓는 시간(초)
+TIME_BUDGET = 0.2            # 개선 단계 시간 제한(초)
+MAX_ORDERS = 500
+MAX_BUDGET = 2.0
+
+
+def cost(a, b):
+    return abs(a[0] - b[0]) / CAR_SPEED + abs(a[1] - b[1]) / ARM_SPEED
+
+
+def route_cost(route, pos, depot=DEPOT):
+    """적재 위치 → route 의 슬롯들 → 적재 위치 이동 시간 (초)"""
+    total, prev = 0.0, depot
+    for sid in route:
+        total += cost(prev, pos[sid])
+        prev = pos[sid]
+    return total + cost(prev, depot)
+
+
+def expand_units(orders, limit):
+    """[(order_id, item_name, quantity)] → 앞에서부터 최대 limit 개의 상자 단위 [(order_id, item_name)] (주문 순서 유지)
+
+    수량이 아무리 커도 빈 슬롯 수(limit) 이상은 펼치지 않습니다. 나머지는 _unassigned 가 수량으로 셉니다.
+    """
+    units = []
+    for oid, name, qty in orders:
+        n = min(max(int(qty), 0), limit - len(units))
+        units += [(oid, name)] * n
+        if len(units) >= limit:
+            break
+    return units
+
+
+# --- 계획 ---
+
+def _build_trips(n_units, pos, depot, capacity):
+    """최근접 이웃으로 트립을 만듦: 트립마다 적재 위치에서 출발해 가장 가까운 빈 슬롯을 차례로 고름"""
+    free = set(pos)
+    trips = []
+    remaining = n_units
+    while remaining > 0 and free:
+        route, (hx, hy) = [], depot
+        for _ in range(min(capacity, remaining)):
+            if not free:
+                break
+            sid, best = None, None
+            for s in free:   # min(key=cost) 와 같지만 빈 슬롯 수만큼 도는 곳이라 풀어 씀 (같은 비용이면 작은 id)
+                x, y = pos[s]
+                c = abs(hx - x) / CAR_SPEED + abs(hy - y) / ARM_SPEED
+                if best is None or c < best or (c == best and s < sid):
+                    sid, best = s, c
+            free.discard(sid)
+            route.append(sid)
+            hx, hy = pos[sid]
+        remaining -= len(route)
+        trips.append(route)
+    return trips, free
+
+
+def _two_opt(route, pos, depot, deadline):
+    """구간 뒤집기로 더 짧아지는 동안 반복. 개선 횟수를 반환"""
+    points = [depot] + [pos[s] for s in route] + [depot]
+    improved, moves = True, 0
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, len(points) - 2):
+            for j in range(i + 1, len(points) - 1):
+                delta = (cost(points[i - 1], points[j]) + cost(points[i], points[j + 1])
+                         - cost(points[i - 1], points[i]) - cost(points[j], points[j + 1]))
+                if delta < -1e-9:
+                    points[i:j + 1] = points[i:j + 1][::-1]
+                    route[i - 1:j] = route[i - 1:j][::-1]
+                    improved = True
+                    moves += 1
+    return moves
+
+
+def _swap_free(route, pos, depot, free, deadline):
+    """트립의 슬롯을 쓰지 않은 빈 슬롯으로 바꿔 짧아지면 교체. 개선 횟수를 반환"""
+    moves = 0
+    for i, sid in enumerate(route):
+        if time.perf_counter() >= deadline:
+            break
+        prev = pos[route[i - 1]] if i > 0 else depot
+        nxt = pos[route[i + 1]] if i + 1 < len(route) else depot
+        here = cost(prev, pos[sid]) + cost(pos[sid], nxt)
+        best, best_cost = None, here - 1e-9
+        # 후보 수만큼 도는 안쪽 반복이라 cost() 호출 대신 풀어서 계산
+        (px, py), (nx, ny) = prev, nxt
+        for cand in free:
+            cx, cy = pos[cand]
+            c = (abs(px - cx) + abs(cx - nx)) / CAR_SPEED + (abs(py - cy) + abs(cy - ny)) / ARM_SPEED
+            if c < best_cost:
+                best, best_cost = cand, c
+        if best is not None:
+            free.discard(best)
+            free.add(sid)
+            route[i] = best
+            moves += 1
+    return moves
+
+
+def plan_trip(n, pos, depot=DEPOT, budget=None):
+    """상자 n개를 실을 트립 하나: 빈 슬롯 {slot_id: (x, y)} 중에서 고른 방문 순서 (시뮬레이터 등에서 사용)
+
+    budget=None 이면 시간 제한 없이 끝까지 개선합니다. (결과가 실행 속도에 따라 달라지지 않음)
+    """
+    trips, free = _build_trips(n, pos, depot, n)
+    if not trips:
+        return []
+    deadline = float('inf') if budget is None else time.perf_counter() + budget
+    _two_opt(trips[0], pos, depot, deadline)
+    _swap_free(trips[0], pos, depot, free, deadline)
+    return trips[0]
+
+
+def _summary(trips, pos, depot):
+    car = arm = seconds = 0.0
+    items = 0
+    for route in trips:
+        prev = depot
+        for sid in route + [None]:
+            point = depot if sid is None else pos[sid]
+            car += abs(point[0] - prev[0])
+            arm += abs(point[1] - prev[1])
+            prev = point
+        seconds += LOAD_TIME + route_cost(route, pos, depot) + PLACE_TIME * len(route)
+        items += len(route)
+    return {"trips": len(trips), "items": items, "car_distance": round(car, 1),
+            "arm_distance": round(arm, 1), "seconds": round(seconds, 2)}
+
+
+def _dispatch(trips, units, pos, depot):
+    """트립(슬롯 순서)과 상자(주문 순서)를 짝지어 응답 형태로"""
+    out, k = [], 0
+    for route in trips:
+        stops = []
+        for sid in route:
+            order_id, item_name = units[k]
+            k += 1
+            stops.append({"slot_id": sid, "order_id": order_id, "item_name": item_name,
+                          "x": pos[sid][0], "y": pos[sid][1]})
+        out.append({"orders": sorted({s["order_id"] for s in stops}), "stops": stops,
+                    "seconds": round(LOAD_TIME + route_cost(route, pos, depot) + PLACE_TIME * len(route), 2)})
+    return out
+
+
+def plan(orders, pos, depot=DEPOT, capacity=CAR_CAPACITY, budget=TIME_BUDGET):
+    """orders: [(order_id, item_name, quantity)] 처리 순서대로, pos: {빈 slot_id: (x, y)}"""
+    started = time.perf_counter()
+    units = expand_units(orders, len(pos))
+    trips, free = _build_trips(len(units), pos, depot, capacity)
+    deadline = started + budget
+    moves = 0
+    # 2-opt → 빈 슬롯 교체를 번갈아, 더 이상 줄지 않거나 시간이 다 될 때까지
+    for route in trips:
+        while time.perf_counter() < deadline:
+            changed = _two_opt(route, pos, depot, deadline) + _swap_free(route, pos, depot, free, deadline)
+            moves += changed
+            if not changed:
+                break
+    assigned = sum(len(r) for r in trips)
+    return {"trips": _dispatch(trips, units, pos, depot), "totals": _summary(trips, pos, depot),
+            "unassigned": _unassigned(orders, assigned), "improvements": moves,
+            "timed_out": time.perf_counter() >= deadline,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+def fifo_plan(orders, pos, depot=DEPOT, capacity=CAR_CAPACITY):
+    """기존 방식: 주문마다 따로 왕복, 슬롯은 빈 슬롯 중 첫 번째(slot_id 순)"""
+    free = sorted(pos)
+    trips = []
+    for oid, _, qty in orders:
+        take, free = free[:max(int(qty), 0)], free[max(int(qty), 0):]
+        trips += [take[i:i + capacity] for i in range(0, len(take), capacity)]
+        if not free:
+            break
+    return _summary(trips, pos, depot)
+
+
+def _unassigned(orders, assigned):
+    """주문 순서대로 앞의 assigned 개를 배정했을 때 남는 수량"""
+    counts = {}
+    for oid, name, qty in orders:
+        qty = max(int(qty), 0)
+        skip = min(qty, assigned)
+        assigned -= skip
+        if qty > skip:
+            counts[(oid, name)] = counts.get((oid, name), 0) + qty - skip
+    return [{"order_id": oid, "item_name": name, "quantity": n} for (oid, name), n in counts.items()]
+
+
+def empty_slot_positions(conn):
+    """점유 추적기가 비어 있다고 보는 활성 슬롯의 중심 좌표"""
+    empty = tracker.empty_slots(conn)
+    if not empty:
+        return {}
+    marks = ",".join("?" * len(empty))
+    rows = conn.execute(f"SELECT slot_id, x, y, w, h FROM slots WHERE slot_id IN ({marks})", empty).fetchall()
+    return {r['slot_id']: (r['x'] + r['w'] / 2, r['y'] + r['h'] / 2) for r in rows}
+
+
+# --- 라우트 ---
+
+@planner_bp.route('/api/dispatch/plan', methods=['POST'])
+def dispatch_plan():
+    d = request.get_json(silent=True) or {}
+    try:
+        capacity = int(d.get('capacity', CAR_CAPACITY))
+        budget = min(float(d.get('budget_ms', TIME_BUDGET * 1000)) / 1000, MAX_BUDGET)
+        depot = tuple(float(v) for v in d.get('depot', DEPOT))
+        order_ids = [int(i) for i in d.get('order_ids', [])][:MAX_ORDERS]
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "capacity, budget_ms, depot, order_ids 형식이 잘못되었습니다."}), 400
+    if capacity < 1 or len(depot) != 2:
+        return jsonify({"success": False, "message": "capacity 는 1 이상, depot 은 [x, y] 여야 합니다."}), 400
+
+    conn = get_db_connection()
+    if order_ids:
+        marks = ",".join("?" * len(order_ids))
+        rows = conn.execute(f"SELECT id, item_name, quantity FROM orders WHERE id IN ({marks}) ORDER BY id", order_ids).fetchall()
+    else:
+        rows = conn.execute("SELECT id, item_name, quantity FROM orders WHERE status = ? ORDER BY id LIMIT ?",
+                            (PENDING_STATUS, MAX_ORDERS)).fetchall()
+    orders = [(r['id'], r['item_name'], r['quantity']) for r in rows]
+    pos = empty_slot_positions(conn)
+    if not orders:
+        return jsonify({"success": False, "message": "계획할 주문이 없습니다."}), 404
+    if not pos:
+        return jsonify({"success": False, "message": "빈 슬롯이 없습니다."}), 409
+
+    result = plan(orders, pos, depot, capacity, budget)
+    fifo = fifo_plan(orders, pos, depot, capacity)
+    saved = fifo["seconds"] - result["totals"]["seconds"]
+    return jsonify({"success": True, **result, "fifo": fifo,
+                    "saved_seconds": round(saved, 2),
+                    "saved_pct": round(saved / fifo["seconds"] * 100, 1) if fifo["seconds"] else 0.0})
@@ -0,0 +1,187 @@
+import sys
+import time
+from flask import Blueprint, request, jsonify
+
+import db
+
+# =========================================================
+# ▼ [검색] 상품 / 주문 전문 검색 (SQLite FTS5, trigram)
+# =========================================================
+# - 한글은 띄어쓰기 단위 토큰이 잘 맞지 않아 3글자 조각(trigram)으로 색인합니다.
+#   → "조거팬츠" 안의 "거팬츠", "Suede" 안의 "sue" 처럼 단어 중간/앞부분도 찾음 (대소문자 무시)
+# - trigram 은 2글자 검색어를 찾지 못하므로 값 앞뒤에 공백을 붙여 색인하고,
+#   2글자 검색어는 " 빈폴" / "빈폴 " (단어 시작/끝) 으로 찾습니다. 1글자 검색어는 무시합니다.
+# - 색인은 트리거가 products/orders 와 같이 갱신합니다. (재고만 바뀌는 UPDATE 는 건드리지 않음)
+# - products 는 TEXT 기본 키라 VACUUM 때 rowid 가 바뀔 수 있습니다.
+#   그래서 검색 결과는 색인하지 않는 ref 열(item_code)로 products 와 연결하고 (rowid 는 트리거가 행을 찾는 데만 사용),
+#   서버 시작 때 check() 가 rowid 가 어긋난 것을 찾으면 색인을 다시 만듭니다. (`python search.py rebuild` 도 가능)
+#
+#   GET /api/search?q=엄브로 팬츠[&type=products|orders|all][&sort=rank|recent][&page=1][&page_size=20]
+#       - 검색어는 공백으로 나눠 모두 포함(AND)하는 행을 찾음
+#       - sort=rank: bm25 순 (상품 기본, 최근 일치 RANK_WINDOW 건 안에서), recent: 최신 주문 먼저 (주문 기본)
+#       - 전체 개수는 세지 않고 has_more 로 다음 페이지 여부만 알려 줌
+
+search_bp = Blueprint('search', __name__)
+
+# 색인 테이블 → (원본 테이블, rowid 컬럼, 결과를 연결할 ref 컬럼 (None 이면 rowid), 색인 컬럼, bm25 가중치)
+INDEXES = {
+    "products_fts": ("products", "rowid", "item_code",
+                     ("item_code", "product_name", "brand", "category", "color", "size"), (4, 3, 2, 1, 1, 1)),
+    "orders_fts": ("orders", "id", None, ("company", "item_name", "note", "contact"), (3, 2, 1, 2)),
+}
+TYPES = {"products": "products_fts", "orders": "orders_fts"}
+DEFAULT_SORT = {"products": "rank", "orders": "recent"}
+PAGE_MAX = 100
+PAGE_LIMIT = 50                  # 너무 깊은 페이지 (OFFSET) 는 막음
+MAX_TERMS = 8
+RANK_WINDOW = 5000               # sort=rank 는 최근 일치 행 N건 안에서 순위
+
+
+def _padded(ref, col):
+    return f"' ' || coalesce({ref}.{col}, '') || ' '"
+
+
+def _columns(fts):
+    # FTS 테이블 열 순서: ref(있으면) 다음 색인 컬럼
+    _, _, ref, cols, _ = INDEXES[fts]
+    return (("ref",) if ref else ()) + cols
+
+
+def create_schema(cursor):
+    """FTS5 색인 테이블과 동기화 트리거를 만들고 기존 행을 채웁니다. (migrations.py 에서 호출)"""
+    for fts, (table, key, ref, cols, _) in INDEXES.items():
+        defs = (["ref UNINDEXED"] if ref else []) + list(cols)
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({', '.join(defs)}, tokenize='trigram')")
+        names = ", ".join(_columns(fts))
+        values = ", ".join(([f"NEW.{ref}"] if ref else []) + [_padded("NEW", c) for c in cols])
+        sets = ", ".join(([f"ref = NEW.{ref}"] if ref else []) + [f'{c} = {_padded("NEW", c)}' for c in cols])
+        watched = cols + ((ref,) if ref and ref not in cols else ())
+        changed = " OR ".join(f"NEW.{c} IS NOT OLD.{c}" for c in watched)
+        # rowid 가 어긋난 뒤(VACUUM)에도 INSERT 가 실패하지 않게 같은 rowid 의 옛 항목을 먼저 지움
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table}
+            BEGIN DELETE FROM {fts} WHERE rowid = NEW.{key}; INSERT INTO {fts} (rowid, {names}) VALUES (NEW.{key}, {values}); END''')
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {', '.join(watched)} ON {table} WHEN {changed}
+            BEGIN UPDATE {fts} SET {sets} WHERE rowid = NEW.{key}; END''')
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table}
+            BEGIN DELETE FROM {fts} WHERE rowid = OLD.{key}; END''')
+        _fill(cursor, fts)
+
+
+def add_ref_column(cursor):
+    """11번으로 만든 products_fts (ref 열 없음) 를 ref 열이 있는 형태로 다시 만듭니다. (migrations.py 12번)"""
+    if "ref" in [r[1] for r in cursor.execute("PRAGMA table_info(products_fts)")]:
+        return
+    for op in ("insert", "update", "delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_products_fts_{op}")
+    cursor.execute("DROP TABLE IF EXISTS products_fts")
+    create_schema(cursor)
+
+
+def _fill(cursor, fts):
+    table, key, ref, cols, weights = INDEXES[fts]
+    values = ([ref] if ref else []) + [_padded(table, c) for c in cols]
+    cursor.execute(f"DELETE FROM {fts}")
+    cursor.execute(f"INSERT INTO {fts} (rowid, {', '.join(_columns(fts))}) SELECT {key}, {', '.join(values)} FROM {table}")
+    cursor.execute(f"INSERT INTO {fts} ({fts}, rank) VALUES ('rank', 'bm25({', '.join(map(str, ([0] if ref else []) + list(weights)))})')")
+    cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+
+
+def check(conn):
+    """ref 로 연결하는 색인의 rowid 가 원본과 어긋났으면 (VACUUM 등) 다시 만듭니다. 다시 만든 색인 목록을 반환"""
+    rebuilt = []
+    for fts, (table, key, ref, _, _) in INDEXES.items():
+        if not ref:
+            continue
+        total = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+        matched = conn.execute(f"""SELECT count(*) FROM {table} t JOIN {fts} f ON f.rowid = t.{key}
+                                   WHERE f.ref = t.{ref}""").fetchone()[0]
+        if matched != total or conn.execute(f"SELECT count(*) FROM {fts}").fetchone()[0] != total:
+            with db.immediate(conn):
+                _fill(conn.cursor(), fts)
+            rebuilt.append(fts)
+    return rebuilt
+
+
+def rebuild(conn):
+    """색인을 원본 테이블에서 다시 만듭니다. (VACUUM 뒤 등)"""
+    with db.immediate(conn):
+        cursor = conn.cursor()
+        for fts in INDEXES:
+            _fill(cursor, fts)
+
+
+def match_expression(query):
+    """검색어 → FTS5 MATCH 식. 쓸 수 있는 검색어가 없으면 None"""
+    parts = []
+    for term in query.split()[:MAX_TERMS]:
+        quoted = term.replace('"', '""')
+        if len(term) >= 3:
+            parts.append(f'"{quoted}"')
+        elif len(term) == 2:
+            parts.append(f'(" {quoted}" OR "{quoted} ")')
+    return " AND ".join(parts) or None
+
+
+def search(conn, kind, match, sort, offset, limit):
+    """(행 목록, 다음 페이지 여부)"""
+    fts = TYPES[kind]
+    table, key, ref, _, _ = INDEXES[fts]
+    link = f"t.{ref} = {fts}.ref" if ref else f"t.{key} = {fts}.rowid"
+    params = [match]
+    if sort == "rank":
+        # 흔한 검색어는 수십만 행이 걸려 bm25 를 모두 계산하면 느리므로 최근 RANK_WINDOW 건 안에서만 순위를 매김
+        window = f"""AND {fts}.rowid >= (SELECT coalesce(min(rowid), 0) FROM
+                     (SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT {RANK_WINDOW}))"""
+        order = f"{fts}.rank"
+        params.append(match)
+    else:
+        window, order = "", f"{fts}.rowid DESC"
+    rows = conn.execute(f"""SELECT t.*, {fts}.rank AS score FROM {fts} JOIN {table} t ON {link}
+                            WHERE {fts} MATCH ? {window} ORDER BY {order} LIMIT ? OFFSET ?""",
+                        (*params, limit + 1, offset)).fetchall()
+    items = []
+    for row in rows[:limit]:
+        item = dict(row)
+        item["score"] = round(-item["score"], 4)
+        items.append(item)
+    return items, len(rows) > limit
+
+
+# --- 라우트 ---
+
+@search_bp.route('/api/search', methods=['GET'])
+def search_route():
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'all')
+    if kind not in ("all", *TYPES):
+        return jsonify({"success": False, "message": "type 은 products, orders, all 중 하나입니다."}), 400
+    match = match_expression(query)
+    if match is None:
+        return jsonify({"success": False, "message": "두 글자 이상의 검색어가 필요합니다."}), 400
+    page = min(max(request.args.get('page', 1, type=int), 1), PAGE_LIMIT)
+    page_size = min(max(request.args.get('page_size', 20, type=int), 1), PAGE_MAX)
+    sort = request.args.get('sort')
+    if sort not in (None, "rank", "recent"):
+        return jsonify({"success": False, "message": "sort 는 rank, recent 중 하나입니다."}), 400
+
+    started = time.perf_counter()
+    conn = db.get_db_connection()
+    result = {"success": True, "q": query, "page": page, "page_size": page_size}
+    for name in (TYPES if kind == "all" else (kind,)):
+        items, has_more = search(conn, name, match, sort or DEFAULT_SORT[name], (page - 1) * page_size, page_size)
+        result[name] = {"items": items, "has_more": has_more}
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify(result)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['rebuild']:
+        print("사용법: python search.py rebuild")
+        sys.exit(1)
+    conn = db.connect()
+    try:
+        t0 = time.perf_counter()
+        rebuild(conn)
+        print(f"검색 색인 재생성: {time.perf_counter() - t0:.2f}s")
+    finally:
+        conn.close()
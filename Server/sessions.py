@@ -0,0 +1,138 @@
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from flask import request, g, jsonify
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+import db
+
+# =========================================================
+# ▼ [세션] 서명된 무상태 토큰 + 사용자 프로필 LRU 캐시
+# =========================================================
+# - /api/login 이 "token" 을 돌려줍니다. 이후 요청은
+#     Authorization: Bearer <token>   (또는 X-Session-Token 헤더)
+#   로 보내면 user_id 를 따로 보내지 않아도 됩니다. 서버는 서명만 확인하고 DB 를 보지 않습니다.
+# - 토큰이 없으면 예전처럼 user_id 파라미터를 씁니다. (기존 WinForms/HTML 호환)
+# - 잘못된/만료된 토큰은 401 입니다. 단, 결제가 끝난 뒤 오는 /api/payment/complete 는 거절하지 않고
+#   user_id 파라미터로 처리합니다. (cart.html 은 결제 창을 열기 전에 /api/session/refresh 로 토큰을 갱신)
+# - 요청 처리에 필요한 프로필 필드(phone 등)는 profiles 캐시에서 꺼냅니다.
+#   update_user_info / upload_image 가 해당 사용자 항목을 지웁니다.
+#
+# 서명 키: 환경변수 SESSION_SECRET_KEY, 없으면 DB 옆 session.key 파일 (처음 한 번 생성)
+
+TOKEN_MAX_AGE = 12 * 3600      # 토큰 유효 시간(초)
+SALT = "session-v1"
+# 결제가 이미 끝난 뒤에 오는 요청: 토큰이 만료돼도 401 로 거절하지 않고 예전 방식 user_id 파라미터로 처리
+LENIENT_ENDPOINTS = {"main.complete_payment"}
+KEY_FILE = "session.key"
+PROFILE_FIELDS = ("name", "nickname", "role", "email", "phone", "birthdate", "profile_image")
+
+_serializer = None
+_serializer_lock = threading.Lock()
+
+
+def _secret_key():
+    key = os.environ.get("SESSION_SECRET_KEY")
+    if key:
+        return key
+    path = os.path.join(os.path.dirname(os.path.abspath(db.DATABASE_FILE)), KEY_FILE)
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        key = secrets.token_hex(32)
+        with open(path, "w") as f:
+            f.write(key)
+        return key
+
+
+def _get_serializer():
+    global _serializer
+    with _serializer_lock:
+        if _serializer is None:
+            _serializer = URLSafeTimedSerializer(_secret_key(), salt=SALT)
+        return _serializer
+
+
+def issue(user_id):
+    return _get_serializer().dumps({"uid": user_id})
+
+
+def verify(token):
+    """유효한 토큰이면 user_id, 아니면 None"""
+    try:
+        return _get_serializer().loads(token, max_age=TOKEN_MAX_AGE)["uid"]
+    except (BadSignature, SignatureExpired, KeyError, TypeError):
+        return None
+
+
+def _request_token():
+    auth = request.headers.get("Authorization", "")
+    if auth[:7].lower() == "bearer ":
+        return auth[7:].strip()
+    return request.headers.get("X-Session-Token")
+
+
+def load():
+    """before_request: 토큰이 있으면 검사해서 g.user_id 에 넣습니다. 잘못된/만료된 토큰은 401 (LENIENT_ENDPOINTS 제외)"""
+    token = _request_token()
+    if token:
+        user_id = verify(token)
+        if user_id is None:
+            if request.endpoint in LENIENT_ENDPOINTS:
+                return
+            return jsonify({"success": False, "message": "세션이 만료되었습니다. 다시 로그인해주세요."}), 401
+        g.user_id = user_id
+
+
+def current_user_id(fallback=None):
+    """토큰의 user_id. 토큰 없이 온 요청이면 fallback (예전 방식 user_id 파라미터)"""
+    return g.get("user_id") or fallback
+
+
+class ProfileCache:
+    """user_id → 프로필 필드 dict (LRU)"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0   # invalidate 때마다 증가: 조회 중에 무효화됐으면 옛 값을 넣지 않음
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, user_id, row, generation=None):
+        profile = {f: row[f] for f in PROFILE_FIELDS}
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return profile
+            self._data[user_id] = profile
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return profile
+
+    def get(self, conn, user_id):
+        """캐시에 없으면 한 번 조회해서 채웁니다. 없는 사용자는 None (캐시하지 않음)"""
+        with self._lock:
+            profile = self._data.get(user_id)
+            if profile is not None:
+                self._data.move_to_end(user_id)
+                self.hits += 1
+                return profile
+            self.misses += 1
+            generation = self._generation
+        row = conn.execute(f"SELECT {', '.join(PROFILE_FIELDS)} FROM users WHERE id = ?", (user_id,)).fetchone()
+        return self.put(user_id, row, generation) if row else None
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._data.pop(user_id, None)
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+profiles = ProfileCache()
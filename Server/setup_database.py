@@ -1,5 +1,7 @@
-import sqlite3
 import os
+
+import db
+import migrations
 # [수정] hashlib 대신 werkzeug 라이브러리 사용
 from werkzeug.security import generate_password_hash 
 
@@ -18,82 +20,24 @@ def setup_database():
         if os.path.exists(DATABASE_FILE):
             try:
                 os.remove(DATABASE_FILE)
+                for suffix in ('-wal', '-shm'):   # WAL 모드 잔여 파일도 함께 삭제
+                    if os.path.exists(DATABASE_FILE + suffix):
+                        os.remove(DATABASE_FILE + suffix)
                 print(f"⚠️ 기존 '{DATABASE_FILE}' 파일을 삭제하고 새로 생성합니다.")
             except PermissionError:
                 print(f"❌ 오류: '{DATABASE_FILE}' 파일이 사용 중입니다. 프로그램을 종료하고 다시 실행해주세요.")
                 return
 
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
+        db.DATABASE_FILE = DATABASE_FILE
+        conn = db.connect()
         print(f"✅ '{DATABASE_FILE}' 데이터베이스 연결 성공.")
 
         # ---------------------------------------------------------
-        # [1] users 테이블 생성
-        # ---------------------------------------------------------
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id TEXT PRIMARY KEY,
-            password TEXT NOT NULL,
-            name TEXT NOT NULL,
-            nickname TEXT,
-            role TEXT DEFAULT 'STAFF',
-            email TEXT,
-            phone TEXT,
-            birthdate TEXT,
-            profile_image TEXT
-        )
-        ''')
-        print("✅ 'users' 테이블 준비 완료.")
-
-        # ---------------------------------------------------------
-        # [2] products 테이블 생성
-        # ---------------------------------------------------------
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS products (
-            item_code TEXT PRIMARY KEY,
-            product_name TEXT NOT NULL,
-            brand TEXT NOT NULL,
-            category TEXT NOT NULL,
-            color TEXT NOT NULL,
-            size TEXT NOT NULL,
-            stock INTEGER NOT NULL DEFAULT 0
-        )
-        ''')
-        print("✅ 'products' 테이블 준비 완료.")
-
-        # ---------------------------------------------------------
-        # [3] orders 테이블 생성
-        # ---------------------------------------------------------
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            company TEXT NOT NULL,
-            item_name TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            price INTEGER DEFAULT 0,
-            order_date TEXT,
-            due_date TEXT,
-            contact TEXT,
-            note TEXT,
-            status TEXT DEFAULT '대기중'
-        )
-        ''')
-        print("✅ 'orders' 테이블 준비 완료.")
-
-        # ---------------------------------------------------------
-        # [4] slots 테이블 생성
+        # [1~4] 테이블 생성 + 초기 제품 (스키마 정의는 migrations.py 한 곳에서 관리)
         # ---------------------------------------------------------
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS slots (
-            slot_id TEXT PRIMARY KEY,
-            x INTEGER,
-            y INTEGER,
-            w INTEGER,
-            h INTEGER,
-            is_active BOOLEAN DEFAULT 0
-        )
-        ''')
-        print("✅ 'slots' 테이블 준비 완료.")
+        for version, name in migrations.migrate(conn):
+            print(f"✅ 스키마 {version}: {name}")
+        cursor = conn.cursor()
 
         # ---------------------------------------------------------
         # [5] 초기 데이터 삽입
@@ -102,35 +46,10 @@ def setup_database():
         # 1. 관리자 계정 (비번: 1234)
         # [중요] 여기서 바뀐 함수(generate_password_hash)가 실행됩니다.
         admin_pw = hash_password("1234")
-        cursor.execute("INSERT INTO users (id, password, name, nickname, role) VALUES (?, ?, ?, ?, ?)",
+        cursor.execute("INSERT INTO users (id, password, name, nickname, role) VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO NOTHING",
                        ("admin", admin_pw, "관리자", "Admin", "ADMIN"))
 
-        # 2. 제품 데이터
-        products_data = [
-            # [빈폴] BeanPole -> BP
-            ('BP-01-01-01', '빈폴 베이직 티셔츠', 'BeanPole', 'TOP', 'Black', 'XS', 10),
-            ('BP-01-02-02', '빈폴 로고 피케 셔츠', 'BeanPole', 'TOP', 'White', 'S', 15),
-            ('BP-02-03-04', '빈폴 컴포트 치노 팬츠', 'BeanPole', 'BOTTOM', 'Gray', 'L', 8),
-
-            # [엄브로] Umbro -> UB
-            ('UB-01-04-05', '엄브로 팀 트레이닝 탑', 'Umbro', 'TOP', 'Red', 'XL', 12),
-            ('UB-02-05-03', '엄브로 우븐 조거 팬츠', 'Umbro', 'BOTTOM', 'Blue', 'M', 20),
-            ('UB-03-01-03', '엄브로 벤치 롱 코트', 'Umbro', 'OUTER', 'Black', 'M', 7),
-            ('UB-03-02-06', '엄브로 아노락 자켓', 'Umbro', 'OUTER', 'White', 'Free', 5),
-
-            # [퓨마] Puma -> PM
-            ('PM-01-03-02', '퓨마 T7 트랙 재킷', 'Puma', 'TOP', 'Gray', 'S', 18),
-            ('PM-02-01-05', '퓨마 아이코닉 T7 팬츠', 'Puma', 'BOTTOM', 'Black', 'XL', 1),
-
-            # [데상트] DESCENTE -> DS
-            ('DS-03-01-04', '데상트 스위스 스키팀 재킷', 'DESCENTE', 'OUTER', 'Black', 'L', 5)
-        ]
-
-        cursor.executemany("""
-        INSERT INTO products (item_code, product_name, brand, category, color, size, stock) 
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, products_data)
-        print(f"✅ 제품 데이터 {len(products_data)}건 추가 완료.")
+        # 2. 제품 데이터 (migrations.SEED_PRODUCTS, 마이그레이션에서 이미 추가됨)
 
         # 3. 주문 데이터
         orders_data = [
@@ -0,0 +1,179 @@
+import json
+from flask import Blueprint, Response, request, jsonify
+
+import db
+from db import get_db_connection
+from occupancy import tracker
+
+# =========================================================
+# ▼ [슬롯 공간 인덱스] SQLite R*Tree 로 슬롯 사각형 검색
+# =========================================================
+# - slots_rtree 는 slots 의 rowid 를 키로 (x, x+w, y, y+h) 를 담고, 트리거로 항상 동기화됩니다.
+# - 슬롯 저장은 UPSERT 한 문장, 일괄 가져오기는 한 트랜잭션의 executemany 입니다.
+#   (camera_id 를 보내지 않으면 기존 값을 유지합니다. WinForms 슬롯 편집기 호환)
+#
+#   GET  /api/slots/overlap?x=&y=&w=&h=[&camera_id=]        박스와 겹치는 슬롯
+#   GET  /api/slots/region?x=&y=&w=&h=[&camera_id=]         영역 안에 완전히 들어가는 슬롯
+#   GET  /api/slots/nearest_empty?x=&y=[&camera_id=]        (x, y) 에서 가장 가까운 빈 슬롯 (중심 거리)
+#   GET  /api/slots/export                                  전체 슬롯 JSON 다운로드
+#   POST /api/slots/import  {"slots": [...], "replace": false}
+
+slot_index_bp = Blueprint('slot_index', __name__)
+
+NEAREST_START = 64     # 최근접 검색을 시작할 반경(px), 못 찾으면 두 배씩 넓힘
+IMPORT_MAX = 10000     # 한 번에 가져올 최대 슬롯 수
+
+SLOT_UPSERT = """INSERT INTO slots (slot_id, x, y, w, h, is_active, camera_id) VALUES (?, ?, ?, ?, ?, ?, ?)
+                 ON CONFLICT(slot_id) DO UPDATE SET x=excluded.x, y=excluded.y, w=excluded.w, h=excluded.h,
+                     is_active=excluded.is_active, camera_id=COALESCE(excluded.camera_id, slots.camera_id)"""
+
+
+def create_schema(cursor):
+    """slots_rtree 와 동기화 트리거를 만듭니다. (migrations.py 에서 slots 다음에 호출)"""
+    cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS slots_rtree USING rtree(id, min_x, max_x, min_y, max_y)")
+    rect = "NEW.rowid, COALESCE(NEW.x, 0), COALESCE(NEW.x, 0) + COALESCE(NEW.w, 0), COALESCE(NEW.y, 0), COALESCE(NEW.y, 0) + COALESCE(NEW.h, 0)"
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_slots_insert_rtree AFTER INSERT ON slots
+        BEGIN INSERT INTO slots_rtree VALUES ({rect}); END''')
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_slots_update_rtree AFTER UPDATE OF x, y, w, h ON slots
+        BEGIN INSERT OR REPLACE INTO slots_rtree VALUES ({rect}); END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_slots_delete_rtree AFTER DELETE ON slots
+        BEGIN DELETE FROM slots_rtree WHERE id = OLD.rowid; END''')
+    # 인덱스가 새로 생겼거나 어긋났으면 다시 채움
+    n_slots = cursor.execute("SELECT count(*) FROM slots").fetchone()[0]
+    if cursor.execute("SELECT count(*) FROM slots_rtree").fetchone()[0] != n_slots:
+        cursor.execute("DELETE FROM slots_rtree")
+        cursor.execute("""INSERT INTO slots_rtree SELECT rowid, COALESCE(x, 0), COALESCE(x, 0) + COALESCE(w, 0),
+                              COALESCE(y, 0), COALESCE(y, 0) + COALESCE(h, 0) FROM slots""")
+
+
+def slot_row(d):
+    """요청 JSON 한 건 → SLOT_UPSERT 파라미터"""
+    return (d['slot_id'], int(d['x']), int(d['y']), int(d['w']), int(d['h']),
+            1 if d.get('is_active') else 0, d.get('camera_id'))
+
+
+def _to_dict(r):
+    return {"slot_id": r["slot_id"], "x": r["x"], "y": r["y"], "w": r["w"], "h": r["h"],
+            "is_active": bool(r["is_active"]), "camera_id": r["camera_id"]}
+
+
+def _search(conn, x1, y1, x2, y2, camera_id=None, within=False, active_only=False):
+    # R*Tree 는 좌표를 float32 로 보수적으로 반올림하므로 slots 의 정수 좌표로 한 번 더 확인
+    if within:
+        cond = "r.min_x >= ? AND r.max_x <= ? AND r.min_y >= ? AND r.max_y <= ?"
+        exact = "s.x >= ? AND s.x + s.w <= ? AND s.y >= ? AND s.y + s.h <= ?"
+    else:
+        cond = "r.max_x > ? AND r.min_x < ? AND r.max_y > ? AND r.min_y < ?"
+        exact = "s.x + s.w > ? AND s.x < ? AND s.y + s.h > ? AND s.y < ?"
+    sql = f"""SELECT s.* FROM slots_rtree r JOIN slots s ON s.rowid = r.id
+              WHERE {cond} AND {exact}"""
+    args = [x1, x2, y1, y2] * 2
+    if active_only:
+        sql += " AND s.is_active = 1"
+    if camera_id is not None:
+        sql += " AND (s.camera_id = ? OR s.camera_id IS NULL)"
+        args.append(camera_id)
+    return conn.execute(sql, args).fetchall()
+
+
+def overlapping(conn, x, y, w, h, camera_id=None):
+    return _search(conn, x, y, x + w, y + h, camera_id)
+
+
+def in_region(conn, x, y, w, h, camera_id=None):
+    return _search(conn, x, y, x + w, y + h, camera_id, within=True)
+
+
+def nearest_empty(conn, px, py, camera_id=None):
+    """(px, py) 에서 중심 거리가 가장 가까운 빈 활성 슬롯. 없으면 None
+
+    반경 r 정사각형 안을 R*Tree 로 찾고, 거리 r 이내 후보가 있으면 그보다 가까운 슬롯은
+    반드시 이미 후보에 들어 있으므로 바로 확정합니다. 없으면 r 을 두 배로 늘립니다.
+    """
+    tracker.refresh(conn)
+    r, reach = NEAREST_START, None
+    while True:
+        best, best_d = None, None
+        for s in _search(conn, px - r, py - r, px + r, py + r, camera_id, active_only=True):
+            if not tracker.is_empty(s['slot_id']):
+                continue
+            d = ((s['x'] + s['w'] / 2 - px) ** 2 + (s['y'] + s['h'] / 2 - py) ** 2) ** 0.5
+            if best_d is None or d < best_d:
+                best, best_d = s, d
+        if best is not None and best_d <= r:
+            return best, best_d
+        if reach is None:
+            # 첫 반경에서 못 찾았을 때만 전체 범위를 구함 (검색을 끝낼 반경)
+            b = conn.execute("SELECT MIN(min_x), MIN(min_y), MAX(max_x), MAX(max_y) FROM slots_rtree").fetchone()
+            if b[0] is None:
+                return None
+            reach = max(abs(px - b[0]), abs(px - b[2]), abs(py - b[1]), abs(py - b[3]))
+        if r >= reach:
+            return (best, best_d) if best is not None else None
+        r *= 2
+
+
+def _rect_args():
+    return (request.args.get('x', type=float), request.args.get('y', type=float),
+            request.args.get('w', type=float), request.args.get('h', type=float))
+
+
+# --- 라우트 ---
+
+@slot_index_bp.route('/api/slots/overlap', methods=['GET'])
+def slots_overlap():
+    x, y, w, h = _rect_args()
+    if None in (x, y, w, h):
+        return jsonify({"success": False, "message": "x, y, w, h 가 필요합니다."}), 400
+    rows = overlapping(get_db_connection(), x, y, w, h, request.args.get('camera_id'))
+    return jsonify([_to_dict(r) for r in rows])
+
+
+@slot_index_bp.route('/api/slots/region', methods=['GET'])
+def slots_in_region():
+    x, y, w, h = _rect_args()
+    if None in (x, y, w, h):
+        return jsonify({"success": False, "message": "x, y, w, h 가 필요합니다."}), 400
+    rows = in_region(get_db_connection(), x, y, w, h, request.args.get('camera_id'))
+    return jsonify([_to_dict(r) for r in rows])
+
+
+@slot_index_bp.route('/api/slots/nearest_empty', methods=['GET'])
+def slots_nearest_empty():
+    x, y = request.args.get('x', type=float), request.args.get('y', type=float)
+    if x is None or y is None:
+        return jsonify({"success": False, "message": "x, y 가 필요합니다."}), 400
+    found = nearest_empty(get_db_connection(), x, y, request.args.get('camera_id'))
+    if found is None:
+        return jsonify({"success": False, "message": "빈 슬롯이 없습니다."}), 404
+    slot, dist = found
+    return jsonify({"success": True, "slot": _to_dict(slot), "distance": round(dist, 2)})
+
+
+@slot_index_bp.route('/api/slots/export', methods=['GET'])
+def export_slots():
+    rows = get_db_connection().execute("SELECT * FROM slots ORDER BY slot_id").fetchall()
+    body = json.dumps({"slots": [_to_dict(r) for r in rows]}, ensure_ascii=False)
+    return Response(body, mimetype='application/json',
+                    headers={"Content-Disposition": "attachment; filename=slots.json"})
+
+
+@slot_index_bp.route('/api/slots/import', methods=['POST'])
+def import_slots():
+    d = request.get_json() or {}
+    slots = d.get('slots')
+    if not isinstance(slots, list):
+        return jsonify({"success": False, "message": "slots 목록이 필요합니다."}), 400
+    if len(slots) > IMPORT_MAX:
+        return jsonify({"success": False, "message": f"한 번에 최대 {IMPORT_MAX} 개까지 가져올 수 있습니다."}), 413
+    try:
+        rows = [slot_row(s) for s in slots]
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"success": False, "message": f"잘못된 슬롯 데이터: {e}"}), 400
+    conn = get_db_connection()
+    with db.immediate(conn):
+        if d.get('replace'):
+            keep = [r[0] for r in rows]
+            conn.execute(f"DELETE FROM slots WHERE slot_id NOT IN ({','.join('?' * len(keep))})", keep)
+        conn.executemany(SLOT_UPSERT, rows)
+    return jsonify({"success": True, "imported": len(rows)})
@@ -0,0 +1,289 @@
+import io
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, abort
+
+import db
+from db import get_db_connection
+
+try:
+    from PIL import Image
+except ImportError:   # Pillow 가 없으면 썸네일 대신 원본 제공
+    Image = None
+
+# =========================================================
+# ▼ [사진 기록] 카메라 스냅샷 보관소 (WPF PictureLog 서버 측)
+# =========================================================
+# - 프레임(JPEG)은 카메라별·시간별 세그먼트 파일 snapshots/<카메라>/<YYYYMMDDHH>.seg 에 이어 붙입니다.
+#   썸네일은 처음 조회될 때 만들어 같은 이름의 .thumb.seg 에 이어 붙입니다. (대부분의 프레임은 조회되지 않음)
+# - 위치(세그먼트, 오프셋, 길이)와 검출 정보는 snapshots 테이블에 두고 (camera_id, ts) 인덱스로 찾습니다.
+# - 보관 정책: RETAIN_DAYS 보다 오래됐거나 전체 용량이 RETAIN_BYTES 를 넘으면
+#   가장 오래된 세그먼트부터 파일째 지웁니다.
+#
+#   POST /api/snapshots        (multipart: file, camera_id, ts, detections)
+#                              또는 본문 image/jpeg + ?camera_id=&ts=  (+ X-Detections 헤더)
+#   GET  /api/snapshots?camera_id=&date=2025-12-09&start_hour=9&end_hour=18&limit=50&before=<cursor>
+#   GET  /api/snapshots?camera_id=&from=<ts>&to=<ts>             (ts: epoch 초 또는 ISO 문자열)
+#   GET  /api/snapshots/<id>.jpg
+#   GET  /api/snapshots/<id>/thumb.jpg
+
+snapshots_bp = Blueprint('snapshots', __name__)
+
+ROOT = 'snapshots'
+THUMB_SIZE = 160
+MAX_FRAME_BYTES = 4 * 1024 * 1024
+FORM_OVERHEAD = 64 * 1024          # multipart 업로드의 경계/검출 결과 필드 몫
+PAGE_DEFAULT = 50
+PAGE_MAX = 500
+RETAIN_DAYS = 30
+RETAIN_BYTES = 20 * 1024 ** 3
+PRUNE_INTERVAL = 60.0
+CACHE_SECONDS = 365 * 24 * 3600
+
+_write_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def create_schema(cursor):
+    """snapshots / snapshot_segments 테이블을 만듭니다. (migrations.py 에서 호출)"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS snapshot_segments (segment TEXT PRIMARY KEY, camera_id TEXT NOT NULL, start_ts REAL NOT NULL, bytes INTEGER NOT NULL DEFAULT 0)''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshot_segments_start ON snapshot_segments (start_ts)")
+    cursor.execute('''CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT, camera_id TEXT NOT NULL, ts REAL NOT NULL, segment TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, thumb_offset INTEGER, thumb_length INTEGER, detections TEXT)''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_camera_ts ON snapshots (camera_id, ts, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots (ts, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_segment ON snapshots (segment)")
+
+
+def parse_ts(value, default=None):
+    """epoch 초(숫자/문자열) 또는 ISO 형식 문자열 → epoch 초"""
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value)).timestamp()
+
+
+def _segment_paths(segment):
+    base = os.path.join(ROOT, segment)
+    return base + '.seg', base + '.thumb.seg'
+
+
+def make_thumb(jpeg):
+    if Image is None:
+        return None
+    with Image.open(io.BytesIO(jpeg)) as img:
+        img.draft('RGB', (THUMB_SIZE, THUMB_SIZE))   # JPEG 은 축소 디코딩 (빠름)
+        img.thumbnail((THUMB_SIZE, THUMB_SIZE))
+        out = io.BytesIO()
+        img.convert('RGB').save(out, 'JPEG', quality=75)
+        return out.getvalue()
+
+
+def _append(path, data):
+    with open(path, 'ab') as f:
+        offset = f.tell()
+        f.write(data)
+    return offset
+
+
+def store(conn, camera_id, ts, jpeg, detections=None):
+    """프레임을 세그먼트에 붙이고 인덱스 행을 추가합니다. 새 스냅샷 id 를 반환합니다."""
+    if not jpeg.startswith(b'\xff\xd8'):
+        raise ValueError("JPEG 이미지가 아닙니다.")
+    camera = "".join(c for c in str(camera_id) if c.isalnum() or c in '-_') or 'unknown'
+    segment = f"{camera}/{time.strftime('%Y%m%d%H', time.localtime(ts))}"
+    seg_path = _segment_paths(segment)[0]
+
+    with _write_lock:
+        os.makedirs(os.path.dirname(seg_path), exist_ok=True)
+        offset = _append(seg_path, jpeg)
+    cur = conn.execute("""INSERT INTO snapshots (camera_id, ts, segment, offset, length, detections)
+                          VALUES (?, ?, ?, ?, ?, ?)""",
+                       (camera_id, ts, segment, offset, len(jpeg),
+                        json.dumps(detections, ensure_ascii=False) if detections is not None else None))
+    _count_bytes(conn, segment, camera_id, ts, len(jpeg))
+    conn.commit()
+    return cur.lastrowid
+
+
+def _count_bytes(conn, segment, camera_id, ts, size):
+    conn.execute("""INSERT INTO snapshot_segments (segment, camera_id, start_ts, bytes) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(segment) DO UPDATE SET bytes = bytes + excluded.bytes, start_ts = MIN(start_ts, excluded.start_ts)""",
+                 (segment, camera_id, ts, size))
+
+
+def _thumbnail(conn, row):
+    """썸네일을 돌려줍니다. 없으면 만들어 .thumb.seg 에 붙이고 위치를 기록합니다. (Pillow 없으면 None)"""
+    if row['thumb_offset'] is not None:
+        return _read(row['segment'], row['thumb_offset'], row['thumb_length'], thumb=True)
+    thumb = make_thumb(_read(row['segment'], row['offset'], row['length']))
+    if thumb is None:
+        return None
+    with _write_lock:
+        thumb_offset = _append(_segment_paths(row['segment'])[1], thumb)
+    conn.execute("UPDATE snapshots SET thumb_offset = ?, thumb_length = ? WHERE id = ?", (thumb_offset, len(thumb), row['id']))
+    _count_bytes(conn, row['segment'], row['camera_id'], row['ts'], len(thumb))
+    conn.commit()
+    return thumb
+
+
+def prune(conn, force=False, now=None):
+    """보관 기간/용량을 넘은 세그먼트를 오래된 것부터 지웁니다. 지운 세그먼트 수를 반환합니다."""
+    global _last_prune
+    mono = time.monotonic()
+    if not force and mono - _last_prune < PRUNE_INTERVAL:
+        return 0
+    _last_prune = mono
+    cutoff = (now or time.time()) - RETAIN_DAYS * 86400
+    total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM snapshot_segments").fetchone()[0]
+    doomed = []
+    for r in conn.execute("SELECT segment, start_ts, bytes FROM snapshot_segments ORDER BY start_ts"):
+        # 세그먼트는 한 시간 단위이므로 시작 시각 + 1시간이 기준보다 이르면 통째로 만료
+        if r['start_ts'] + 3600 < cutoff or total > RETAIN_BYTES:
+            doomed.append(r['segment'])
+            total -= r['bytes']
+        else:
+            break
+    if not doomed:
+        return 0
+    marks = ','.join('?' * len(doomed))
+    with db.immediate(conn):
+        conn.execute(f"DELETE FROM snapshots WHERE segment IN ({marks})", doomed)
+        conn.execute(f"DELETE FROM snapshot_segments WHERE segment IN ({marks})", doomed)
+    with _write_lock:
+        for segment in doomed:
+            for path in _segment_paths(segment):
+                if os.path.exists(path):
+                    os.remove(path)
+    return len(doomed)
+
+
+def _read(segment, offset, length, thumb=False):
+    path = _segment_paths(segment)[1 if thumb else 0]
+    # 읽기마다 따로 열므로 seek 위치를 다른 요청과 공유하지 않음 (os.pread 는 Windows 에 없음)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+def _entry(r):
+    dets = json.loads(r['detections']) if r['detections'] else None
+    return {"id": r['id'], "camera_id": r['camera_id'], "ts": r['ts'],
+            "timestamp": datetime.fromtimestamp(r['ts']).isoformat(timespec='milliseconds'),
+            "size": r['length'], "detections": dets,
+            "description": f"{r['camera_id']} · 검출 {len(dets)}건" if isinstance(dets, list) else r['camera_id'],
+            "image_url": f"/api/snapshots/{r['id']}.jpg",
+            "thumb_url": f"/api/snapshots/{r['id']}/thumb.jpg"}
+
+
+def search(conn, camera_id=None, ts_from=None, ts_to=None, limit=PAGE_DEFAULT, before=None):
+    """[ts_from, ts_to) 구간 스냅샷을 최신순으로 limit 건. before=(ts, id) 로 다음 페이지."""
+    sql = "SELECT id, camera_id, ts, length, detections FROM snapshots WHERE 1=1"
+    args = []
+    if camera_id:
+        sql += " AND camera_id = ?"
+        args.append(camera_id)
+    if ts_from is not None:
+        sql += " AND ts >= ?"
+        args.append(ts_from)
+    if ts_to is not None:
+        sql += " AND ts < ?"
+        args.append(ts_to)
+    if before is not None:
+        sql += " AND (ts < ? OR (ts = ? AND id < ?))"
+        args += [before[0], before[0], before[1]]
+    sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+    args.append(limit)
+    return conn.execute(sql, args).fetchall()
+
+
+# --- 라우트 ---
+
+@snapshots_bp.route('/api/snapshots', methods=['POST'])
+def upload_snapshot():
+    try:
+        raw = request.mimetype == 'image/jpeg'
+        # 본문을 읽기 전에 크기부터 확인 (multipart 는 경계/필드 몫 FORM_OVERHEAD 를 더 허용)
+        if (request.content_length or 0) > MAX_FRAME_BYTES + (0 if raw else FORM_OVERHEAD):
+            return jsonify({"success": False, "message": "프레임이 너무 큽니다."}), 413
+        if raw:
+            jpeg = request.stream.read(MAX_FRAME_BYTES + 1)   # Content-Length 가 없어도 한도 + 1 바이트까지만
+            form, dets = request.args, request.headers.get('X-Detections')
+        else:
+            file = request.files.get('file')
+            if file is None:
+                return jsonify({"success": False, "message": "file 이 필요합니다."}), 400
+            jpeg = file.read(MAX_FRAME_BYTES + 1)
+            form, dets = request.form, request.form.get('detections')
+        camera_id = form.get('camera_id')
+        if not camera_id:
+            return jsonify({"success": False, "message": "camera_id 가 필요합니다."}), 400
+        if len(jpeg) > MAX_FRAME_BYTES:
+            return jsonify({"success": False, "message": "프레임이 너무 큽니다."}), 413
+        conn = get_db_connection()
+        snap_id = store(conn, camera_id, parse_ts(form.get('ts'), time.time()), jpeg,
+                        json.loads(dets) if dets else None)
+        prune(conn)
+        return jsonify({"success": True, "id": snap_id})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@snapshots_bp.route('/api/snapshots', methods=['GET'])
+def list_snapshots():
+    args = request.args
+    try:
+        if args.get('date'):
+            # WPF SearchLogs(date, startHour, endHour) 와 같은 조건 (endHour 시각 포함)
+            day = datetime.fromisoformat(args['date'])
+            ts_from = day.replace(hour=args.get('start_hour', 0, type=int)).timestamp()
+            ts_to = day.replace(hour=args.get('end_hour', 23, type=int)).timestamp() + 3600
+        else:
+            ts_from, ts_to = parse_ts(args.get('from')), parse_ts(args.get('to'))
+        before = None
+        if args.get('before'):
+            b_ts, b_id = args['before'].split(':')
+            before = (float(b_ts), int(b_id))
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"잘못된 조건: {e}"}), 400
+    limit = min(max(args.get('limit', PAGE_DEFAULT, type=int), 1), PAGE_MAX)
+    rows = search(get_db_connection(), args.get('camera_id'), ts_from, ts_to, limit, before)
+    items = [_entry(r) for r in rows]
+    next_cursor = f"{rows[-1]['ts']!r}:{rows[-1]['id']}" if len(rows) == limit else None
+    return jsonify({"items": items, "next": next_cursor})
+
+
+def _send_frame(snap_id, thumb):
+    conn = get_db_connection()
+    row = conn.execute("SELECT id, camera_id, ts, segment, offset, length, thumb_offset, thumb_length FROM snapshots WHERE id = ?",
+                       (snap_id,)).fetchone()
+    if row is None:
+        abort(404)
+    etag = f"snap-{snap_id}{'-t' if thumb else ''}"
+    if etag in request.if_none_match:
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+    data = _thumbnail(conn, row) if thumb else None
+    if data is None:
+        data = _read(row['segment'], row['offset'], row['length'])
+    res = Response(data, mimetype='image/jpeg')
+    res.set_etag(etag)
+    res.cache_control.public = True
+    res.cache_control.max_age = CACHE_SECONDS
+    res.cache_control.immutable = True
+    return res
+
+
+@snapshots_bp.route('/api/snapshots/<int:snap_id>.jpg', methods=['GET'])
+def snapshot_image(snap_id):
+    return _send_frame(snap_id, thumb=False)
+
+
+@snapshots_bp.route('/api/snapshots/<int:snap_id>/thumb.jpg', methods=['GET'])
+def snapshot_thumb(snap_id):
+    return _send_frame(snap_id, thumb=True)
@@ -0,0 +1,220 @@
+import sys
+from flask import Blueprint, request, jsonify
+
+import db
+from db import get_db_connection
+
+# =========================================================
+# ▼ [통계] WPF 통계 화면용 집계 API (롤업 테이블)
+# =========================================================
+# 주문/재고/슬롯이 바뀔 때마다 트리거가 롤업 테이블의 해당 칸만 더하고 뺍니다.
+# 그래서 조회는 주문 수와 상관없이 칸(bucket) 개수만큼만 읽습니다.
+#
+#   stats_hourly   시간대별 주문 접수 건수/수량/매출   (접수 시각 기준, 삭제해도 줄지 않음)
+#   stats_status   상태별 현재 주문 건수/수량
+#   stats_brand    브랜드별 주문(orders.company)과 재고(products.brand)
+#   stats_stock    일별 입고/출고 수량 (products.stock 증감)
+#   stats_cabinet  수납장별 슬롯 수/활성/점유 (slot_id 의 '-' 앞부분, 예: A-1 → A)
+#
+#   GET /api/stats                       대시보드 전체 (아래 항목을 한 번에)
+#   GET /api/stats/hourly?hours=24
+#   GET /api/stats/status | brands | cabinets
+#   GET /api/stats/stock?days=7
+#
+# 기존 데이터로 다시 채우기:  python stats.py backfill
+
+stats_bp = Blueprint('stats', __name__)
+
+HOUR_NOW = "strftime('%Y-%m-%d %H', 'now', 'localtime')"
+DAY_NOW = "date('now', 'localtime')"
+HOURS_MAX = 24 * 31
+DAYS_MAX = 366
+
+
+def _cabinet(ref):
+    return f"CASE WHEN instr({ref}.slot_id, '-') > 0 THEN substr({ref}.slot_id, 1, instr({ref}.slot_id, '-') - 1) ELSE {ref}.slot_id END"
+
+
+def _bump(table, key, values):
+    # 트리거 본문용 UPSERT: 해당 칸에 values 를 더함
+    cols = ", ".join(values)
+    vals = ", ".join(values.values())
+    sets = ", ".join(f"{c} = {c} + excluded.{c}" for c in values)
+    return f"INSERT INTO {table} ({key[0]}, {cols}) VALUES ({key[1]}, {vals}) ON CONFLICT({key[0]}) DO UPDATE SET {sets};"
+
+
+def _order_rows(ref, sign):
+    return {"orders": f"{sign}1", "quantity": f"{sign}COALESCE({ref}.quantity, 0)",
+            "revenue": f"{sign}COALESCE({ref}.quantity, 0) * COALESCE({ref}.price, 0)"}
+
+
+def _triggers():
+    # (테이블, 동작, UPDATE OF 컬럼, 트리거 본문)
+    status_key = lambda ref: ("status", f"COALESCE({ref}.status, '')")
+    brand_key = lambda ref: ("brand", f"COALESCE({ref}.company, '')")
+    status_vals = lambda ref, sign: {k: v for k, v in _order_rows(ref, sign).items() if k != "revenue"}
+    cab = lambda ref: ("cabinet", _cabinet(ref))
+    slot_vals = lambda ref, sign: {"slots": f"{sign}1", "active": f"{sign}COALESCE({ref}.is_active, 0)"}
+
+    yield "orders", "INSERT", "", [
+        _bump("stats_hourly", ("hour", HOUR_NOW), _order_rows("NEW", "")),
+        _bump("stats_status", status_key("NEW"), status_vals("NEW", "")),
+        _bump("stats_brand", brand_key("NEW"), _order_rows("NEW", "")),
+    ]
+    yield "orders", "UPDATE", "OF status, company, quantity, price", [
+        _bump("stats_status", status_key("OLD"), status_vals("OLD", "-")),
+        _bump("stats_status", status_key("NEW"), status_vals("NEW", "")),
+        _bump("stats_brand", brand_key("OLD"), _order_rows("OLD", "-")),
+        _bump("stats_brand", brand_key("NEW"), _order_rows("NEW", "")),
+    ]
+    yield "orders", "DELETE", "", [
+        _bump("stats_status", status_key("OLD"), status_vals("OLD", "-")),
+        _bump("stats_brand", brand_key("OLD"), _order_rows("OLD", "-")),
+    ]
+    stock = lambda ref, sign: {"products": f"{sign}1", "stock": f"{sign}COALESCE({ref}.stock, 0)"}
+    pbrand = lambda ref: ("brand", f"COALESCE({ref}.brand, '')")
+    yield "products", "INSERT", "", [
+        _bump("stats_brand", pbrand("NEW"), stock("NEW", "")),
+        _bump("stats_stock", ("day", DAY_NOW), {"stock_in": "COALESCE(NEW.stock, 0)", "stock_out": "0"}),
+    ]
+    yield "products", "UPDATE", "OF stock, brand", [
+        _bump("stats_brand", pbrand("OLD"), stock("OLD", "-")),
+        _bump("stats_brand", pbrand("NEW"), stock("NEW", "")),
+        _bump("stats_stock", ("day", DAY_NOW), {"stock_in": "MAX(COALESCE(NEW.stock, 0) - COALESCE(OLD.stock, 0), 0)",
+                                                "stock_out": "MAX(COALESCE(OLD.stock, 0) - COALESCE(NEW.stock, 0), 0)"}),
+    ]
+    yield "products", "DELETE", "", [
+        _bump("stats_brand", pbrand("OLD"), stock("OLD", "-")),
+    ]
+    yield "slots", "INSERT", "", [_bump("stats_cabinet", cab("NEW"), slot_vals("NEW", ""))]
+    yield "slots", "UPDATE", "OF slot_id, is_active", [
+        _bump("stats_cabinet", cab("OLD"), slot_vals("OLD", "-")),
+        _bump("stats_cabinet", cab("NEW"), slot_vals("NEW", "")),
+    ]
+    yield "slots", "DELETE", "", [_bump("stats_cabinet", cab("OLD"), slot_vals("OLD", "-"))]
+    yield "slot_state", "INSERT", "", [_bump("stats_cabinet", cab("NEW"), {"occupied": "NEW.occupied"})]
+    yield "slot_state", "UPDATE", "OF occupied", [_bump("stats_cabinet", cab("NEW"), {"occupied": "NEW.occupied - OLD.occupied"})]
+    yield "slot_state", "DELETE", "", [_bump("stats_cabinet", cab("OLD"), {"occupied": "-OLD.occupied"})]
+
+
+def create_schema(cursor):
+    """롤업 테이블과 갱신 트리거를 만듭니다. (migrations.py 에서 slot_state 다음에 호출)"""
+    created = cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='stats_status'").fetchone() is None
+    cursor.execute('''CREATE TABLE IF NOT EXISTS stats_hourly (hour TEXT PRIMARY KEY, orders INTEGER NOT NULL DEFAULT 0, quantity INTEGER NOT NULL DEFAULT 0, revenue INTEGER NOT NULL DEFAULT 0)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS stats_status (status TEXT PRIMARY KEY, orders INTEGER NOT NULL DEFAULT 0, quantity INTEGER NOT NULL DEFAULT 0)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS stats_brand (brand TEXT PRIMARY KEY, orders INTEGER NOT NULL DEFAULT 0, quantity INTEGER NOT NULL DEFAULT 0, revenue INTEGER NOT NULL DEFAULT 0, products INTEGER NOT NULL DEFAULT 0, stock INTEGER NOT NULL DEFAULT 0)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS stats_stock (day TEXT PRIMARY KEY, stock_in INTEGER NOT NULL DEFAULT 0, stock_out INTEGER NOT NULL DEFAULT 0)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS stats_cabinet (cabinet TEXT PRIMARY KEY, slots INTEGER NOT NULL DEFAULT 0, active INTEGER NOT NULL DEFAULT 0, occupied INTEGER NOT NULL DEFAULT 0)''')
+    for table, op, cols, body in _triggers():
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()}_stats AFTER {op} {cols} ON {table}
+            BEGIN {" ".join(body)} END''')
+    # 처음 만들었으면 기존 데이터로 채움
+    if created:
+        _fill(cursor)
+
+
+def _fill(cursor):
+    # stats_stock 은 재고 변경 이력이 없어서 다시 만들 수 없으므로 그대로 둡니다.
+    for table in ("stats_hourly", "stats_status", "stats_brand", "stats_cabinet"):
+        cursor.execute(f"DELETE FROM {table}")
+    # 접수 시각이 없는 기존 주문은 order_date(시각 포함 시) 또는 updated_at 으로 시간대를 정함
+    cursor.execute("""INSERT INTO stats_hourly (hour, orders, quantity, revenue)
+                      SELECT CASE WHEN length(order_date) >= 13 THEN substr(order_date, 1, 13) ELSE substr(updated_at, 1, 13) END AS h,
+                             count(*), SUM(COALESCE(quantity, 0)), SUM(COALESCE(quantity, 0) * COALESCE(price, 0))
+                      FROM orders GROUP BY h""")
+    cursor.execute("""INSERT INTO stats_status (status, orders, quantity)
+                      SELECT COALESCE(status, ''), count(*), SUM(COALESCE(quantity, 0)) FROM orders GROUP BY 1""")
+    cursor.execute("""INSERT INTO stats_brand (brand, orders, quantity, revenue)
+                      SELECT COALESCE(company, ''), count(*), SUM(COALESCE(quantity, 0)), SUM(COALESCE(quantity, 0) * COALESCE(price, 0))
+                      FROM orders GROUP BY 1""")
+    cursor.execute("""INSERT INTO stats_brand (brand, products, stock)
+                      SELECT COALESCE(brand, ''), count(*), SUM(COALESCE(stock, 0)) FROM products WHERE true GROUP BY 1
+                      ON CONFLICT(brand) DO UPDATE SET products = excluded.products, stock = excluded.stock""")
+    cursor.execute(f"""INSERT INTO stats_cabinet (cabinet, slots, active, occupied)
+                       SELECT {_cabinet('s')} AS c, count(*), SUM(COALESCE(s.is_active, 0)), SUM(COALESCE(st.occupied, 0))
+                       FROM slots s LEFT JOIN slot_state st ON st.slot_id = s.slot_id GROUP BY c""")
+
+
+def backfill(conn):
+    """기존 orders/products/slots 로 롤업 테이블을 다시 계산합니다."""
+    with db.immediate(conn):
+        _fill(conn.cursor())
+
+
+# --- 조회 ---
+
+def hourly(conn, hours=24):
+    rows = conn.execute(f"SELECT hour, orders, quantity, revenue FROM stats_hourly WHERE hour > strftime('%Y-%m-%d %H', 'now', 'localtime', ?) ORDER BY hour",
+                        (f"-{hours} hours",)).fetchall()
+    return [dict(r) for r in rows]
+
+
+def by_status(conn):
+    return [dict(r) for r in conn.execute("SELECT status, orders, quantity FROM stats_status WHERE orders != 0 ORDER BY status")]
+
+
+def by_brand(conn):
+    return [dict(r) for r in conn.execute("SELECT brand, orders, quantity, revenue, products, stock FROM stats_brand "
+                                          "WHERE orders != 0 OR products != 0 ORDER BY brand")]
+
+
+def by_cabinet(conn):
+    return [dict(r) for r in conn.execute("SELECT cabinet, slots, active, occupied FROM stats_cabinet WHERE slots != 0 ORDER BY cabinet")]
+
+
+def stock_flow(conn, days=7):
+    rows = conn.execute("SELECT day, stock_in, stock_out FROM stats_stock WHERE day > date('now', 'localtime', ?) ORDER BY day",
+                        (f"-{days} days",)).fetchall()
+    return [dict(r) for r in rows]
+
+
+# --- 라우트 ---
+
+@stats_bp.route('/api/stats', methods=['GET'])
+def stats_dashboard():
+    conn = get_db_connection()
+    return jsonify({"hourly": hourly(conn), "status": by_status(conn), "brands": by_brand(conn),
+                    "cabinets": by_cabinet(conn), "stock": stock_flow(conn)})
+
+
+@stats_bp.route('/api/stats/hourly', methods=['GET'])
+def stats_hourly():
+    hours = min(max(request.args.get('hours', 24, type=int), 1), HOURS_MAX)
+    return jsonify(hourly(get_db_connection(), hours))
+
+
+@stats_bp.route('/api/stats/status', methods=['GET'])
+def stats_status():
+    return jsonify(by_status(get_db_connection()))
+
+
+@stats_bp.route('/api/stats/brands', methods=['GET'])
+def stats_brands():
+    return jsonify(by_brand(get_db_connection()))
+
+
+@stats_bp.route('/api/stats/cabinets', methods=['GET'])
+def stats_cabinets():
+    return jsonify(by_cabinet(get_db_connection()))
+
+
+@stats_bp.route('/api/stats/stock', methods=['GET'])
+def stats_stock():
+    days = min(max(request.args.get('days', 7, type=int), 1), DAYS_MAX)
+    return jsonify(stock_flow(get_db_connection(), days))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['backfill']:
+        print("사용법: python stats.py backfill")
+        sys.exit(1)
+    import migrations
+    conn = db.connect()
+    try:
+        migrations.migrate(conn)   # 테이블/트리거 준비
+        backfill(conn)
+        print("✅ 통계 롤업 테이블을 다시 계산했습니다.")
+        for name, fn in (("status", by_status), ("brands", by_brand), ("cabinets", by_cabinet)):
+            print(name, fn(conn))
+    finally:
+        conn.close()
@@ -0,0 +1,305 @@
+import os
+import sys
+import time
+import queue
+import hashlib
+import tempfile
+import threading
+from flask import request, send_file, abort
+
+import db
+
+try:
+    from PIL import Image
+except ImportError:   # Pillow 가 없으면 썸네일 없이 원본만 제공
+    Image = None
+
+# =========================================================
+# ▼ [업로드 저장소] 내용 해시(SHA-256) 기반 저장 + 참조 카운트 + 썸네일
+# =========================================================
+# - 파일은 uploads/objects/<해시 앞 2자리>/<해시>.<확장자> 로 한 번만 저장됩니다.
+#   같은 이미지를 여러 명이 올려도 파일은 하나이고 upload_objects.refcount 만 늘어납니다.
+# - refcount 는 users.profile_image 가 바뀔 때 트리거가 맞춥니다. 0 이 되면 워커가 지웁니다.
+# - 썸네일(긴 변 64/256px)은 백그라운드 워커가 처음 한 번만 만듭니다.
+# - /uploads/<이름>?size=64 : 강한 ETag, 1년 캐시(immutable), Range 지원
+#   (썸네일이 아직 없으면 원본을 짧은 캐시로 보내고 생성을 예약합니다.)
+#
+# 기존 파일(sd_png 등)을 저장소로 옮기기:  python upload_store.py migrate
+
+ROOT = 'uploads'
+THUMB_SIZES = (64, 256)
+CACHE_SECONDS = 365 * 24 * 3600
+PENDING_CACHE_SECONDS = 60      # 썸네일 생성 전 원본을 대신 보낼 때
+GC_INTERVAL = 600               # refcount 0 객체 정리 주기(초)
+GC_GRACE = "-1 hours"           # 업로드 직후 아직 참조되기 전 객체는 지우지 않음
+CHUNK = 64 * 1024
+
+# 매직 바이트로 판별하는 이미지 형식: (시그니처, 오프셋, 확장자, MIME)
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 0, 'png', 'image/png'),
+    (b'\xff\xd8\xff', 0, 'jpg', 'image/jpeg'),
+    (b'GIF8', 0, 'gif', 'image/gif'),
+    (b'WEBP', 8, 'webp', 'image/webp'),
+    (b'BM', 0, 'bmp', 'image/bmp'),
+]
+MIME = {ext: mime for _, _, ext, mime in _SIGNATURES}
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def create_schema(cursor):
+    """upload_objects 테이블과 참조 카운트 트리거를 만듭니다. (migrations.py 에서 users 다음에 호출)"""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS upload_objects (name TEXT PRIMARY KEY, size INTEGER NOT NULL, mime TEXT, refcount INTEGER NOT NULL DEFAULT 0, created_at TEXT DEFAULT (datetime('now', 'localtime')))''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_upload_objects_refcount ON upload_objects (refcount)")
+    inc = "UPDATE upload_objects SET refcount = refcount + 1 WHERE name = NEW.profile_image;"
+    dec = "UPDATE upload_objects SET refcount = refcount - 1 WHERE name = OLD.profile_image;"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_users_insert_upload AFTER INSERT ON users BEGIN {inc} END")
+    cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_users_update_upload AFTER UPDATE OF profile_image ON users
+        WHEN NEW.profile_image IS NOT OLD.profile_image BEGIN {dec} {inc} END''')
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_users_delete_upload AFTER DELETE ON users BEGIN {dec} END")
+
+
+def sniff(head):
+    for sig, offset, ext, mime in _SIGNATURES:
+        if head[offset:offset + len(sig)] == sig:
+            return ext, mime
+    raise UnsupportedImage("지원하지 않는 이미지 형식입니다. (png, jpg, gif, webp, bmp)")
+
+
+def is_object_name(name):
+    stem, _, ext = name.partition('.')
+    return len(stem) == 64 and ext in MIME and all(c in '0123456789abcdef' for c in stem)
+
+
+def object_path(name):
+    return os.path.join(ROOT, 'objects', name[:2], name)
+
+
+def thumb_path(name, size):
+    stem, _, ext = name.partition('.')
+    # 투명도를 쓸 수 있는 형식은 PNG, 나머지는 JPEG 썸네일
+    return os.path.join(ROOT, 'thumbs', name[:2], f"{stem}_{size}.{'png' if ext in ('png', 'gif', 'webp') else 'jpg'}")
+
+
+def put(conn, stream):
+    """파일 스트림을 해시하면서 임시 파일에 쓰고, 처음 보는 내용이면 객체로 옮깁니다. 객체 이름을 반환합니다.
+
+    upload_objects 에 행만 추가하며 커밋은 호출한 쪽에서 합니다.
+    행을 먼저 넣어 쓰기 잠금을 잡은 뒤 파일을 옮기므로, 같은 내용을 지우는 collect_garbage 와 엇갈리지 않습니다.
+    (새 행이면 디스크에 파일이 남아 있어도 다시 씀)
+    """
+    tmp_dir = os.path.join(ROOT, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            head = b''
+            while True:
+                chunk = stream.read(CHUNK)
+                if not chunk:
+                    break
+                if len(head) < 16:
+                    head += chunk[:16]
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        ext, mime = sniff(head)
+        name = f"{digest.hexdigest()}.{ext}"
+        path = object_path(name)
+        created = conn.execute("INSERT INTO upload_objects (name, size, mime) VALUES (?, ?, ?) ON CONFLICT(name) DO NOTHING",
+                               (name, size, mime)).rowcount == 1
+        if created or not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        else:
+            os.remove(tmp)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    get_worker().request_thumbs(name)
+    return name
+
+
+def make_thumb(name, size):
+    if Image is None:
+        return False
+    dst = thumb_path(name, size)
+    if os.path.exists(dst):
+        return True
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    with Image.open(object_path(name)) as img:
+        img.thumbnail((size, size))
+        tmp = f"{dst}.{threading.get_ident()}.tmp"
+        if dst.endswith('.png'):
+            img.save(tmp, 'PNG', optimize=True)
+        else:
+            img.convert('RGB').save(tmp, 'JPEG', quality=85)
+    os.replace(tmp, dst)
+    return True
+
+
+def remove(name):
+    for path in [object_path(name)] + [thumb_path(name, s) for s in THUMB_SIZES]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def collect_garbage(conn):
+    """참조가 없어진 객체를 DB 와 디스크에서 지웁니다. 지운 개수를 반환합니다.
+
+    파일은 행을 지운 트랜잭션 안에서(쓰기 잠금을 쥔 채) 지웁니다. 그동안 put() 은 행을 넣지 못하고 기다렸다가
+    커밋 뒤 새 행을 만들면서 파일을 다시 씁니다.
+    """
+    with db.immediate(conn):
+        rows = conn.execute("""DELETE FROM upload_objects WHERE refcount <= 0 AND created_at < datetime('now', 'localtime', ?)
+                               RETURNING name""", (GC_GRACE,)).fetchall()
+        for r in rows:
+            remove(r[0])
+    return len(rows)
+
+
+class ThumbnailWorker:
+    """썸네일 생성 + 주기적 정리를 하는 백그라운드 스레드 (요청 스레드를 막지 않음)"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.made = 0
+        self.errors = 0
+        self.collected = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='thumbnail-worker', daemon=True)
+            self._thread.start()
+        return self
+
+    def request_thumbs(self, name):
+        if Image is None:
+            return
+        with self._lock:
+            if name in self._pending:
+                return
+            self._pending.add(name)
+        self._queue.put(name)
+
+    def _run(self):
+        last_gc = time.monotonic()
+        while True:
+            try:
+                name = self._queue.get(timeout=GC_INTERVAL)
+            except queue.Empty:
+                name = None
+            if name is not None:
+                try:
+                    for size in THUMB_SIZES:
+                        make_thumb(name, size)
+                    self.made += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[thumbnail] {name} 썸네일 생성 실패: {e}")
+                finally:
+                    with self._lock:
+                        self._pending.discard(name)
+            if time.monotonic() - last_gc >= GC_INTERVAL:
+                last_gc = time.monotonic()
+                conn = db.connect()
+                try:
+                    self.collected += collect_garbage(conn)
+                finally:
+                    conn.close()
+
+    def wait_idle(self, timeout=10.0):
+        # 벤치마크/마이그레이션용: 예약된 썸네일이 모두 만들어질 때까지 대기
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._pending
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = ThumbnailWorker().start()
+        return _worker
+
+
+def serve(name):
+    """/uploads/<name> 응답 (ETag/If-None-Match, Range, Cache-Control 은 send_file 이 처리)"""
+    size = request.args.get('size', type=int)
+    if not is_object_name(name):
+        # 저장소 도입 전 파일 이름 (sd_png 등): 내용이 바뀔 수 있으므로 짧은 캐시 + 재검증
+        path = os.path.join(ROOT, os.path.basename(name))
+        if not os.path.isfile(path):
+            abort(404)
+        return send_file(os.path.abspath(path), conditional=True, max_age=PENDING_CACHE_SECONDS)
+
+    path = object_path(name)
+    if not os.path.isfile(path):
+        abort(404)
+    stem = name.partition('.')[0]
+    if size is not None:
+        # 요청 크기 이상인 가장 작은 썸네일 (없으면 가장 큰 썸네일)
+        size = next((s for s in THUMB_SIZES if s >= size), THUMB_SIZES[-1])
+        thumb = thumb_path(name, size)
+        if os.path.isfile(thumb):
+            res = send_file(os.path.abspath(thumb), etag=f"{stem}-{size}", conditional=True, max_age=CACHE_SECONDS)
+            res.cache_control.immutable = True
+            return res
+        get_worker().request_thumbs(name)
+        return send_file(os.path.abspath(path), mimetype=MIME[name.partition('.')[2]], etag=stem,
+                         conditional=True, max_age=PENDING_CACHE_SECONDS)
+
+    res = send_file(os.path.abspath(path), mimetype=MIME[name.partition('.')[2]], etag=stem,
+                    conditional=True, max_age=CACHE_SECONDS)
+    res.cache_control.immutable = True
+    return res
+
+
+def migrate(conn, prune=False):
+    """uploads/ 에 있는 기존 파일을 저장소로 옮기고 users.profile_image 를 새 이름으로 바꿉니다."""
+    moved = {}
+    for entry in sorted(os.scandir(ROOT), key=lambda e: e.name):
+        if not entry.is_file():
+            continue
+        try:
+            with open(entry.path, 'rb') as f:
+                moved[entry.name] = put(conn, f)
+        except UnsupportedImage:
+            print(f"  건너뜀 (이미지 아님): {entry.name}")
+    with db.immediate(conn):
+        conn.executemany("UPDATE users SET profile_image = ? WHERE profile_image = ?",
+                         [(new, old) for old, new in moved.items()])
+    if prune:
+        for old in moved:
+            os.remove(os.path.join(ROOT, old))
+    return moved
+
+
+if __name__ == '__main__':
+    if not sys.argv[1:] or sys.argv[1] != 'migrate':
+        print("사용법: python upload_store.py migrate [--prune]")
+        sys.exit(1)
+    import migrations
+    conn = db.connect()
+    try:
+        migrations.migrate(conn)   # 테이블/트리거 준비
+        moved = migrate(conn, prune='--prune' in sys.argv)
+        for old, new in moved.items():
+            print(f"  {old} → {new}")
+        print(f"✅ {len(moved)}개 파일 → {len(set(moved.values()))}개 객체")
+        get_worker().wait_idle(60)
+    finally:
+        conn.close()